@@ -0,0 +1 @@
+# Lets pytest import plate_model and raspi_clients from the repository root
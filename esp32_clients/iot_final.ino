@@ -16,7 +16,7 @@ PubSubClient client(espClient);
 // Ultrasonic Sensor Pins
 const int TRIG_PIN = 5;
 const int ECHO_PIN = 13;
-const long DISTANCE_THRESHOLD = 20; // Threshold in centimeters
+const long DISTANCE_THRESHOLD = 400; // Threshold in centimeters, wide enough to see a car approaching
 
 // Storage for the recorded code
 struct storedIRDataStruct {
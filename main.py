@@ -1,11 +1,25 @@
 import paho.mqtt.client as mqtt
 import time
 import sys
-import cv2
+import json
+import threading
+from functools import partial
 import pandas as pd
-import plate_model.darknet as darknet
-import easyocr
 from plate_model.utils import *
+from plate_model.model_registry import ModelRegistry
+from plate_model.camera import FrameGrabber
+from plate_model.visualization import DetectionViewer
+from plate_model.motion_gate import ChangeDetector
+from plate_model.evidence import EvidenceWriter
+from plate_model.ocr_reader import read_crop, read_crops
+from plate_model.ocr_pool import OCRWorkerPool
+from plate_model import metrics
+from raspi_clients.scheduler import TaskScheduler
+from raspi_clients.authorization import AuthorizedPlates
+from raspi_clients.entry_log import EntryLog
+from raspi_clients.publisher import MqttPublisher, DELIVERED
+from raspi_clients.trigger import ApproachTracker, parse_distance, WARMUP, TRIGGER, CLEAR
+from raspi_clients.recent_plates import RecentPlateCache
 from plate_model.darknet_video_full_detect import (
     parse_args as fullplate_parse_args,
     check_arguments_errors as fullplate_check_arguments_errors,
@@ -16,36 +30,97 @@ from plate_model.darknet_video_ocr import (
     parse_args as ocr_parse_args,
     check_arguments_errors as ocr_check_arguments_errors,
     video_capture_ocr,
-    validate_plate_ocr,
+    fuse_plate_ocr,
 )
 
 # Global variables
-flag_connected = 0
-task_queue = []
-task_type = None  # Set this dynamically based on the script argument
-task_in_progress = False  # Track if a task is in progress
+gates = {}  # Gate id -> gate config (see get_gates_config), set in main()
+sensor_gates = {}  # Sensor topic -> gate id
+scheduler = TaskScheduler()  # Wakes the main loop on triggers, coalesces duplicates per gate, round-robin across gates
+trackers = {}  # Gate id -> ApproachTracker
+trackers_lock = threading.Lock()
+recent_plates = RecentPlateCache(ttl=60.0, clear_grace=3.0)  # Decision for the vehicle still at each gate
+registry = None  # Resident networks and OCR reader, loaded once in main() and shared by every gate
+cameras = {}  # Camera source -> always-on frame grabber, started once in main()
+gate_stats = {}  # Gate id -> metrics.GateMetrics
+evidence = None  # Background writer for the images of accepted plates, started once in main()
+ocr_pool = None  # EasyOCR worker processes, started once in main() for the OCR task
+authorized = None  # Authorized-plate registry, reloaded in the background when its file changes
+entry_log = None  # Background writer of every gate decision, for the dashboard
+publisher = None  # Background MQTT publisher, so no thread waits on the broker
+
+def get_gates_config():
+    """
+    One entry per gate. Gates may share a camera source; every gate needs its own
+    sensor topic. "pipeline" None uses the one chosen on the command line.
+    """
+    return [
+        {
+            "id": "garage",
+            "input": "0",
+            "sensor_topic": "ultrasonic/detection",
+            "actuator_topic": "garage/open_garage",
+            "results_topic": "garage/results",  # JSON summary of every decision
+            "trigger_distance": 200,  # cm; detection may already start on the approach (see README)
+            "pipeline": None,  # "fullplate" or "ocr"
+        },
+    ]
 
 def get_fullplate_config():
     return {
-        "input": "0",
         "weights": "./plate_model/FullPlates/AntigoPlates_test3_30000.weights",
         "config_file": "./plate_model/FullPlates/AntigoPlates_test3.cfg",
         "data_file": "./plate_model/FullPlates/AntigoPlates_test3.data",
+        "names_file": "./plate_model/FullPlates/AntigoPlates_test3.names",
+        "backend": "darknet",  # "darknet" (GPU) or "opencv" (CPU, OpenCV DNN)
+        "threads": 4,  # OpenCV DNN worker threads
         "gpu_index": 0,
         "out_filename": None,
         "thresh": 0.25,
         "dont_show":True,
-        "ext_output":True
+        "ext_output":True,
+        "pipelined": True,
+        "cascade": True,  # Locate the plate, then read characters on an upscaled crop (runs serially)
+        "skip_static": True,  # Skip the network while the scene is unchanged and nothing is in view
+        "evidence_dir": "./evidence",  # Saved in dated subdirectories; empty disables saving
+        "evidence_format": "jpg",  # jpg, webp or png
+        "evidence_quality": 90,
+        "evidence_retention_days": 30,
+        "evidence_max_mb": 2048,
+        "authorized_plates": None,  # Text file or SQLite .db (see raspi_clients/authorization.py); None opens for any plate
+        "entry_log": "./entries.db",  # SQLite log of every decision; empty disables it
+        "entry_log_flush_interval": 1.0,  # Seconds the writer gathers decisions into one batch
     }
 
 def get_ocr_config():
     return {
-        "input": "0",
         "weights": "./plate_model/DiffPlates/DiffPlates_best.weights",
         "config_file": "./plate_model/DiffPlates/DiffPlates.cfg",
         "data_file": "./plate_model/DiffPlates/DiffPlates.data",
+        "names_file": "./plate_model/DiffPlates/DiffPlates.names",
+        "backend": "darknet",  # "darknet" (GPU) or "opencv" (CPU, OpenCV DNN)
+        "threads": 4,  # OpenCV DNN worker threads
         "gpu_index": 0,
         "out_filename": "",
+        "thresh": 0.25,
+        "dont_show": True,
+        "batch_size": 4,  # Frames per batched forward pass
+        "pipelined": True,  # Only used when batch_size is 1
+        "skip_static": True,  # Only used when batch_size is 1
+        "ocr_grayscale": True,  # Hand the recognizer a grayscale crop and skip EasyOCR's text detection
+        "ocr_height": 64,  # Resize the crop to the recognizer's input height (None keeps its size)
+        "ocr_top_k": 3,  # Most confident plate crops read together and fused by voting
+        "ocr_workers": 2,  # EasyOCR worker processes; 0 reads inline in the gate process
+        "ocr_threads_per_worker": 1,
+        "ocr_timeout": 5.0,  # Seconds before a plate read is given up
+        "evidence_dir": "./evidence",  # Saved in dated subdirectories; empty disables saving
+        "evidence_format": "jpg",  # jpg, webp or png
+        "evidence_quality": 90,
+        "evidence_retention_days": 30,
+        "evidence_max_mb": 2048,
+        "authorized_plates": None,  # Text file or SQLite .db (see raspi_clients/authorization.py); None opens for any plate
+        "entry_log": "./entries.db",  # SQLite log of every decision; empty disables it
+        "entry_log_flush_interval": 1.0,  # Seconds the writer gathers decisions into one batch
     }
 
 def check_arguments_errors_hardcoded(config):
@@ -56,12 +131,35 @@ def check_arguments_errors_hardcoded(config):
         raise ValueError(f"Invalid weight path {os.path.abspath(config['weights'])}")
     if not os.path.exists(config["data_file"]):
         raise ValueError(f"Invalid data file path {os.path.abspath(config['data_file'])}")
-    if str2int(config["input"]) == str and not os.path.exists(config["input"]):
-        raise ValueError(f"Invalid video path {os.path.abspath(config['input'])}")
+
+def get_pipeline_config(pipeline):
+    return get_fullplate_config() if pipeline == "fullplate" else get_ocr_config()
+
+def check_gates(gate_list, default_pipeline):
+    """
+    Fill in the default pipeline and validate the gate configs. Returns {gate id: gate}.
+    """
+    checked = {}
+    topics = set()
+    for gate in gate_list:
+        gate = dict(gate, pipeline=gate.get("pipeline") or default_pipeline)
+        if gate["id"] in checked:
+            raise ValueError(f"Duplicate gate id '{gate['id']}'")
+        if gate["sensor_topic"] in topics:
+            raise ValueError(f"Sensor topic '{gate['sensor_topic']}' is used by more than one gate")
+        if gate["pipeline"] not in ("fullplate", "ocr"):
+            raise ValueError(f"Gate '{gate['id']}' has no pipeline: set it or pass --fullplate/--ocr")
+        if isinstance(str2int(gate["input"]), str) and not os.path.exists(gate["input"]):
+            raise ValueError(f"Invalid video path {os.path.abspath(gate['input'])} for gate '{gate['id']}'")
+        topics.add(gate["sensor_topic"])
+        checked[gate["id"]] = gate
+    if not checked:
+        raise ValueError("No gates configured")
+    return checked
 
 def parse_main_args():
     """
-    Parse the main script arguments to determine which task to run.
+    Parse the main script arguments to determine the default pipeline of the gates.
     """
     import argparse
     parser = argparse.ArgumentParser(description="Ultrasonic-triggered task selector")
@@ -73,175 +171,435 @@ def parse_main_args():
         return "fullplate"
     elif args.ocr:
         return "ocr"
+    elif all(gate.get("pipeline") for gate in get_gates_config()):
+        return None
     else:
         print("You must specify either --fullplate or --ocr.")
         sys.exit(1)
 
 def on_connect(client, userdata, flags, rc):
-    global flag_connected
-    flag_connected = 1
     client_subscriptions(client)
     print("Connected to MQTT server")
 
 def on_disconnect(client, userdata, rc):
-    global flag_connected
-    flag_connected = 0
     print("Disconnected from MQTT server")
 
 def callback_ultrasonic_detection(client, userdata, msg):
-    global task_in_progress  # Use the global flag to check task status
     message = msg.payload.decode('utf-8').strip()
     # print(f"Ultrasonic detection message: {message}")
-    
-    # Extract distance from the message using regex
-    match = re.search(r"Object detected at (\d+) cm", message)
-    if match:
-        distance = int(match.group(1))
-        # print(f"Detected distance: {distance} cm")
-        
-        # Only activate if distance is 200 or more and no task is currently in progress
-        if distance <= 200 and not task_in_progress:
-            print(f"Distance meets threshold. Activating {task_type}.")
-            task_queue.append(task_type)  # Add the task to the queue
-        # else:
-            # print("Distance does not meet threshold or task already in progress. No action taken.")
+
+    distance = parse_distance(message)
+    if distance is None:
+        return
+
+    gate = gates[sensor_gates[msg.topic]]
+    with trackers_lock:
+        if gate["id"] not in trackers:
+            trackers[gate["id"]] = ApproachTracker(trigger_distance=gate.get("trigger_distance", 200))
+        tracker = trackers[gate["id"]]
+        event = tracker.update(distance)
+
+    if event == CLEAR:
+        recent_plates.left(gate["id"])
+        return
+    # Start detection already while the car is closing in; the in-range trigger is
+    # then coalesced by the scheduler into the task that is already running
+    if event not in (WARMUP, TRIGGER):
+        return
+    recent_plates.arrived(gate["id"])
+    metrics.TRIGGERS_RECEIVED.inc()
+
+    # The vehicle the last decision was made for has not left: reuse it instead of detecting again
+    cached = recent_plates.lookup(gate["id"])
+    if cached is not None:
+        metrics.TRIGGERS_CACHED.inc()
+        print(f"{event.capitalize()} at {distance} cm on gate '{gate['id']}': {cached.plate} still present, "
+              f"reusing decision '{cached.decision}'.")
+        return
+
+    if scheduler.submit(gate["id"], gate["pipeline"]):
+        print(f"{event.capitalize()} at {distance} cm on gate '{gate['id']}' "
+              f"(approach speed {tracker.speed():.0f} cm/s). Activating {gate['pipeline']}.")
+    else:
+        metrics.TRIGGERS_COALESCED.inc()
+
+def expire_trackers():
+    """
+    Turn sensor silence into CLEAR events. The ESP32 stops publishing when nothing
+    is in range, so no message arrives to do it from the MQTT callback.
+    """
+    with trackers_lock:
+        cleared = [gate for gate, tracker in trackers.items() if tracker.expire() == CLEAR]
+    for gate in cleared:
+        recent_plates.left(gate)
+
+def start_tracker_expiry(interval=0.5):
+    """
+    Expire the trackers on their own thread, so a bay that clears while the worker
+    is busy with a (possibly other gate's) task is noticed right away.
+    """
+    def run():
+        while True:
+            time.sleep(interval)
+            expire_trackers()
+    threading.Thread(target=run, name="tracker-expiry", daemon=True).start()
 
 def client_subscriptions(client):
-    client.subscribe("ultrasonic/detection")
-    print("Subscribed to topic: ultrasonic/detection")
+    for topic in sensor_gates:
+        client.subscribe(topic)
+        print(f"Subscribed to topic: {topic}")
+
+def load_models(pipelines):
+    """
+    Load the networks (and OCR reader) needed by the gates' pipelines once,
+    so every trigger starts from warm handles. Gates running the same pipeline
+    share its network and OCR workers.
+    """
+    global registry, ocr_pool
+    registry = ModelRegistry()
+    if "fullplate" in pipelines:
+        config = get_fullplate_config()
+        check_arguments_errors_hardcoded(config)
+        registry.load_network("fullplate", config)
+    if "ocr" in pipelines:
+        config = get_ocr_config()
+        check_arguments_errors_hardcoded(config)
+        registry.load_network("ocr", config)
+        if config["ocr_workers"] > 0:
+            ocr_pool = OCRWorkerPool(config["ocr_workers"], threads_per_worker=config["ocr_threads_per_worker"]).start()
+        else:
+            registry.load_reader()
+    registry.report()
+
+def start_evidence_writer(config):
+    """
+    Start the background writer, so saving the images of an accepted plate never
+    delays opening the gate.
+    """
+    global evidence
+    evidence = EvidenceWriter.from_config(config)
+
+def start_entry_log(config):
+    global entry_log
+    entry_log = EntryLog.from_config(config)
+
+def start_authorization(config):
+    """
+    Load the authorized-plate registry; edits to its file are picked up while running.
+    """
+    global authorized
+    if config["authorized_plates"]:
+        authorized = AuthorizedPlates(config["authorized_plates"]).start()
+    else:
+        print("No authorized plate list configured: the gate opens for any plate read.")
+
+def start_cameras():
+    """
+    Open every gate's camera once and keep it grabbing in the background, so triggers skip
+    the camera open / auto-exposure settling and can see the frames from just before.
+    """
+    for gate in gates.values():
+        if gate["input"] not in cameras:
+            cameras[gate["input"]] = FrameGrabber(str2int(gate["input"]), buffer_size=30).start()
+
+def open_session(task):
+    """
+    Capture session for a task. After a few seconds without a decision it gives way
+    when another gate is waiting, so one busy entrance cannot hold the detector.
+    """
+    return cameras[gates[task.gate]["input"]].session(
+        pre_trigger=0.5, max_duration=15.0,
+        yield_after=3.0, should_yield=partial(scheduler.waiting, exclude=task.gate),
+    )
 
-def run_fullplate():
-    global task_in_progress
-    task_in_progress = True  # Mark task as in progress
-    
+def run_fullplate(cap):
     config = get_fullplate_config()
-    print(config)
-    darknet.set_gpu(config["gpu_index"])
-    check_arguments_errors_hardcoded(config)
-
-    # Load FullPlate settings
-    names_file = "./plate_model/FullPlates/AntigoPlates_test3.names"
-    network = darknet.load_net_custom(config["config_file"].encode("ascii"), config["weights"].encode("ascii"), 0, 1)
-    class_names = open(names_file).read().splitlines()
-    colours = darknet.class_colors(class_names)
-    class_colors = colours
-
-    darknet_width = darknet.network_width(network)
-    darknet_height = darknet.network_height(network)
-    input_path = str2int(config["input"])
-    cap = cv2.VideoCapture(input_path)
-    video_width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-    video_height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-
-    video = set_saved_video(cap, config["out_filename"], (video_width, video_height))
+    handle = registry.network("fullplate")
+
+    viewer = DetectionViewer.from_config(config, handle.class_colors, cap)  # None when headless
 
     # Run FullPlate detection
     confidence_threshold = 50.0
-    required_consecutive_detections = 1
+    required_consecutive_detections = 3  # Minimum frames (at least 2); the per-character consensus decides when to stop
+    stats = {}
+    start = time.perf_counter()
     result = video_capture_full(
-        cap, confidence_threshold, required_consecutive_detections, network, class_names, darknet_width, darknet_height, class_colors, config
+        cap, confidence_threshold, required_consecutive_detections, handle.detector, handle.class_names,
+        handle.width, handle.height, handle.class_colors, config,
+        image_pool=handle.image_pool, pipelined=config["pipelined"], viewer=viewer,
+        cascade=config["cascade"],
+        change_detector=ChangeDetector() if config["skip_static"] else None,
+        evidence=evidence, stats=stats
     )
-    video.release()
-
-    task_in_progress = False  # Mark task as done
+    detection_seconds = time.perf_counter() - start
 
     if result is None:
         print("No valid plate detected.")
-    else:
-        plate_info, plate_type = result
-        plate, confidences = plate_info
-        final_plate = validate_plate_full(plate_type, plate)
-
-        print("Final Plate: ", final_plate)
-        print("Plate Type: ", plate_type)
-        print("Confidence: ", confidences)
-        return final_plate, plate_type
+        return None
+    plate_info, plate_type = result
+    plate, confidences = plate_info
+    final_plate = validate_plate_full(plate_type, plate)
+
+    print("Final Plate: ", final_plate)
+    print("Plate Type: ", plate_type)
+    print("Confidence: ", confidences)
+    return {
+        "plate": final_plate,
+        "plate_type": plate_type,
+        "confidence": sum(confidences) / len(confidences) / 100 if confidences else None,
+        "evidence_path": (stats.get("evidence") or {}).get("crop"),
+        "detection_seconds": detection_seconds,
+    }
                  
-def run_ocr():
-    global task_in_progress
-    task_in_progress = True  # Mark task as in progress
-    
+def run_ocr(cap, on_result):
+    """
+    Detect the plate and read it. on_result(result or None) is called once the
+    OCR is done, which with the worker pool happens on another thread after
+    run_ocr has returned. result is a dict as returned by run_fullplate, its
+    plate None when the crops could not be read.
+    """
     config = get_ocr_config()
-    darknet.set_gpu(config["gpu_index"])
-    check_arguments_errors_hardcoded(config)
-
-    # Load OCR settings
-    names_file = "./plate_model/DiffPlates/DiffPlates.names"
-    network = darknet.load_net_custom(config["config_file"].encode("ascii"), config["weights"].encode("ascii"), 0, 1)
-    class_names = open(names_file).read().splitlines()
-    colours = darknet.class_colors(class_names)
-    class_colors = colours
-
-    darknet_width = darknet.network_width(network)
-    darknet_height = darknet.network_height(network)
-    input_path = str2int(config["input"])
-    cap = cv2.VideoCapture(input_path)
-    video_width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-    video_height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-
-    reader = easyocr.Reader(['en'])  # Initialize EasyOCR reader
-    video = set_saved_video(cap, config["out_filename"], (video_width, video_height))
+    handle = registry.network("ocr")
+
+    viewer = DetectionViewer.from_config(config, handle.class_colors, cap)  # None when headless
 
     # Run OCR detection
     confidence_threshold = 60.0
-    required_consecutive_detections = 20
-    result = video_capture_ocr(confidence_threshold, required_consecutive_detections)
-    video.release()
-
-    task_in_progress = False  # Mark task as done
+    required_consecutive_detections = 3  # Minimum confident frames; the plate type vote decides when to stop
+    start = time.perf_counter()
+    result = video_capture_ocr(
+        cap, confidence_threshold, required_consecutive_detections, handle.detector, handle.class_names,
+        handle.width, handle.height, handle.class_colors, config,
+        image_pool=handle.image_pool, pipelined=config["pipelined"], viewer=viewer,
+        detect_batch=handle.detect_batch if handle.batch_image is not None else None,
+        batch_size=handle.batch_size,
+        change_detector=ChangeDetector() if config["skip_static"] else None,
+        evidence=evidence,
+        top_k=config["ocr_top_k"]
+    )
 
     if result is None:
         print("No valid plate detected.")
+        on_result(None)
+        return
+    plate_type, image_path, crops = result
+    result = {"plate": None, "plate_type": plate_type, "confidence": None, "evidence_path": image_path,
+              "detection_seconds": time.perf_counter() - start}
+
+    if ocr_pool is None:
+        start = time.perf_counter()
+        if config["ocr_grayscale"]:
+            ocr_results = read_crops(registry.reader, crops, height=config["ocr_height"])
+        else:
+            ocr_results = [read_crop(registry.reader, crop, grayscale=False, height=config["ocr_height"]) for crop in crops]
+        result["ocr_seconds"] = time.perf_counter() - start
+        metrics.OCR_LATENCY.observe(result["ocr_seconds"])
+        on_result(finish_ocr(result, ocr_results))
+        return
+
+    # Read the plate in a worker process; the worker loop can take the next trigger meanwhile
+    future = ocr_pool.submit(crops, height=config["ocr_height"])
+    threading.Thread(
+        target=wait_for_ocr, args=(future, result, config["ocr_timeout"], on_result),
+        name="ocr-result", daemon=True,
+    ).start()
+
+def wait_for_ocr(future, result, timeout, on_result):
+    start = time.perf_counter()
+    try:
+        ocr_results = future.result(timeout=timeout)
+    except Exception as e:
+        future.cancel()
+        print(f"OCR failed or timed out after {timeout} s:", repr(e))
+        on_result(result)
+        return
+    result["ocr_seconds"] = time.perf_counter() - start
+    metrics.OCR_LATENCY.observe(result["ocr_seconds"])
+    try:
+        result = finish_ocr(result, ocr_results)
+    except Exception as e:
+        # on_result must run regardless: it finishes the gate's task
+        print("Error while fusing the OCR results:", repr(e))
+    on_result(result)
+
+def finish_ocr(result, ocr_results):
+    plate, confidence = fuse_plate_ocr(result["plate_type"], ocr_results)
+    if plate == "None":
+        return result
+
+    print("Final Plate: ", plate)
+    print("Confidence: ", confidence)
+    result.update(plate=plate, confidence=confidence)
+    return result
+
+def publish_open(gate):
+    """
+    Queue the open command on the gate's actuator topic. It is dropped if the broker
+    cannot be reached within 10 s: a late open would find another car, or none.
+    """
+    # QoS 0: the ESP32 replays the remote's IR code, a toggle, so a redelivered command would close the door
+    return publisher.publish(gate["actuator_topic"], "True", qos=0, ttl=10.0)
+
+def publish_result(gate, record):
+    """
+    Queue the compact JSON summary of a decision on the gate's results topic.
+    """
+    payload = {key: round(value, 3) if isinstance(value, float) else value for key, value in record.items()}
+    return publisher.publish(gate["results_topic"], json.dumps(payload, separators=(",", ":")), qos=1, ttl=60.0)
+
+def settle(task, cap, result):
+    """
+    Act on a task's result, unless the run gave way to another gate before finding
+    a plate: then the task goes back in the queue, keeping its trigger time.
+    Only then is the task finished, so triggers for the gate stay coalesced
+    while an OCR task's plate is still being read on the OCR result thread.
+    """
+    try:
+        if result is None and cap.preempted:
+            gate_stats[task.gate].preempted.inc()
+            if scheduler.requeue(task):
+                print(f"Gate '{task.gate}' yields to a waiting gate, requeued (attempt {task.attempt + 1}).")
+                return
+        open_gate(task, result)
+    finally:
+        finish_task(task)
+
+def finish_task(task):
+    if task.finished_at is not None:
+        return
+    scheduler.finish(task)
+    metrics.TASKS_RUN.inc()
+    gate_stats[task.gate].tasks.inc()
+
+def run_task(task):
+    """
+    Run one detection task on the worker thread. Its result reaches settle()
+    directly for FullPlate, and from the OCR result thread for OCR tasks
+    read by the worker pool.
+    """
+    gate_stats[task.gate].trigger_to_start.observe(task.trigger_to_start())
+    print(f"Starting {task.kind} for gate '{task.gate}': "
+          f"trigger-to-start {task.trigger_to_start() * 1000:.1f} ms, queue depth {scheduler.queue_depth()}")
+    cap = open_session(task)
+    try:
+        if task.kind == "fullplate":
+            settle(task, cap, run_fullplate(cap))
+        elif task.kind == "ocr":
+            run_ocr(cap, partial(settle, task, cap))
+    except Exception:
+        # No result will come: free the gate for its next trigger
+        finish_task(task)
+        raise
+
+def open_gate(task, result):
+    """
+    Count the outcome of a task, queue the open command for an accepted,
+    authorized plate, and publish and log the decision (for an open command,
+    once the publisher reports it delivered or expired, see open_delivered).
+    Called from the worker loop, or from the OCR result thread for OCR tasks.
+    """
+    result = dict(result or {})
+    decided_at = time.time()
+    plate = result.get("plate")
+    matched_plate = None
+    if not plate:
+        metrics.PLATES_REJECTED.inc()
+        decision = "no_plate"
     else:
-        plate_type, image_path = result
-        ocr_result = reader.readtext(image_path, allowlist='ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789')
-        plate, confidence = validate_plate_ocr(plate_type, ocr_result)
+        metrics.PLATES_ACCEPTED.inc()
+        decision = "opened"
+        if authorized is not None:
+            access = authorized.lookup(plate, gate=task.gate)
+            matched_plate = access.plate
+            if not access.authorized:
+                metrics.PLATES_UNAUTHORIZED.inc()
+                decision = "ambiguous" if access.ambiguous else "unauthorized"
+                reason = "ambiguous near-match" if access.ambiguous else "not authorized"
+                print(f"Plate {plate} {reason} at gate '{task.gate}', not opening.")
+            else:
+                print(f"Plate {plate} authorized as {access.plate} ({access.label or 'no label'}, "
+                      f"edit distance {access.distance}).")
+
+    if plate:
+        recent_plates.remember(task.gate, plate, decision)
+    if result.get("detection_seconds") is not None:
+        gate_stats[task.gate].detection.observe(result["detection_seconds"])
+    if decision != "opened":
+        log_decision(task, result, decision, matched_plate, decided_at)
+        return
+    message = publish_open(gates[task.gate])
+    print(f"Open command queued for topic '{gates[task.gate]['actuator_topic']}'")
+    message.add_done_callback(partial(open_delivered, task, result, matched_plate, decided_at))
+
+def open_delivered(task, result, matched_plate, decided_at, message):
+    """
+    Record the open command's outcome: "opened" with the trigger-to-open latency
+    once it went out to the broker (QoS 0, so written to the socket), "open_expired"
+    if it was dropped or not sent in time. Runs on the publisher thread.
+    """
+    if message.state != DELIVERED:
+        print(f"Open command for gate '{task.gate}' {message.state} before reaching the broker, gate not opened.")
+        # Nothing opened: let the next trigger read the plate and try again
+        recent_plates.forget(task.gate)
+        log_decision(task, result, "open_expired", matched_plate, decided_at)
+        return
+    trigger_to_open = message.delivered_at - task.triggered_at
+    metrics.TRIGGER_TO_OPEN.observe(trigger_to_open)
+    gate_stats[task.gate].trigger_to_open.observe(trigger_to_open)
+    log_decision(task, result, "opened", matched_plate, decided_at, trigger_to_open)
+
+def log_decision(task, result, decision, matched_plate, decided_at, trigger_to_open=None):
+    """
+    Publish the decision on the gate's results topic and append it to the entry log.
+    """
+    record = {
+        "timestamp": decided_at, "gate": task.gate, "plate": result.get("plate"), "plate_type": result.get("plate_type"),
+        "confidence": result.get("confidence"), "decision": decision, "matched_plate": matched_plate,
+        "trigger_to_start": task.trigger_to_start(), "detection_seconds": result.get("detection_seconds"),
+        "ocr_seconds": result.get("ocr_seconds"), "trigger_to_open": trigger_to_open,
+        "evidence_path": result.get("evidence_path"),
+    }
+    publish_result(gates[task.gate], record)
+    if entry_log is not None:
+        entry_log.record(**record)
 
-        print("Final Plate: ", plate)
-        print("Confidence: ", confidence)
-        return plate, confidence
-                 
 def main():
-    global task_type
-    task_type = parse_main_args()  # Determine task type from command-line arguments
+    global gates, publisher
+    default_pipeline = parse_main_args()  # Pipeline of the gates that do not set their own
+    gates = check_gates(get_gates_config(), default_pipeline)
+    for gate in gates.values():
+        sensor_gates[gate["sensor_topic"]] = gate["id"]
+        gate_stats[gate["id"]] = metrics.gate_metrics(gate["id"])
+    pipelines = {gate["pipeline"] for gate in gates.values()}
+    load_models(pipelines)  # Pay the model cold start once, before the first car arrives
+    start_cameras()
+    # Evidence, authorization and the entry log are shared; both pipeline configs carry their settings
+    shared_config = get_pipeline_config(sorted(pipelines)[0])
+    start_evidence_writer(shared_config)
+    start_authorization(shared_config)
+    start_entry_log(shared_config)
 
     # MQTT setup
     client_id = "my_pc2"
     client = mqtt.Client(mqtt.CallbackAPIVersion.VERSION1, client_id)
     client.on_connect = on_connect
     client.on_disconnect = on_disconnect
-    client.message_callback_add('ultrasonic/detection', callback_ultrasonic_detection)
-
-    client.connect('127.0.0.1', 1883)  # Replace with your MQTT broker address
-    client.loop_start()
-
-    client_subscriptions(client)
-    print("Waiting for messages...")
-
-    # Main loop
+    for topic in sensor_gates:
+        client.message_callback_add(topic, callback_ultrasonic_detection)
+
+    # Connects in the background and reconnects with backoff; on_connect subscribes
+    publisher = MqttPublisher(client, max_queue=256).connect('127.0.0.1', 1883).start()  # Replace with your MQTT broker address
+    start_tracker_expiry()
+    metrics.MetricsServer(metrics.registry, port=9108).start()
+    metrics.MetricsPublisher(metrics.registry, publisher, topic="garage/metrics", interval=30.0).start()
+    print(f"Waiting for messages for {len(gates)} gate(s): {', '.join(gates)}...")
+
+    # Main loop: blocks on the scheduler so a trigger starts detection immediately;
+    # one worker serves every gate in turn with the shared networks
     while True:
-        if not flag_connected:
-            print("Trying to connect to MQTT server...")
-        elif task_queue and not task_in_progress:
-            task = task_queue.pop(0)
-            if task == "fullplate":
-                result = run_fullplate()
-            elif task == "ocr":
-                result = run_ocr()
-
-            if result:  # Publish a True message if the result is True
-                try:
-                    pubMsg = client.publish(
-                        topic='garage/open_garage',
-                        payload="True".encode('utf-8'),
-                        qos=0,
-                    )
-                    pubMsg.wait_for_publish()
-                    print("Message published to topic 'garage/open_garage':", pubMsg.is_published())
-                except Exception as e:
-                    print("Error while publishing message:", e)
-
-        time.sleep(1)
+        task = scheduler.next_task(timeout=1.0)
+        if task is not None:
+            run_task(task)
 
 if __name__ == "__main__":
     main()
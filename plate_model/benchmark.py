@@ -0,0 +1,429 @@
+import argparse
+import json
+import os
+import resource
+import sys
+import time
+import cv2
+import numpy as np
+import plate_model.darknet as darknet
+from plate_model.detector_backend import BACKENDS
+from plate_model.darknet_video_full_detect import video_capture_full
+from plate_model.darknet_video_ocr import video_capture_ocr, fuse_plate_ocr
+from plate_model.ocr_reader import read_crops
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp", ".webp")
+
+# Same model files and loop parameters as the gate's task configs in main.py
+PIPELINES = {
+    "fullplate": {
+        "weights": "./plate_model/FullPlates/AntigoPlates_test3_30000.weights",
+        "config_file": "./plate_model/FullPlates/AntigoPlates_test3.cfg",
+        "names_file": "./plate_model/FullPlates/AntigoPlates_test3.names",
+        "confidence_threshold": 50.0,
+        "required_consecutive_detections": 3,
+    },
+    "ocr": {
+        "weights": "./plate_model/DiffPlates/DiffPlates_best.weights",
+        "config_file": "./plate_model/DiffPlates/DiffPlates.cfg",
+        "names_file": "./plate_model/DiffPlates/DiffPlates.names",
+        "confidence_threshold": 60.0,
+        "required_consecutive_detections": 3,
+    },
+}
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Replay recorded footage through the plate pipelines and measure them")
+    parser.add_argument("--pipeline", choices=sorted(PIPELINES), default="fullplate", help="which detection loop to run")
+    parser.add_argument("--input", required=True, help="video file or directory of images, replayed in name order")
+    parser.add_argument("--detector", choices=BACKENDS + ("replay",), default="darknet",
+                        help="detector backend, or 'replay' to play back a --recording without any network")
+    parser.add_argument("--recording", help="detections file to replay with --detector replay")
+    parser.add_argument("--record", help="save the detections of this run to a file usable with --detector replay")
+    parser.add_argument("--weights", help="yolo weights path (defaults to the pipeline's model)")
+    parser.add_argument("--config_file", help="path to config file (defaults to the pipeline's model)")
+    parser.add_argument("--names_file", help="path to the class names file (defaults to the pipeline's model)")
+    parser.add_argument("--thresh", type=float, default=.25, help="remove detections with confidence below this value")
+    parser.add_argument("--threads", type=int, default=4, help="worker threads for the opencv backend")
+    parser.add_argument("--gpu_index", type=int, default=0, help="GPU index to use for the darknet backend")
+    parser.add_argument("--cascade", action='store_true', help="fullplate only: read characters on an upscaled plate crop")
+    parser.add_argument("--read_text", action='store_true', help="ocr only: run EasyOCR on the accepted crop")
+    parser.add_argument("--repeat", type=int, default=1, help="replay the input this many times")
+    parser.add_argument("--fps", type=float, default=30.0, help="frame rate reported for image directories")
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    return parser.parse_args()
+
+
+class ImageDirCapture:
+    """
+    cv2.VideoCapture-like source reading the images of a directory in name order.
+    """
+
+    def __init__(self, directory, fps=30.0):
+        self.paths = [
+            os.path.join(directory, name) for name in sorted(os.listdir(directory))
+            if name.lower().endswith(IMAGE_EXTENSIONS)
+        ]
+        self.fps = fps
+        self.position = 0
+
+    def isOpened(self):
+        return self.position < len(self.paths)
+
+    def read(self):
+        while self.position < len(self.paths):
+            frame = cv2.imread(self.paths[self.position])
+            self.position += 1
+            if frame is not None:
+                return True, frame
+        return False, None
+
+    def get(self, prop):
+        if prop == cv2.CAP_PROP_FPS:
+            return self.fps
+        if prop == cv2.CAP_PROP_FRAME_COUNT:
+            return len(self.paths)
+        return 0
+
+    def release(self):
+        self.position = len(self.paths)
+
+
+def open_source(path, fps=30.0):
+    if os.path.isdir(path):
+        return ImageDirCapture(path, fps)
+    return cv2.VideoCapture(path)
+
+
+class StageTimer:
+    """
+    Collects per-frame durations for each pipeline stage.
+    """
+
+    def __init__(self):
+        self.samples = {}
+        self.last_detect_end = None
+
+    def add(self, stage, seconds):
+        self.samples.setdefault(stage, []).append(seconds)
+
+    def summary(self):
+        """
+        Return {stage: {"count", "mean_ms", "p50_ms", "p95_ms", "p99_ms"}}.
+        """
+        summary = {}
+        for stage, samples in self.samples.items():
+            ms = np.array(samples) * 1000
+            p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+            summary[stage] = {
+                "count": len(ms),
+                "mean_ms": round(float(ms.mean()), 3),
+                "p50_ms": round(float(p50), 3),
+                "p95_ms": round(float(p95), 3),
+                "p99_ms": round(float(p99), 3),
+            }
+        return summary
+
+
+class TimedCapture:
+    """
+    Wraps a capture to time frame decoding. In the serial loops the time between
+    the end of one inference and the next read is the loop's own plate logic.
+    """
+
+    def __init__(self, cap, timer):
+        self.cap = cap
+        self.timer = timer
+        self.frames = 0
+
+    def isOpened(self):
+        return self.cap.isOpened()
+
+    def read(self):
+        start = time.perf_counter()
+        if self.timer.last_detect_end is not None:
+            self.timer.add("plate_logic", start - self.timer.last_detect_end)
+            self.timer.last_detect_end = None
+        ret, frame = self.cap.read()
+        if ret:
+            self.timer.add("decode", time.perf_counter() - start)
+            self.frames += 1
+        return ret, frame
+
+    def get(self, prop):
+        return self.cap.get(prop)
+
+    def release(self):
+        self.cap.release()
+
+
+class TimedPool:
+    """
+    Wraps a detector's pool to time preprocessing (resize, colour conversion, upload).
+    """
+
+    def __init__(self, pool, timer):
+        self.pool = pool
+        self.timer = timer
+
+    def acquire(self, timeout=None):
+        return self.pool.acquire(timeout)
+
+    def release(self, slot):
+        self.pool.release(slot)
+
+    def upload(self, slot, frame):
+        start = time.perf_counter()
+        image = self.pool.upload(slot, frame)
+        self.timer.add("preprocess", time.perf_counter() - start)
+        return image
+
+    def close(self):
+        self.pool.close()
+
+
+class TimedDetector:
+    """
+    Wraps a detector backend to time inference (forward pass plus box decoding),
+    optionally keeping every result so the run can be saved for replay.
+    """
+
+    def __init__(self, detector, timer, keep_results=False):
+        self.detector = detector
+        self.timer = timer
+        self.name = detector.name
+        self.network = detector.network
+        self.width = detector.width
+        self.height = detector.height
+        self.results = [] if keep_results else None
+
+    def make_pool(self, size=1):
+        return TimedPool(self.detector.make_pool(size), self.timer)
+
+    def rewind(self):
+        # Only the replay detector has a position; live networks have nothing to rewind
+        if hasattr(self.detector, "rewind"):
+            self.detector.rewind()
+
+    def detect(self, image, thresh=.5, nms=.45):
+        start = time.perf_counter()
+        detections = self.detector.detect(image, thresh=thresh, nms=nms)
+        self.timer.last_detect_end = time.perf_counter()
+        self.timer.add("inference", self.timer.last_detect_end - start)
+        if self.results is not None:
+            self.results.append(detections)
+        return detections
+
+
+class ReplayPool:
+    """
+    Pool for ReplayDetector: does the same resize and colour conversion as the
+    real pools so preprocessing cost stays representative, but uploads nowhere.
+    """
+
+    def __init__(self, width, height):
+        self.resized = np.empty((height, width, 3), dtype=np.uint8)
+        self.rgb = np.empty((height, width, 3), dtype=np.uint8)
+
+    def acquire(self, timeout=None):
+        return self
+
+    def release(self, slot):
+        pass
+
+    def upload(self, slot, frame):
+        height, width = self.resized.shape[:2]
+        cv2.resize(frame, (width, height), dst=self.resized, interpolation=cv2.INTER_LINEAR)
+        cv2.cvtColor(self.resized, cv2.COLOR_BGR2RGB, dst=self.rgb)
+        return self.rgb
+
+    @property
+    def image(self):
+        return self.rgb
+
+    def close(self):
+        pass
+
+
+class ReplayDetector:
+    """
+    Stub detector backend returning detections recorded by an earlier run
+    (see save_recording), one entry per detect() call, so the pipelines can be
+    benchmarked without libdarknet or model weights. Once the recording runs
+    out every further frame has no detections; rewind() starts it over.
+    """
+
+    name = "replay"
+    network = None
+
+    def __init__(self, path):
+        with open(path) as recording_file:
+            recording = json.load(recording_file)
+        self.width = recording["width"]
+        self.height = recording["height"]
+        self.class_names = recording["class_names"]
+        self.frames = [detections_from_rows(rows) for rows in recording["frames"]]
+        self.position = 0
+
+    def rewind(self):
+        self.position = 0
+
+    def make_pool(self, size=1):
+        return ReplayPool(self.width, self.height)
+
+    def detect(self, image, thresh=.5, nms=.45):
+        if self.position >= len(self.frames):
+            return detections_from_rows([])
+        detections = self.frames[self.position]
+        self.position += 1
+        keep = detections.confidences > thresh * 100
+        return darknet.Detections(detections.class_ids[keep], detections.confidences[keep], detections.boxes[keep])
+
+
+def detections_from_rows(rows):
+    rows = np.array(rows, dtype=np.float32).reshape(-1, 6)
+    return darknet.Detections(rows[:, 0].astype(np.intp), rows[:, 1], rows[:, 2:6])
+
+
+def save_recording(path, results, width, height, class_names):
+    """
+    Write a list of Detections as rows of [class id, confidence %, x, y, w, h] per frame.
+    """
+    frames = [
+        np.column_stack((detections.class_ids, detections.confidences, detections.boxes)).round(3).tolist()
+        for detections in results
+    ]
+    with open(path, "w") as recording_file:
+        json.dump({"width": width, "height": height, "class_names": class_names, "frames": frames}, recording_file)
+
+
+def peak_rss_mb():
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def run_once(args, settings, detector, class_names, class_colors, timer, reader=None):
+    """
+    Replay the input once through the selected loop. Returns (result, frames read, frames to decision).
+    """
+    # Every repeat replays the recording from its first frame, like the input
+    detector.rewind()
+    cap = TimedCapture(open_source(args.input, args.fps), timer)
+    image_pool = detector.make_pool()
+    loop_args = {"thresh": args.thresh}
+    stats = {}
+    timer.last_detect_end = None
+    if args.pipeline == "fullplate":
+        result = video_capture_full(
+            cap, settings["confidence_threshold"], settings["required_consecutive_detections"], detector, class_names,
+            detector.width, detector.height, class_colors, loop_args, image_pool=image_pool, stats=stats,
+            cascade=args.cascade
+        )
+    else:
+        result = video_capture_ocr(
+            cap, settings["confidence_threshold"], settings["required_consecutive_detections"], detector, class_names,
+            detector.width, detector.height, class_colors, loop_args, image_pool=image_pool, stats=stats
+        )
+        if result is not None and reader is not None:
+            start = time.perf_counter()
+            plate = fuse_plate_ocr(result[0], read_crops(reader, result[2]))
+            timer.add("ocr", time.perf_counter() - start)
+            result = (result[0], plate)
+    # The decision frame's plate logic ends when the loop returns
+    if timer.last_detect_end is not None and result is not None:
+        timer.add("plate_logic", time.perf_counter() - timer.last_detect_end)
+    image_pool.close()
+    return result, cap.frames, stats.get("frames_to_decision")
+
+
+def load_detector(args, settings):
+    """
+    Return (detector backend, class names) for the chosen --detector.
+    """
+    if args.detector == "replay":
+        if not args.recording:
+            raise ValueError("--detector replay needs --recording")
+        detector = ReplayDetector(args.recording)
+        return detector, detector.class_names
+
+    from plate_model.model_registry import ModelRegistry
+
+    config = {
+        "backend": args.detector,
+        "threads": args.threads,
+        "gpu_index": args.gpu_index,
+        "weights": args.weights or settings["weights"],
+        "config_file": args.config_file or settings["config_file"],
+        "names_file": args.names_file or settings["names_file"],
+    }
+    handle = ModelRegistry(args.gpu_index).load_network(args.pipeline, config)
+    return handle.detector, handle.class_names
+
+
+def run_benchmark(args):
+    settings = PIPELINES[args.pipeline]
+    detector, class_names = load_detector(args, settings)
+    timer = StageTimer()
+    detector = TimedDetector(detector, timer, keep_results=bool(args.record))
+
+    reader = None
+    if args.read_text and args.pipeline == "ocr":
+        from plate_model.model_registry import ModelRegistry
+        reader = ModelRegistry().load_reader()
+
+    results = []
+    frames_to_decision = []
+    total_frames = 0
+    start = time.perf_counter()
+    for repeat in range(args.repeat):
+        result, frames, decided_after = run_once(args, settings, detector, class_names, darknet.class_colors(class_names), timer, reader)
+        if repeat == 0 and args.record:
+            # The recording is one pass over the input; later repeats would only append copies of it
+            recorded, detector.results = detector.results, None
+        results.append(result)
+        total_frames += frames
+        if decided_after is not None:
+            frames_to_decision.append(decided_after)
+    wall_time = time.perf_counter() - start
+
+    if args.record:
+        save_recording(args.record, recorded, detector.width, detector.height, class_names)
+
+    return {
+        "pipeline": args.pipeline,
+        "input": args.input,
+        "detector": detector.name,
+        "repeat": args.repeat,
+        "frames": total_frames,
+        "wall_time_s": round(wall_time, 3),
+        "fps": round(total_frames / wall_time, 2) if wall_time > 0 else None,
+        "frames_to_decision": frames_to_decision,
+        "decisions": sum(result is not None for result in results),
+        # The OCR loop also returns the crop images, which are not worth serialising
+        "results": [result if result is None else [item for item in result if not isinstance(item, list)] for result in results],
+        "peak_rss_mb": peak_rss_mb(),
+        "stages": timer.summary(),
+    }
+
+
+def print_report(report):
+    print(f"{report['pipeline']} on {report['input']} with the {report['detector']} detector:")
+    print(f"  {report['frames']} frames in {report['wall_time_s']} s ({report['fps']} FPS), peak RSS {report['peak_rss_mb']} MB")
+    print(f"  {report['decisions']} of {report['repeat']} runs decided, frames to decision: {report['frames_to_decision']}")
+    for stage, stats in report["stages"].items():
+        print(
+            f"  {stage}: p50 {stats['p50_ms']:.2f} ms, p95 {stats['p95_ms']:.2f} ms, "
+            f"p99 {stats['p99_ms']:.2f} ms over {stats['count']} samples"
+        )
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    report = run_benchmark(args)
+    print_report(report)
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(report, output, indent=2, default=str)
+        print(f"Results written to {args.output}")
@@ -0,0 +1,93 @@
+import argparse
+import time
+import cv2
+import numpy as np
+import plate_model.darknet as darknet
+from plate_model.model_registry import ModelRegistry
+from plate_model.detector_backend import BACKENDS
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Compare the darknet and OpenCV DNN detector backends on the same frames")
+    parser.add_argument("--input", required=True, help="video file or image to run the networks on")
+    parser.add_argument("--weights", required=True, help="yolo weights path")
+    parser.add_argument("--config_file", required=True, help="path to config file")
+    parser.add_argument("--names_file", required=True, help="path to the class names file")
+    parser.add_argument("--frames", type=int, default=100, help="number of frames to time per backend")
+    parser.add_argument("--thresh", type=float, default=.25, help="remove detections with confidence below this value")
+    parser.add_argument("--threads", type=int, default=4, help="worker threads for the opencv backend")
+    parser.add_argument("--gpu_index", type=int, default=0, help="GPU index to use for the darknet backend")
+    return parser.parse_args()
+
+
+def read_frames(path, count):
+    """
+    Read up to `count` frames from a video, looping it if it is shorter. A still image is repeated.
+    """
+    image = cv2.imread(path)
+    if image is not None:
+        return [image] * count
+    cap = cv2.VideoCapture(path)
+    frames = []
+    while len(frames) < count:
+        ret, frame = cap.read()
+        if not ret:
+            if not frames:
+                break
+            cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            continue
+        frames.append(frame)
+    cap.release()
+    if not frames:
+        raise ValueError(f"Could not read any frame from {path}")
+    return frames
+
+
+def time_backend(handle, frames, thresh):
+    """
+    Run every frame through the backend and return (upload times, detect times, detections), times in ms.
+    """
+    upload_ms, detect_ms, results = [], [], []
+    slot = handle.image_pool.acquire()
+    try:
+        for frame in frames:
+            start = time.perf_counter()
+            image = handle.image_pool.upload(slot, frame)
+            uploaded = time.perf_counter()
+            results.append(handle.detector.detect(image, thresh=thresh))
+            done = time.perf_counter()
+            upload_ms.append((uploaded - start) * 1000)
+            detect_ms.append((done - uploaded) * 1000)
+    finally:
+        handle.image_pool.release(slot)
+    return np.array(upload_ms), np.array(detect_ms), results
+
+
+def same_classes(a, b):
+    return sorted(a.class_ids.tolist()) == sorted(b.class_ids.tolist())
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    frames = read_frames(args.input, args.frames)
+    registry = ModelRegistry(args.gpu_index)
+
+    results = {}
+    for backend in BACKENDS:
+        if backend == "darknet" and not darknet.has_darknet:
+            print("Skipping darknet backend: libdarknet is not available")
+            continue
+        config = dict(vars(args), backend=backend)
+        handle = registry.load_network(backend, config)
+        upload_ms, detect_ms, detections = time_backend(handle, frames, args.thresh)
+        results[backend] = detections
+        total_ms = upload_ms + detect_ms
+        print(
+            f"{backend}: upload {upload_ms.mean():.1f} ms, detect p50 {np.percentile(detect_ms, 50):.1f} ms / "
+            f"p95 {np.percentile(detect_ms, 95):.1f} ms, {1000 / total_ms.mean():.1f} FPS over {len(frames)} frames"
+        )
+    registry.report()
+
+    if len(results) == len(BACKENDS):
+        agree = sum(same_classes(a, b) for a, b in zip(*results.values()))
+        print(f"Backends found the same classes on {agree} of {len(frames)} frames")
@@ -0,0 +1,197 @@
+import threading
+import time
+from collections import deque
+import cv2
+from plate_model.metrics import CAMERA_READ_FAILURES
+
+
+class FrameGrabber:
+    """
+    Keeps a camera (or video file) open in a background thread and holds the
+    last N decoded frames in a bounded ring buffer, each tagged with a frame id
+    and the monotonic time it was read.
+
+    Usage:
+        camera = FrameGrabber(0, buffer_size=30)
+        camera.start()
+        cap = camera.session(pre_trigger=0.5)  # cv2.VideoCapture-like view
+        ret, frame = cap.read()
+    """
+
+    def __init__(self, source, buffer_size=30, reopen_delay=1.0):
+        self.source = source
+        self.buffer_size = buffer_size
+        self.reopen_delay = reopen_delay
+        self.frames = deque(maxlen=buffer_size)  # (frame_id, timestamp, frame)
+        self.read_failures = 0
+        self._cond = threading.Condition()
+        self._next_id = 0
+        self._cap = None
+        self._thread = None
+        self._running = False
+        self._finished = False
+
+    def start(self):
+        if self._running:
+            return self
+        self._cap = cv2.VideoCapture(self.source)
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="frame-grabber", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._running = False
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+        if self._cap is not None:
+            self._cap.release()
+        with self._cond:
+            self._cond.notify_all()
+
+    def is_live(self):
+        """
+        Cameras are identified by an integer index; anything else is a file or stream URL.
+        """
+        return isinstance(self.source, int)
+
+    def finished(self):
+        return self._finished or not self._running
+
+    def get(self, prop):
+        return self._cap.get(prop) if self._cap is not None else 0
+
+    def latest(self):
+        """
+        Return the newest buffered (frame_id, timestamp, frame), or None if the buffer is empty.
+        """
+        with self._cond:
+            return self.frames[-1] if self.frames else None
+
+    def frames_since(self, timestamp):
+        """
+        Return the buffered frames read at or after the given monotonic timestamp, oldest first.
+        """
+        with self._cond:
+            return [entry for entry in self.frames if entry[1] >= timestamp]
+
+    def wait_newer(self, frame_id, timeout=1.0):
+        """
+        Block until a frame newer than frame_id is available and return the newest one.
+        Intermediate frames are skipped on purpose so callers never fall behind the camera.
+        """
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while not self.frames or self.frames[-1][0] <= frame_id:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or self.finished():
+                    return None
+                self._cond.wait(remaining)
+            return self.frames[-1]
+
+    def session(self, pre_trigger=0.5, max_duration=None, yield_after=None, should_yield=None):
+        """
+        Open a cv2.VideoCapture-like view for one detection task, starting with the
+        frames read in the last `pre_trigger` seconds. With max_duration (seconds) the
+        session reports itself closed after that long, so a task that never sees a
+        plate gives the camera back. With should_yield, a callable, it also closes
+        once it has run yield_after seconds and should_yield() is true, and sets
+        session.preempted, so the detection worker can serve another gate.
+        """
+        return CaptureSession(self, time.monotonic() - pre_trigger, max_duration=max_duration,
+                              yield_after=yield_after, should_yield=should_yield)
+
+    def _run(self):
+        while self._running:
+            ret, frame = self._cap.read()
+            if not ret:
+                self.read_failures += 1
+                CAMERA_READ_FAILURES.inc()
+                if not self.is_live():
+                    # End of a video file: let sessions drain what is buffered
+                    self._finished = True
+                    with self._cond:
+                        self._cond.notify_all()
+                    return
+                # Camera hiccup: reopen it instead of giving up on the gate
+                time.sleep(self.reopen_delay)
+                self._cap.release()
+                self._cap = cv2.VideoCapture(self.source)
+                continue
+
+            with self._cond:
+                self.frames.append((self._next_id, time.monotonic(), frame))
+                self._next_id += 1
+                self._cond.notify_all()
+
+
+class CaptureSession:
+    """
+    cv2.VideoCapture-compatible view over a FrameGrabber used by the detection loops.
+
+    The first reads replay the frames buffered just before the trigger; once those are
+    consumed every read returns the freshest frame, never a stale one. While the
+    grabber reopens a camera that stopped delivering, read() keeps waiting, up to
+    the session's max_duration or stall_timeout seconds without one, so a hiccup
+    does not end the task. Releasing the session leaves the camera open for the
+    next trigger.
+    """
+
+    def __init__(self, grabber, start_time, read_timeout=1.0, max_duration=None, yield_after=None, should_yield=None,
+                 stall_timeout=10.0):
+        self.grabber = grabber
+        self.read_timeout = read_timeout
+        self.stall_timeout = stall_timeout
+        now = time.monotonic()
+        self.deadline = now + max_duration if max_duration is not None else None
+        self.yield_at = now + (yield_after or 0.0) if should_yield is not None else None
+        self.should_yield = should_yield
+        self.preempted = False
+        self.pre_roll = deque(grabber.frames_since(start_time))
+        self.last_id = self.pre_roll[-1][0] if self.pre_roll else -1
+        self.last_timestamp = None
+        self._open = True
+
+    def isOpened(self):
+        now = time.monotonic()
+        if self.deadline is not None and now > self.deadline:
+            return False
+        if self.preempted or (self.yield_at is not None and now >= self.yield_at and self.should_yield()):
+            self.preempted = True
+            return False
+        return self._open and (bool(self.pre_roll) or not self.grabber.finished() or self._has_newer())
+
+    def read(self):
+        if not self._open:
+            return False, None
+        if self.pre_roll:
+            frame_id, timestamp, frame = self.pre_roll.popleft()
+        else:
+            entry = self._wait_frame()
+            if entry is None:
+                return False, None
+            frame_id, timestamp, frame = entry
+            self.last_id = frame_id
+        self.last_timestamp = timestamp
+        return True, frame
+
+    def get(self, prop):
+        return self.grabber.get(prop)
+
+    def release(self):
+        self._open = False
+
+    def _wait_frame(self):
+        give_up = self.deadline if self.deadline is not None else time.monotonic() + self.stall_timeout
+        while True:
+            entry = self.grabber.wait_newer(self.last_id, self.read_timeout)
+            if entry is not None or self.grabber.finished():
+                return entry
+            # No frame for read_timeout: the grabber is reopening the camera (reopen_delay plus
+            # the reopen itself), so wait on unless the session is over or should give way
+            if time.monotonic() >= give_up or not self.isOpened():
+                return None
+
+    def _has_newer(self):
+        latest = self.grabber.latest()
+        return latest is not None and latest[0] > self.last_id
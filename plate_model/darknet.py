@@ -20,6 +20,7 @@ See the example code (such as "example.py") which imports this module.
 """
 
 from ctypes import *
+from collections import namedtuple
 import os
 import numpy as np
 import hashlib
@@ -47,6 +48,18 @@ class DETECTION(Structure):
                 ("sim", c_float),          # Similarity score
                 ("track_id", c_int)]       # Track ID
 
+# NumPy view of the DETECTION fields needed for decoding, laid out with the same offsets as the C struct
+DETECTION_DTYPE = np.dtype({
+    "names": ["bbox", "prob"],
+    "formats": [(np.float32, 4), np.uintp],
+    "offsets": [DETECTION.bbox.offset, DETECTION.prob.offset],
+    "itemsize": sizeof(DETECTION),
+})
+
+# Columnar detection result: class indices, float confidences in percent and an Nx4 (x, y, w, h) box array.
+# reused is True when the change gate skipped the network and these are an earlier frame's detections.
+Detections = namedtuple("Detections", ["class_ids", "confidences", "boxes", "reused"], defaults=(False,))
+
 # Define a structure to represent a pair of detections
 class DETNUMPAIR(Structure):
     _fields_ = [("num", c_int),           # Number of detections
@@ -118,6 +131,7 @@ def load_network(config_file, data_file, weights, batch_size=1):
         config_file (str): path to .cfg model file
         data_file (str): path to .data model file
         weights (str): path to weights
+        batch_size (int): number of frames per forward pass, see detect_batch()
     returns:
         network: trained model
     """
@@ -296,6 +310,103 @@ def remove_negatives_faster(detections, class_names, num):
         predictions.append((name, detections[j].prob[detections[j].best_class_idx], bbox))
     return predictions
 
+# Vectorized replacement for remove_negatives + decode_detection
+def decode_detections_numpy(detections, num, num_classes, thresh=0.0):
+    """
+    Decode a DETECTION array in bulk: keep the best class of every box whose
+    probability is above the threshold.
+
+    Args:
+        detections: Pointer to the DETECTION array returned by get_network_boxes.
+        num: Number of detections.
+        num_classes: Number of classes of the network.
+        thresh: Minimum probability (0-1) for a detection to be kept.
+
+    Returns:
+        Detections with class indices, confidences in percent and an Nx4 box array,
+        sorted by ascending confidence.
+    """
+    if num == 0:
+        return Detections(np.empty(0, dtype=np.intp), np.empty(0, dtype=np.float32), np.empty((0, 4), dtype=np.float32))
+
+    raw = np.ctypeslib.as_array(cast(detections, POINTER(c_uint8)), shape=(num * sizeof(DETECTION),))
+    records = raw.view(DETECTION_DTYPE)
+    boxes = records["bbox"].copy()
+
+    # Every detection owns its own prob buffer, so one view per box (not per box x class)
+    probs = np.empty((num, num_classes), dtype=np.float32)
+    for j, address in enumerate(records["prob"].tolist()):
+        probs[j] = np.ctypeslib.as_array((c_float * num_classes).from_address(address))
+
+    class_ids = probs.argmax(axis=1)
+    confidences = probs[np.arange(num), class_ids]
+    keep = confidences > thresh
+    order = np.argsort(confidences[keep], kind="stable")
+    return Detections(
+        class_ids[keep][order],
+        confidences[keep][order] * 100,
+        boxes[keep][order],
+    )
+
+# Function to perform object detection on an input image, returning columnar results
+def detect_image_arrays(network, num_classes, image, thresh=.5, hier_thresh=.5, nms=.45):
+    """
+    Same as detect_image, but returns a columnar Detections result instead of a list of tuples.
+
+    Args:
+        network: Darknet network.
+        num_classes: Number of classes of the network.
+        image: Input image.
+        thresh: Detection confidence threshold.
+        hier_thresh: Hierarchical threshold.
+        nms: Non-Maximum Suppression threshold.
+
+    Returns:
+        Detections with class indices, confidences in percent and an Nx4 box array.
+    """
+    pnum = pointer(c_int(0))
+    predict_image(network, image)
+    detections = get_network_boxes(network, image.w, image.h, thresh, hier_thresh, None, 0, pnum, 0)
+    num = pnum[0]
+    try:
+        if nms:
+            do_nms_sort(detections, num, num_classes, nms)
+        return decode_detections_numpy(detections, num, num_classes, thresh)
+    finally:
+        free_detections(detections, num)
+
+# Function to run one batched forward pass over several frames packed into a single IMAGE
+def detect_batch(network, num_classes, batch_image, count, width, height, thresh=.5, hier_thresh=.5, nms=.45):
+    """
+    Run a network loaded with batch_size >= count over `count` frames packed
+    back to back in batch_image and decode every frame's detections.
+
+    Args:
+        network: Darknet network loaded with a batch size.
+        num_classes: Number of classes of the network.
+        batch_image: IMAGE holding batch_size frames of width x height x 3, one after another.
+        count: Number of frames actually filled in this batch.
+        width: Network input width, used as the coordinate space of the boxes.
+        height: Network input height, used as the coordinate space of the boxes.
+        thresh: Detection confidence threshold.
+        hier_thresh: Hierarchical threshold.
+        nms: Non-Maximum Suppression threshold.
+
+    Returns:
+        List with one Detections per frame, in the order the frames were packed.
+    """
+    pairs = network_predict_batch(network, batch_image, count, width, height, thresh, hier_thresh, None, 0, 0)
+    try:
+        results = []
+        for k in range(count):
+            detections, num = pairs[k].dets, pairs[k].num
+            if nms:
+                do_nms_sort(detections, num, num_classes, nms)
+            results.append(decode_detections_numpy(detections, num, num_classes, thresh))
+        return results
+    finally:
+        free_batch_detections(pairs, count)
+
 # Function to perform object detection on an input image using a Darknet network
 def detect_image(network, class_names, image, thresh=.5, hier_thresh=.5, nms=.45):
     """
@@ -312,16 +423,11 @@ def detect_image(network, class_names, image, thresh=.5, hier_thresh=.5, nms=.45
     Returns:
         List of detections with class name, confidence, and bounding box.
     """
-    pnum = pointer(c_int(0))
-    predict_image(network, image)
-    detections = get_network_boxes(network, image.w, image.h, thresh, hier_thresh, None, 0, pnum, 0)
-    num = pnum[0]
-    if nms:
-        do_nms_sort(detections, num, len(class_names), nms)
-    predictions = remove_negatives(detections, class_names, num)
-    predictions = decode_detection(predictions)
-    free_detections(detections, num)
-    return sorted(predictions, key=lambda x: x[1])
+    result = detect_image_arrays(network, len(class_names), image, thresh, hier_thresh, nms)
+    return [
+        (class_names[class_id], str(round(confidence, 2)), tuple(box))
+        for class_id, confidence, box in zip(result.class_ids.tolist(), result.confidences.tolist(), result.boxes.tolist())
+    ]
 
 
 # Platform-specific library path and initialization
@@ -332,133 +438,146 @@ elif os.name == "nt":
 else:
     print("Unsupported OS")
     exit
-lib = CDLL(libpath, RTLD_GLOBAL)
-
-# Argument types and return types for Darknet functions
-
-network_dimensions = lib.darknet_network_dimensions
-network_dimensions.argtypes = [c_void_p, POINTER(c_int), POINTER(c_int), POINTER(c_int)]
-
-# Function to copy image data from bytes to a Darknet IMAGE object
-copy_image_from_bytes = lib.copy_image_from_bytes
-copy_image_from_bytes.argtypes = [IMAGE, c_char_p]
-
-# Function to predict using a Darknet network
-predict = lib.network_predict_ptr
-predict.argtypes = [c_void_p, POINTER(c_float)]
-predict.restype = POINTER(c_float)
-
-# Define and comment function to set the GPU device for Darknet
-set_gpu = lib.cuda_set_device
-set_gpu.argtypes = [c_int]
-
-# Define and comment function to create a Darknet IMAGE object
-make_image = lib.make_image
-make_image.argtypes = [c_int, c_int, c_int]
-make_image.restype = IMAGE
-
-# Function to get network boxes for detections
-get_network_boxes = lib.get_network_boxes
-get_network_boxes.argtypes = [c_void_p, c_int, c_int, c_float, c_float, POINTER(c_int), c_int, POINTER(c_int), c_int]
-get_network_boxes.restype = POINTER(DETECTION)
-
-# Function to create network boxes
-make_network_boxes = lib.make_network_boxes
-make_network_boxes.argtypes = [c_void_p, c_float, POINTER(c_int)]
-make_network_boxes.restype = POINTER(DETECTION)
-
-# Define and comment function to free detections
-free_detections = lib.free_detections
-free_detections.argtypes = [POINTER(DETECTION), c_int]
-
-# Function to free batch detections
-#free_batch_detections = lib.free_batch_detections
-#free_batch_detections.argtypes = [POINTER(DETNUMPAIR), c_int]
-
-# Function to free pointers
-free_ptrs = lib.free_ptrs
-free_ptrs.argtypes = [POINTER(c_void_p), c_int]
-
-# Define and comment function to predict using a Darknet network
-network_predict = lib.network_predict_ptr
-network_predict.argtypes = [c_void_p, POINTER(c_float)]
-
-# Define and comment function to reset RNN (Recurrent Neural Network)
-reset_rnn = lib.reset_rnn
-reset_rnn.argtypes = [c_void_p]
-
-# Define and comment function to load a Darknet network
-load_net = lib.load_network
-load_net.argtypes = [c_char_p, c_char_p, c_int]
-load_net.restype = c_void_p
-
-# Define and comment function to load a custom Darknet network
-load_net_custom = lib.load_network_custom
-load_net_custom.argtypes = [c_char_p, c_char_p, c_int, c_int]
-load_net_custom.restype = c_void_p
-
-# Define and comment function to free a network pointer
-free_network_ptr = lib.free_network_ptr
-free_network_ptr.argtypes = [c_void_p]
-free_network_ptr.restype = c_void_p
-
-# Define and comment function to perform Non-Maximum Suppression (NMS) on object detections
-do_nms_obj = lib.do_nms_obj
-do_nms_obj.argtypes = [POINTER(DETECTION), c_int, c_int, c_float]
-
-# Define and comment function to perform NMS with sorted results
-do_nms_sort = lib.do_nms_sort
-do_nms_sort.argtypes = [POINTER(DETECTION), c_int, c_int, c_float]
-
-# Define and comment function to free a Darknet image
-free_image = lib.free_image
-free_image.argtypes = [IMAGE]
-
-# Define and comment function to letterbox a Darknet image
-#letterbox_image = lib.letterbox_image
-#letterbox_image.argtypes = [IMAGE, c_int, c_int]
-#letterbox_image.restype = IMAGE
-
-# Function to load a color image for Darknet
-load_image = lib.load_image_v2
-load_image.argtypes = [c_char_p, c_int, c_int, c_int]
-load_image.restype = IMAGE
-
-# Define and comment function to convert RGB image to BGR
-#rgbgr_image = lib.rgbgr_image
-#rgbgr_image.argtypes = [IMAGE]
-
-# Function to predict using an image and a Darknet network
-predict_image = lib.network_predict_image
-predict_image.argtypes = [c_void_p, IMAGE]
-predict_image.restype = POINTER(c_float)
-
-# Function to predict using a letterboxed image and a Darknet network
-predict_image_letterbox = lib.network_predict_image_letterbox
-predict_image_letterbox.argtypes = [c_void_p, IMAGE]
-predict_image_letterbox.restype = POINTER(c_float)
-
-# Function to predict using a batch of images and a Darknet network
-#network_predict_batch = lib.network_predict_batch
-#network_predict_batch.argtypes = [c_void_p, IMAGE, c_int, c_int, c_int, c_float, c_float, POINTER(c_int), c_int, c_int]
-#network_predict_batch.restype = POINTER(DETNUMPAIR)
-
-show_version_info = lib.darknet_show_version_info
-
-version_string = lib.darknet_version_string
-version_string.restype = c_char_p
-
-version_short = lib.darknet_version_short
-version_short.restype = c_char_p
-
-set_verbose = lib.darknet_set_verbose
-set_verbose.argtypes = [c_int]
-
-clear_skipped_classes = lib.darknet_clear_skipped_classes
-clear_skipped_classes.argtypes = [c_void_p]
-
-add_skipped_class = lib.darknet_add_skipped_class
-add_skipped_class.argtypes = [c_void_p, c_int]
-
-del_skipped_class = lib.darknet_del_skipped_class
-del_skipped_class.argtypes = [c_void_p, c_int]
+# Without libdarknet only the pure Python helpers (class_colors, draw_boxes, Detections, ...)
+# are usable; detection then has to go through the OpenCV DNN backend
+try:
+    lib = CDLL(libpath, RTLD_GLOBAL)
+except OSError as error:
+    print(f"libdarknet not loaded ({error}), only the OpenCV DNN backend is available")
+    lib = None
+has_darknet = lib is not None
+has_batch_support = False
+
+if has_darknet:
+    # Argument types and return types for Darknet functions
+
+    network_dimensions = lib.darknet_network_dimensions
+    network_dimensions.argtypes = [c_void_p, POINTER(c_int), POINTER(c_int), POINTER(c_int)]
+
+    # Function to copy image data from bytes to a Darknet IMAGE object
+    copy_image_from_bytes = lib.copy_image_from_bytes
+    copy_image_from_bytes.argtypes = [IMAGE, c_char_p]
+
+    # Function to predict using a Darknet network
+    predict = lib.network_predict_ptr
+    predict.argtypes = [c_void_p, POINTER(c_float)]
+    predict.restype = POINTER(c_float)
+
+    # Define and comment function to set the GPU device for Darknet
+    set_gpu = lib.cuda_set_device
+    set_gpu.argtypes = [c_int]
+
+    # Define and comment function to create a Darknet IMAGE object
+    make_image = lib.make_image
+    make_image.argtypes = [c_int, c_int, c_int]
+    make_image.restype = IMAGE
+
+    # Function to get network boxes for detections
+    get_network_boxes = lib.get_network_boxes
+    get_network_boxes.argtypes = [c_void_p, c_int, c_int, c_float, c_float, POINTER(c_int), c_int, POINTER(c_int), c_int]
+    get_network_boxes.restype = POINTER(DETECTION)
+
+    # Function to create network boxes
+    make_network_boxes = lib.make_network_boxes
+    make_network_boxes.argtypes = [c_void_p, c_float, POINTER(c_int)]
+    make_network_boxes.restype = POINTER(DETECTION)
+
+    # Define and comment function to free detections
+    free_detections = lib.free_detections
+    free_detections.argtypes = [POINTER(DETECTION), c_int]
+
+    # Function to free batch detections
+    # Not every darknet build exports the batch API, so detect_batch checks has_batch_support first
+    has_batch_support = hasattr(lib, "network_predict_batch") and hasattr(lib, "free_batch_detections")
+    if has_batch_support:
+        free_batch_detections = lib.free_batch_detections
+        free_batch_detections.argtypes = [POINTER(DETNUMPAIR), c_int]
+
+    # Function to free pointers
+    free_ptrs = lib.free_ptrs
+    free_ptrs.argtypes = [POINTER(c_void_p), c_int]
+
+    # Define and comment function to predict using a Darknet network
+    network_predict = lib.network_predict_ptr
+    network_predict.argtypes = [c_void_p, POINTER(c_float)]
+
+    # Define and comment function to reset RNN (Recurrent Neural Network)
+    reset_rnn = lib.reset_rnn
+    reset_rnn.argtypes = [c_void_p]
+
+    # Define and comment function to load a Darknet network
+    load_net = lib.load_network
+    load_net.argtypes = [c_char_p, c_char_p, c_int]
+    load_net.restype = c_void_p
+
+    # Define and comment function to load a custom Darknet network
+    load_net_custom = lib.load_network_custom
+    load_net_custom.argtypes = [c_char_p, c_char_p, c_int, c_int]
+    load_net_custom.restype = c_void_p
+
+    # Define and comment function to free a network pointer
+    free_network_ptr = lib.free_network_ptr
+    free_network_ptr.argtypes = [c_void_p]
+    free_network_ptr.restype = c_void_p
+
+    # Define and comment function to perform Non-Maximum Suppression (NMS) on object detections
+    do_nms_obj = lib.do_nms_obj
+    do_nms_obj.argtypes = [POINTER(DETECTION), c_int, c_int, c_float]
+
+    # Define and comment function to perform NMS with sorted results
+    do_nms_sort = lib.do_nms_sort
+    do_nms_sort.argtypes = [POINTER(DETECTION), c_int, c_int, c_float]
+
+    # Define and comment function to free a Darknet image
+    free_image = lib.free_image
+    free_image.argtypes = [IMAGE]
+
+    # Define and comment function to letterbox a Darknet image
+    #letterbox_image = lib.letterbox_image
+    #letterbox_image.argtypes = [IMAGE, c_int, c_int]
+    #letterbox_image.restype = IMAGE
+
+    # Function to load a color image for Darknet
+    load_image = lib.load_image_v2
+    load_image.argtypes = [c_char_p, c_int, c_int, c_int]
+    load_image.restype = IMAGE
+
+    # Define and comment function to convert RGB image to BGR
+    #rgbgr_image = lib.rgbgr_image
+    #rgbgr_image.argtypes = [IMAGE]
+
+    # Function to predict using an image and a Darknet network
+    predict_image = lib.network_predict_image
+    predict_image.argtypes = [c_void_p, IMAGE]
+    predict_image.restype = POINTER(c_float)
+
+    # Function to predict using a letterboxed image and a Darknet network
+    predict_image_letterbox = lib.network_predict_image_letterbox
+    predict_image_letterbox.argtypes = [c_void_p, IMAGE]
+    predict_image_letterbox.restype = POINTER(c_float)
+
+    # Function to predict using a batch of images and a Darknet network
+    if has_batch_support:
+        network_predict_batch = lib.network_predict_batch
+        network_predict_batch.argtypes = [c_void_p, IMAGE, c_int, c_int, c_int, c_float, c_float, POINTER(c_int), c_int, c_int]
+        network_predict_batch.restype = POINTER(DETNUMPAIR)
+
+    show_version_info = lib.darknet_show_version_info
+
+    version_string = lib.darknet_version_string
+    version_string.restype = c_char_p
+
+    version_short = lib.darknet_version_short
+    version_short.restype = c_char_p
+
+    set_verbose = lib.darknet_set_verbose
+    set_verbose.argtypes = [c_int]
+
+    clear_skipped_classes = lib.darknet_clear_skipped_classes
+    clear_skipped_classes.argtypes = [c_void_p]
+
+    add_skipped_class = lib.darknet_add_skipped_class
+    add_skipped_class.argtypes = [c_void_p, c_int]
+
+    del_skipped_class = lib.darknet_del_skipped_class
+    del_skipped_class.argtypes = [c_void_p, c_int]
@@ -10,10 +10,20 @@ import plate_model.darknet as darknet
 import argparse
 import sys
 from datetime import datetime
+from functools import partial
 from plate_model.utils import *
-
-# Global variables for speed control
-frame_delay = 30  # Delay in milliseconds (default is 30 for normal speed)
+from plate_model.model_registry import ModelRegistry
+from plate_model.pipeline import DetectionPipeline, serial_detections
+from plate_model.visualization import DetectionViewer
+from plate_model.motion_gate import ChangeDetector
+from plate_model.voting import PlateConsensus, TemporalVote, plate_relative_x
+from plate_model.roi_cascade import CascadeDetector
+from plate_model.evidence import EvidenceWriter
+from plate_model.plate_decoder import decode_plate, candidates_from_text, MIN_PLATE_SCORE, SHARE, CONFUSIONS
+
+PLATE_CLASSES = ["plate_mercosul", "plate_antigo"]
+# Characters the decoder may put in place of one the detector read, both ways
+COUNTERPARTS = {**dict(CONFUSIONS), **{b: a for a, b in CONFUSIONS}}
 
 def parse_args():
     # Create an ArgumentParser object with a description for YOLO Object Detection.
@@ -27,6 +37,14 @@ def parse_args():
     parser.add_argument("--data_file", default="coco.data", help="path to data file")
     parser.add_argument("--thresh", type=float, default=.25, help="remove detections with confidence below this value")
     parser.add_argument("--gpu_index", type=int, default=0, help="GPU index to use for processing")
+    parser.add_argument("--backend", choices=("darknet", "opencv"), default="darknet", help="detector backend: darknet (GPU) or opencv (CPU)")
+    parser.add_argument("--threads", type=int, default=4, help="worker threads for the opencv backend")
+    parser.add_argument("--evidence_dir", default="./evidence", help="where accepted plates are saved. Not saved if empty")
+    parser.add_argument("--evidence_format", choices=("jpg", "webp", "png"), default="jpg", help="image format of the saved evidence")
+    parser.add_argument("--evidence_quality", type=int, default=90, help="jpg/webp quality of the saved evidence")
+    parser.add_argument("--pipelined", action='store_true', help="overlap capture, preprocessing and inference in threads")
+    parser.add_argument("--skip_static", action='store_true', help="reuse the previous detections while the scene is unchanged")
+    parser.add_argument("--cascade", action='store_true', help="read characters on an upscaled crop around the tracked plate")
     return parser.parse_args()
 
 def check_arguments_errors(args):
@@ -41,220 +59,198 @@ def check_arguments_errors(args):
         raise(ValueError("Invalid video path {}".format(os.path.abspath(args.input))))
 
 def video_capture_full(
-    cap, confidence_threshold, required_consecutive_detections, network, class_names, darknet_width, darknet_height, class_colors, args
+    cap, confidence_threshold, required_consecutive_detections, detector, class_names, darknet_width, darknet_height, class_colors, args,
+    image_pool=None, pipelined=False, viewer=None, consensus_margin=1.5, stats=None, cascade=False,
+    change_detector=None, evidence=None, min_plate_score=MIN_PLATE_SCORE
 ):
-    global frame_delay
-    consecutive_count = 0
-    reference_classes = None
+    """
+    With pipelined=True, capture, preprocessing and inference run in their own
+    threads (see DetectionPipeline) while this loop does the plate logic.
+    With cascade=True, once the plate box is stable characters are detected on an
+    upscaled crop around it (see CascadeDetector); this takes precedence over pipelined.
+
+    A plate is returned once every character slot's leading label beats the
+    runner-up by consensus_margin (in summed 0-1 confidences), or as soon as
+    the plate decoder finds a grammar-valid plate whose slots the frames agree
+    on (vote share) by min_plate_score or more, after at least
+    required_consecutive_detections frames (and never fewer than 2). If a stats dict is given, the
+    number of frames the decision took is stored under "frames_to_decision".
+
+    With an EvidenceWriter the annotated frame and the plate crop of an accepted
+    plate are queued for writing in the background (paths in stats["evidence"]);
+    without one nothing is saved.
+    """
+    owns_pool = image_pool is None
+    if owns_pool:
+        image_pool = detector.make_pool()
+    # Characters are voted per slot across frames instead of requiring identical consecutive frames
+    consensus = PlateConsensus(expected_slots=7, margin=consensus_margin, min_frames=required_consecutive_detections)
+    plate_type_vote = TemporalVote()
     plate = None
-    while cap.isOpened():
-        ret, frame = cap.read()
-        if not ret:
-            break
-
-        start = time.time()
-
-        key = cv2.waitKey(frame_delay) & 0xFF
-        if key == ord('q'):
-            break
-        elif key == 82:
-            frame_delay = max(1, frame_delay - 5)
-        elif key == 84:
-            frame_delay += 5
-
-        frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        frame_resized = cv2.resize(frame_rgb, (darknet_width, darknet_height), interpolation=cv2.INTER_LINEAR)
-
-        # Create a Darknet image from the resized frame
-        img_for_detect = darknet.make_image(darknet_width, darknet_height, 3)
-        darknet.copy_image_from_bytes(img_for_detect, frame_resized.tobytes())
-
-        # Perform inference and drawing
-        detections = darknet.detect_image(network, class_names, img_for_detect, thresh=args["thresh"])
-
-        end = time.time()  # End time for FPS calculation
-        fps_label = f"FPS: {round(1.0 / (end - start), 2)}"
-        print(fps_label)
-
-        detections_adjusted = []
-        if frame is not None:
-            for label, confidence, bbox in detections:
-                bbox_adjusted = convert2original(frame, bbox, darknet_height, darknet_width)
-                detections_adjusted.append((str(label), float(confidence), bbox_adjusted))
-
-            image = darknet.draw_boxes(detections_adjusted, frame, class_colors)
-            print("Detections: ", detections_adjusted)
-            
-            current_classes = {lbl for (lbl, conf, b) in detections_adjusted if conf >= confidence_threshold}
-            current_classes = [lbl for (lbl, conf, b) in detections_adjusted if conf >= confidence_threshold]
-            
-            # If we have no reference_classes yet, or if the current classes don't match the reference
-            if reference_classes is None or sorted(current_classes) != sorted(reference_classes):
-                reference_classes = current_classes
-                consecutive_count = 1 if len(current_classes) > 0 else 0
-            else:
-                if len(current_classes) > 7:
-                    consecutive_count += 1
-                else:
-                    consecutive_count = 0
+    cascade_detector = None
+    if cascade:
+        # The crop for frame N+1 depends on the plate found in frame N, so the cascade runs serially
+        pipelined = False
+        cascade_detector = CascadeDetector(detector, class_names, image_pool, darknet_width, darknet_height, PLATE_CLASSES)
+        stream = serial_detections(
+            cap, detector, class_names, image_pool, args["thresh"],
+            detect_frame=cascade_detector.detect, change_detector=change_detector
+        )
+    elif pipelined:
+        stream = DetectionPipeline(cap, detector, class_names, image_pool, args["thresh"], change_detector=change_detector)
+    else:
+        stream = serial_detections(cap, detector, class_names, image_pool, args["thresh"], change_detector=change_detector)
+    last_frame_at = time.time()  # Time between frames leaving the detector, for the preview FPS label
+    try:
+        for frame, detections in stream:
+            if viewer is not None and viewer.quit_requested:
+                break
+
+            detections_adjusted = []
+            if frame is not None:
+                boxes = convert2original_boxes(frame, detections.boxes, darknet_height, darknet_width)
+                detections_adjusted = [
+                    (class_names[class_id], confidence, tuple(box))
+                    for class_id, confidence, box in zip(detections.class_ids.tolist(), detections.confidences.tolist(), boxes.tolist())
+                ]
             
-            if consecutive_count >= required_consecutive_detections:
-                filtered_detections = []
-                for (lbl, conf, b) in detections_adjusted:
-                    if lbl not in ["plate_mercosul", "plate_antigo"] and conf >= confidence_threshold:
-                        center_x, center_y, w, h = b
-                        left_x = center_x - (w / 2)
-                        # Store (label, left_x) for sorting
-                        filtered_detections.append((lbl, conf, b, left_x))
-                    elif lbl in ["plate_mercosul", "plate_antigo"]:
-                        full_plate_type = lbl
-
-                # Sort filtered detections by left_x
-                filtered_detections.sort(key=lambda x: x[3])
-
-                # Print the classes left-to-right
-                # Only print the class values (labels)
-                platelbl = ""
-                plateconf = []
-                for (lbl, conf, b, lx) in filtered_detections:
-                    platelbl += lbl
-                    plateconf.append(conf)
-                plate = (platelbl, plateconf)
-
-                if consecutive_count >= required_consecutive_detections:
-
-                    # Identify plate bounding boxes
-                    plate_boxes = [(lbl, b) for (lbl, conf, b) in detections_adjusted 
-                                   if lbl in ["plate_mercosul", "plate_antigo"] and conf >= confidence_threshold]
-
-                    max_inside = -1
-                    chosen_label = None
-                    chosen_bbox = None
-
-                    for (p_lbl, p_bbox) in plate_boxes:
-                        px, py, pw, ph = p_bbox
-                        # Convert plate center-based coords to top-left coords for inside check
-                        px1 = px - pw / 2
-                        py1 = py - ph / 2
-                        px2 = px + pw / 2
-                        py2 = py + ph / 2
-
-                        inside_count = 0
-                        # Count how many filtered classes are inside this plate
-                        for (lbl, conf, b, lx) in filtered_detections:
-                            cx, cy, cw, ch = b
-                            # Check center (cx, cy) of this class inside plate bounds
-                            if (cx >= px1 and cx <= px2 and cy >= py1 and cy <= py2):
-                                inside_count += 1
-
-                        # If this plate has more classes, select it
-                        if inside_count > max_inside:
-                            max_inside = inside_count
-                            chosen_label = p_lbl
-                            chosen_bbox = p_bbox
-
-                    print(f"{required_consecutive_detections} consecutive detections with confidence >= {confidence_threshold}%")
-                    # print("Bounding Box Coordinates:", chosen_bbox)
-
-                    consecutive_count = 0
-
-                    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                    bbox_str = "_".join(map(str, chosen_bbox))
-                    filename = f"{chosen_label}_{timestamp}.png"
-
-                    # Save the image
-                    cv2.imwrite(filename, image)
-                    print(f"Full image saved as: {filename}")
-
-                    center_x, center_y, box_w, box_h = chosen_bbox
-
-                    # Convert center-based coords to top-left
-                    x1 = int(center_x - box_w / 2)
-                    y1 = int(center_y - box_h / 2)
-                    x2 = int(center_x + box_w / 2)
-                    y2 = int(center_y + box_h / 2)
-
-                    # Clip to image boundaries
-                    height, width = image.shape[:2]
-                    x1 = max(0, x1)
-                    y1 = max(0, y1)
-                    x2 = min(width - 1, x2)
-                    y2 = min(height - 1, y2)
-
-                    bbox_crop = image[y1:y2, x1:x2]
-                    bbox_filename = f"{chosen_label}_{bbox_str}_{timestamp}_boundingbox.png"
-                    cv2.imwrite(bbox_filename, bbox_crop)
-                    print(f"Cropped bounding box image saved as: {bbox_filename}")
-
-                    return plate, full_plate_type
-
-            cv2.putText(image, fps_label, (0, 25), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 0), 5)
-            cv2.putText(image, fps_label, (0, 25), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 3)
-
-            if not args["dont_show"]:
-                cv2.imshow('Inference', image)
-
-            if cv2.waitKey(1) & 0xFF == ord('q'):
-                return None
-
-            # Write the frame to the output video file if specified
-            if args["out_filename"] is not None:
-                video.write(image)  # Save the frame to video file
-        
-        # Free Darknet image after inference
-        darknet.free_image(img_for_detect)
-    cap.release()
+                plate_boxes = [(lbl, conf, b) for (lbl, conf, b) in detections_adjusted
+                               if lbl in PLATE_CLASSES and conf >= confidence_threshold]
+                characters = [(lbl, conf, b) for (lbl, conf, b) in detections_adjusted
+                              if lbl not in PLATE_CLASSES and conf >= confidence_threshold]
+
+                # Reused detections are no new evidence: drawn, but not voted on again
+                chosen = select_plate_box(plate_boxes, characters) if not detections.reused else None
+                if chosen is not None:
+                    chosen_label, chosen_conf, chosen_bbox = chosen
+                    plate_type_vote.add(chosen_label, chosen_conf / 100)
+                    consensus.update([
+                        (lbl, conf / 100, plate_relative_x(b, chosen_bbox))
+                        for (lbl, conf, b) in characters if box_center_inside(b, chosen_bbox)
+                    ])
+                    full_plate_type, _ = plate_type_vote.leader()
+                    decision = consensus.decision()
+                    # The decoder can accept a clear grammar-valid plate before every slot has its margin
+                    reading = decode_plate(consensus.candidates(), full_plate_type, normalize=SHARE)
+                    if reading is not None:
+                        if decision is not None:
+                            decision = (reading.text, decision[1])
+                        elif reading.score >= min_plate_score and consensus.frames >= consensus.min_frames:
+                            # The vote share only decides the accept; report the detector's confidence like a margin consensus
+                            decision = (reading.text, consensus.confidences(reading.text, COUNTERPARTS))
+
+                    if decision is not None:
+                        plate = decision
+                        score = f", decoder score {reading.score:.2f}" if reading is not None else ""
+                        print(f"Plate consensus after {consensus.frames} frames (margin {consensus.margin}{score})")
+                        if stats is not None:
+                            stats["frames_to_decision"] = consensus.frames
+
+                        center_x, center_y, box_w, box_h = chosen_bbox
+
+                        # Convert center-based coords to top-left
+                        x1 = int(center_x - box_w / 2)
+                        y1 = int(center_y - box_h / 2)
+                        x2 = int(center_x + box_w / 2)
+                        y2 = int(center_y + box_h / 2)
+
+                        # Clip to image boundaries
+                        height, width = frame.shape[:2]
+                        x1 = max(0, x1)
+                        y1 = max(0, y1)
+                        x2 = min(width - 1, x2)
+                        y2 = min(height - 1, y2)
+
+                        bbox_crop = frame[y1:y2, x1:x2]
+                        if evidence is not None:
+                            # Boxes are drawn and both images encoded on the writer's thread
+                            paths = evidence.submit(chosen_label, {
+                                "full": partial(darknet.draw_boxes, detections_adjusted, frame.copy(), class_colors),
+                                "crop": bbox_crop,
+                            })
+                            if stats is not None:
+                                stats["evidence"] = paths
+                            print(f"Evidence queued: {paths}")
+
+                        return plate, full_plate_type
+
+                # Drawing, preview and video writing only happen when someone is watching
+                if viewer is not None:
+                    now = time.time()
+                    fps_label = f"FPS: {round(1.0 / max(now - last_frame_at, 1e-6), 2)}"
+                    last_frame_at = now
+                    viewer.submit(frame, detections_adjusted, fps_label)
+    finally:
+        stream.close()
+        if pipelined:
+            stream.report()
+        if change_detector is not None:
+            change_detector.report()
+        if cascade_detector is not None:
+            cascade_detector.report()
+        cap.release()
+        if viewer is not None:
+            viewer.close()
+        if owns_pool:
+            image_pool.close()
+
+def select_plate_box(plate_boxes, characters):
+    """
+    Pick the plate box (label, confidence, bbox) holding the most characters, or None.
+    """
+    chosen = None
+    max_inside = -1
+    for plate_box in plate_boxes:
+        # Count how many characters have their center inside this plate
+        inside_count = sum(1 for (_, _, b) in characters if box_center_inside(b, plate_box[2]))
+        if inside_count > max_inside:
+            max_inside = inside_count
+            chosen = plate_box
+    return chosen
+
+def box_center_inside(bbox, plate_bbox):
+    cx, cy, _, _ = bbox
+    px, py, pw, ph = plate_bbox
+    return px - pw / 2 <= cx <= px + pw / 2 and py - ph / 2 <= cy <= py + ph / 2
 
 def validate_plate_full(plate_type, plate):
-    corrected_text = ""
-    for i, char in enumerate(plate):
-        if plate_type == "plate_mercosul":
-            # Mercosul format: Letter, Letter, Letter, Number, Letter, Number, Number
-            if i in [0, 1, 2, 4]:  # Letter sections
-                corrected_text += 'O' if char == '0' else char
-            elif i in [3, 5, 6]:  # Number sections
-                corrected_text += '0' if char == 'O' else char
-            else:
-                corrected_text += char
-        elif plate_type == "plate_antigo":
-            # Antiga format: Letter, Letter, Letter, Number, Number, Number, Number
-            if i in [0, 1, 2]:  # Letter sections
-                corrected_text += 'O' if char == '0' else char
-            elif i in [3, 4, 5, 6]:  # Number sections
-                corrected_text += '0' if char == 'O' else char
-            else:
-                corrected_text += char
-    
-    return corrected_text
+    """
+    Fix letter/digit confusions (0/O, 8/B, 5/S, ...) by position for the plate type's
+    format. Text that fits no format comes back unchanged.
+    """
+    reading = decode_plate(candidates_from_text(plate, 1.0), plate_type)
+    return reading.text if reading is not None else plate
 
 if __name__ == '__main__':
     args = parse_args()
-    darknet.set_gpu(args.gpu_index)
     check_arguments_errors(args)
 
-    names_file = "./FullPlates/AntigoPlates_test3.names"
-    network = darknet.load_net_custom(args.config_file.encode("ascii"), args.weights.encode("ascii"), 0, 1)
-    class_names = open(names_file).read().splitlines()
-    colours = darknet.class_colors(class_names)
-    class_colors = colours
+    config = vars(args)
+    config["names_file"] = "./FullPlates/AntigoPlates_test3.names"
+    registry = ModelRegistry(args.gpu_index)
+    handle = registry.load_network("fullplate", config)
+    registry.report()
 
-    darknet_width = darknet.network_width(network)
-    darknet_height = darknet.network_height(network)
     input_path = str2int(args.input)
     cap = cv2.VideoCapture(input_path)
-    video_width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-    video_height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-
-    # Initialize video writer if an output filename is specified
-    video = set_saved_video(cap, args.out_filename, (video_width, video_height))
+    viewer = DetectionViewer.from_config(config, handle.class_colors, cap)  # None when headless
+    change_detector = ChangeDetector() if args.skip_static else None
+    evidence = EvidenceWriter.from_config(config)  # None when evidence_dir is empty
 
     # Run everything sequentially
     confidence_threshold = 50.0
-    required_consecutive_detections = 10
-    result = video_capture_full(confidence_threshold, required_consecutive_detections)
-    video.release()
+    required_consecutive_detections = 3  # Minimum frames (at least 2); the per-character consensus decides when to stop
+    result = video_capture_full(
+        cap, confidence_threshold, required_consecutive_detections, handle.detector, handle.class_names,
+        handle.width, handle.height, handle.class_colors, config,
+        image_pool=handle.image_pool, pipelined=args.pipelined, viewer=viewer,
+        change_detector=change_detector, evidence=evidence,
+        cascade=args.cascade
+    )
 
     print("Result: ", result)
+    if evidence is not None:
+        evidence.close()
 
     if result == None:
         print("No valid plate detected.")
@@ -9,12 +9,22 @@ import plate_model.darknet as darknet
 import argparse
 import sys
 from datetime import datetime
+from functools import partial
+import heapq
+import itertools
 import re
-import easyocr
 from plate_model.utils import *
-
-# Global variables for speed control
-frame_delay = 30  # Delay in milliseconds (default is 30 for normal speed)
+from plate_model.model_registry import ModelRegistry
+from plate_model.pipeline import DetectionPipeline, serial_detections
+from plate_model.visualization import DetectionViewer
+from plate_model.motion_gate import ChangeDetector
+from plate_model.voting import TemporalVote
+from plate_model.evidence import EvidenceWriter
+from plate_model.ocr_reader import read_crops
+from plate_model.plate_decoder import decode_plate, candidates_from_text, merge_candidates
+
+# Lowest fused EasyOCR confidence (0-1) a plate is accepted with; None accepts every grammar-valid reading
+MIN_OCR_SCORE = None
 
 def parse_args():
     # Create an ArgumentParser object with a description for YOLO Object Detection.
@@ -28,6 +38,14 @@ def parse_args():
     parser.add_argument("--data_file", default="coco.data", help="path to data file")
     parser.add_argument("--thresh", type=float, default=.25, help="remove detections with confidence below this value")
     parser.add_argument("--gpu_index", type=int, default=0, help="GPU index to use for processing")
+    parser.add_argument("--backend", choices=("darknet", "opencv"), default="darknet", help="detector backend: darknet (GPU) or opencv (CPU)")
+    parser.add_argument("--threads", type=int, default=4, help="worker threads for the opencv backend")
+    parser.add_argument("--evidence_dir", default="./evidence", help="where accepted plates are saved. Not saved if empty")
+    parser.add_argument("--evidence_format", choices=("jpg", "webp", "png"), default="jpg", help="image format of the saved evidence")
+    parser.add_argument("--evidence_quality", type=int, default=90, help="jpg/webp quality of the saved evidence")
+    parser.add_argument("--pipelined", action='store_true', help="overlap capture, preprocessing and inference in threads")
+    parser.add_argument("--skip_static", action='store_true', help="reuse the previous detections while the scene is unchanged")
+    parser.add_argument("--batch_size", type=int, default=1, help="frames per batched forward pass")
     return parser.parse_args()
 
 def check_arguments_errors(args):
@@ -41,213 +59,234 @@ def check_arguments_errors(args):
     if str2int(args.input) == str and not os.path.exists(args.input):
         raise(ValueError("Invalid video path {}".format(os.path.abspath(args.input))))
 
-def video_capture_ocr(confidence_threshold, required_consecutive_detections):
-    global frame_delay
-    consecutive_count = 0
-
-    while cap.isOpened():
-        ret, frame = cap.read()
-        if not ret:
-            break
-
-        start = time.time()
-
-        key = cv2.waitKey(frame_delay) & 0xFF
-        if key == ord('q'):
-            break
-        elif key == 82:
-            frame_delay = max(1, frame_delay - 5)
-        elif key == 84:
-            frame_delay += 5
-
-        frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        frame_resized = cv2.resize(frame_rgb, (darknet_width, darknet_height), interpolation=cv2.INTER_LINEAR)
-
-        # Create a Darknet image from the resized frame
-        img_for_detect = darknet.make_image(darknet_width, darknet_height, 3)
-        darknet.copy_image_from_bytes(img_for_detect, frame_resized.tobytes())
-
-        # Perform inference and drawing
-        detections = darknet.detect_image(network, class_names, img_for_detect, thresh=args.thresh)
-
-        end = time.time()  # End time for FPS calculation
-        fps_label = f"FPS: {round(1.0 / (end - start), 2)}"
-
-        detections_adjusted = []
-        if frame is not None:
-            for label, confidence, bbox in detections:
-                bbox_adjusted = convert2original(frame, bbox, darknet_height, darknet_width)
-                detections_adjusted.append((str(label), confidence, bbox_adjusted))
-
-            image = darknet.draw_boxes(detections_adjusted, frame, class_colors)
-            print("Detections: ", detections_adjusted)
+def video_capture_ocr(
+    cap, confidence_threshold, required_consecutive_detections, detector, class_names, darknet_width, darknet_height, class_colors, args,
+    image_pool=None, detect_batch=None, batch_size=1, pipelined=False, viewer=None, consensus_margin=2.0, stats=None,
+    change_detector=None, evidence=None, top_k=3
+):
+    """
+    detect_batch, when given, is called with up to batch_size frames at a time
+    (see LoadedNetwork.detect_batch) so the plate check runs on batched inference.
+    With pipelined=True (single-frame inference only), capture, preprocessing and
+    inference run in their own threads while this loop does the plate logic.
+
+    The plate is cropped once the leading plate type beats the runner-up by
+    consensus_margin (in summed 0-1 confidences) over at least
+    required_consecutive_detections confident frames. If a stats dict is given,
+    the number of frames the decision took is stored under "frames_to_decision".
+
+    Returns (plate type, crop path, crops), where crops are the top_k most
+    confident plate crops of the decided type seen so far, best first, to be
+    read together (see ocr_reader.read_crops). With an EvidenceWriter the
+    annotated frame and the deciding crop are queued for writing in the
+    background and the crop path is where it will land; without one nothing is
+    saved and the path is None.
+    """
+    if detect_batch is None:
+        batch_size = 1
+    owns_pool = image_pool is None and detect_batch is None
+    if owns_pool:
+        image_pool = detector.make_pool()
+    # Confidence-weighted vote on the plate type instead of N identical consecutive frames
+    plate_type_vote = TemporalVote()
+    voted_frames = 0
+    best_crops = {}  # plate type -> heap of (confidence, sequence, crop)
+
+    pipelined = pipelined and detect_batch is None
+    if pipelined:
+        stream = DetectionPipeline(cap, detector, class_names, image_pool, args["thresh"], change_detector=change_detector)
+    else:
+        stream = serial_detections(
+            cap, detector, class_names, image_pool, args["thresh"], detect_batch, batch_size, change_detector=change_detector
+        )
+    last_frame_at = time.time()  # Time between frames leaving the detector, for the preview FPS label
+    try:
+        for frame, detections in stream:
+            if viewer is not None and viewer.quit_requested:
+                break
+
+            detections_adjusted = []
+            if frame is not None:
+                boxes = convert2original_boxes(frame, detections.boxes, darknet_height, darknet_width)
+                detections_adjusted = [
+                    (class_names[class_id], confidence, tuple(box))
+                    for class_id, confidence, box in zip(detections.class_ids.tolist(), detections.confidences.tolist(), boxes.tolist())
+                ]
             
-            # Check for target class with required confidence
-            found_high_confidence = False
-            last_bbox = None
-            last_label = None
-            for (label, conf, b) in detections_adjusted:
-                if float(conf) >= confidence_threshold:
-                    found_high_confidence = True
-                    last_bbox = b  # Track the last bbox meeting the criteria
-                    last_label = label
-
-            # Update consecutive count
-            if found_high_confidence:
-                consecutive_count += 1
-            else:
-                consecutive_count = 0
-
-            if consecutive_count >= required_consecutive_detections and last_bbox is not None:
-                print(f"{required_consecutive_detections} consecutive detections with confidence >= {confidence_threshold}%")
-                print("Bounding Box Coordinates:", last_bbox)
-                consecutive_count = 0
-
-                center_x, center_y, box_w, box_h = last_bbox
-
-                # Convert center-based coords to top-left
-                x1 = int(center_x - box_w / 2)
-                y1 = int(center_y - box_h / 2)
-                x2 = int(center_x + box_w / 2)
-                y2 = int(center_y + box_h / 2)
-
-                # Clip to image boundaries
-                height, width = image.shape[:2]
-                x1 = max(0, x1)
-                y1 = max(0, y1)
-                x2 = min(width - 1, x2)
-                y2 = min(height - 1, y2)
-
-                bbox_crop = image[y1:y2, x1:x2]
-                height, width, _ = bbox_crop.shape
-                print("Height: ", height)
-                print("Width: ", width)
-
-                if width >= height * 2: # Check if plate is large enough to be valid
-
-                    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                    bbox_str = "_".join(map(str, last_bbox))
-                    filename = f"{last_label}_{timestamp}.png"
-
-                    # Save the image
-                    cv2.imwrite(filename, image)
-                    print(f"Full image saved as: {filename}")
-                    bbox_filename = f"{last_label}_{bbox_str}_{timestamp}_boundingbox.png"
-                    cv2.imwrite(bbox_filename, bbox_crop)
-                    print(f"Cropped bounding box image saved as: {bbox_filename}")
-
-                    bbox_dir = os.path.dirname(bbox_filename)
-                    if bbox_dir == "":
-                        bbox_dir = os.getcwd()  # If no directory specified, use the current working directory
-
-                    bbox_dir = bbox_dir + "/"
-
-                    print(f"Directory of cropped image: {bbox_dir + bbox_filename}")
-
-                    return (last_label, bbox_dir + bbox_filename)
-
+                # Check for target class with required confidence
+                confident = np.flatnonzero(detections.confidences >= confidence_threshold)
+                last_bbox = None
+                last_label = None
+                if detections.reused:
+                    # The change gate skipped the network: no new evidence to vote with
+                    confident = confident[:0]
                 else:
-                    print("Not correct size, trying again")
-
-            cv2.putText(image, fps_label, (0, 25), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 0), 5)
-            cv2.putText(image, fps_label, (0, 25), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 3)
-
-            if not args.dont_show:
-                cv2.imshow('Inference', image)
-
-            if cv2.waitKey(1) & 0xFF == ord('q'):
-                return None
-
-            # Write the frame to the output video file if specified
-            if args.out_filename is not None:
-                video.write(image)  # Save the frame to video file
-        
-        # Free Darknet image after inference
-        darknet.free_image(img_for_detect)
-    cap.release()
+                    voted_frames += 1
+                if len(confident) > 0:
+                    # Track the last bbox meeting the criteria and vote for its plate type
+                    last_label, last_conf, last_bbox = detections_adjusted[confident[-1]]
+                    plate_type_vote.add(last_label, last_conf / 100)
+
+                # Keep the best few plate-shaped crops of every type for the batched OCR
+                bbox_crop = None
+                if last_bbox is not None:
+                    bbox_crop = crop_bbox(frame, last_bbox)
+                    crop_h, crop_w = bbox_crop.shape[:2]
+                    if crop_w >= crop_h * 2 and crop_h > 0:  # Check if plate is large enough to be valid
+                        keep_best_crop(best_crops.setdefault(last_label, []), last_conf, bbox_crop, top_k)
+                    else:
+                        bbox_crop = None
+
+                leader, margin = plate_type_vote.leader()
+                if (last_bbox is not None and last_label == leader and margin >= consensus_margin
+                        and plate_type_vote.observations >= required_consecutive_detections):
+                    if bbox_crop is None:
+                        print("Not correct size, trying again")
+                    else:
+                        print(f"Plate type '{leader}' decided after {voted_frames} frames (margin {margin:.2f})")
+                        print("Bounding Box Coordinates:", last_bbox)
+                        crops = [crop for _, _, crop in sorted(best_crops[leader], reverse=True)]
+
+                        crop_path = None
+                        if evidence is not None:
+                            # Boxes are drawn and both images encoded on the writer's thread
+                            paths = evidence.submit(last_label, {
+                                "full": partial(darknet.draw_boxes, detections_adjusted, frame.copy(), class_colors),
+                                "crop": bbox_crop,
+                            })
+                            crop_path = paths["crop"] if paths is not None else None
+                            if stats is not None:
+                                stats["evidence"] = paths
+                            print(f"Evidence queued: {paths}")
+                        if stats is not None:
+                            stats["frames_to_decision"] = voted_frames
+
+                        # OCR reads the crops from memory; the file may not be written yet
+                        return (last_label, crop_path, crops)
+
+                # Drawing, preview and video writing only happen when someone is watching
+                if viewer is not None:
+                    now = time.time()
+                    fps_label = f"FPS: {round(1.0 / max(now - last_frame_at, 1e-6), 2)}"
+                    last_frame_at = now
+                    viewer.submit(frame, detections_adjusted, fps_label)
+    finally:
+        stream.close()
+        if pipelined:
+            stream.report()
+        if change_detector is not None:
+            change_detector.report()
+        cap.release()
+        if viewer is not None:
+            viewer.close()
+        if owns_pool:
+            image_pool.close()
   
-def validate_plate_ocr(plate_type, ocr_result):
-    valid_predictions = []
-
-    for detection in ocr_result:
-        _, text, confidence = detection
-
-        # Ensure it's 7 characters long
-        if len(text) != 7:
-            continue
-
-        # Replace '0' with 'O' and 'O' with '0' for validation
-        corrected_text = ""
-        for i, char in enumerate(text):
-            if plate_type == "mercosul":
-                # Mercosul format: Letter, Letter, Letter, Number, Letter, Number, Number
-                if i in [0, 1, 2, 4]:  # Letter sections
-                    corrected_text += 'O' if char == '0' else char
-                elif i in [3, 5, 6]:  # Number sections
-                    corrected_text += '0' if char == 'O' else char
-                else:
-                    corrected_text += char
-            elif plate_type == "antiga":
-                # Antiga format: Letter, Letter, Letter, Number, Number, Number, Number
-                if i in [0, 1, 2]:  # Letter sections
-                    corrected_text += 'O' if char == '0' else char
-                elif i in [3, 4, 5, 6]:  # Number sections
-                    corrected_text += '0' if char == 'O' else char
-                else:
-                    corrected_text += char
-
-        # Validate the corrected text format using regex
-        if plate_type == "mercosul" and re.match(r'^[A-Z]{3}[0-9][A-Z][0-9]{2}$', corrected_text):
-            valid_predictions.append((corrected_text, confidence))
-        elif plate_type == "antiga" and re.match(r'^[A-Z]{3}[0-9]{4}$', corrected_text):
-            valid_predictions.append((corrected_text, confidence))
-
-    # If we have valid predictions, choose the one with the highest confidence
-    if valid_predictions:
-        best_prediction = max(valid_predictions, key=lambda x: x[1])
-        print(f"Selected Plate: {best_prediction[0]} with confidence {best_prediction[1]}")
-        return (best_prediction[0], best_prediction[1])
-    else:
+def crop_bbox(frame, bbox):
+    """
+    Crop a (center x, center y, w, h) box out of the frame, clipped to its borders.
+    """
+    center_x, center_y, box_w, box_h = bbox
+
+    # Convert center-based coords to top-left
+    x1 = int(center_x - box_w / 2)
+    y1 = int(center_y - box_h / 2)
+    x2 = int(center_x + box_w / 2)
+    y2 = int(center_y + box_h / 2)
+
+    # Clip to image boundaries
+    height, width = frame.shape[:2]
+    x1 = max(0, x1)
+    y1 = max(0, y1)
+    x2 = min(width - 1, x2)
+    y2 = min(height - 1, y2)
+    return frame[y1:y2, x1:x2]
+
+def keep_best_crop(heap, confidence, crop, top_k):
+    """
+    Add a crop to a min-heap holding the top_k most confident crops.
+    """
+    # The sequence number breaks confidence ties before the arrays would be compared
+    entry = (confidence, next(_crop_sequence), crop.copy())
+    if len(heap) < top_k:
+        heapq.heappush(heap, entry)
+    elif confidence > heap[0][0]:
+        heapq.heapreplace(heap, entry)
+
+_crop_sequence = itertools.count()
+
+def fuse_plate_ocr(plate_type, ocr_results, min_score=MIN_OCR_SCORE):
+    """
+    Decode the OCR results of several crops of the same plate together.
+
+    Every 7-character reading adds its characters, at the reading's
+    confidence, as candidates for their slot; plate_decoder then picks the
+    best grammar-valid character per slot, correcting letter/digit confusions.
+    A single misread character is outvoted by the crops that agree; it lowers
+    the score, which is on EasyOCR's confidence scale (three crops reading the
+    same plate at 0.8 score 0.8). With min_score set, a lower scoring plate is
+    rejected like an unreadable one.
+
+    Returns:
+        (plate text, decoder score 0-1), or ("None", "None").
+    """
+    readings = [
+        candidates_from_text(text.upper(), confidence)
+        for ocr_result in ocr_results
+        for _, text, confidence in ocr_result
+        if len(text) == 7
+    ]
+    reading = decode_plate(merge_candidates(readings), plate_type) if readings else None
+    if reading is None:
         print("No valid predictions found.")
         return ("None", "None")
+    if min_score is not None and reading.score < min_score:
+        print(f"Best plate {reading.text} scores {reading.score:.2f}, below {min_score}: rejected")
+        return ("None", "None")
+    print(f"Selected Plate: {reading.text} with score {reading.score:.2f} from {len(readings)} readings")
+    return (reading.text, reading.score)
+
+def validate_plate_ocr(plate_type, ocr_result, min_score=MIN_OCR_SCORE):
+    return fuse_plate_ocr(plate_type, [ocr_result], min_score)
 
 
 if __name__ == '__main__':
     args = parse_args()
-    darknet.set_gpu(args.gpu_index)
     check_arguments_errors(args)
 
-    # names_file = "./AntigoPlates_test3.names"
-    names_file = "./DiffPlates/DiffPlates.names"
-    network = darknet.load_net_custom(args.config_file.encode("ascii"), args.weights.encode("ascii"), 0, 1)
-    class_names = open(names_file).read().splitlines()
-    colours = darknet.class_colors(class_names)
-    class_colors = colours
+    config = vars(args)
+    config["names_file"] = "./DiffPlates/DiffPlates.names"
+    registry = ModelRegistry(args.gpu_index)
+    handle = registry.load_network("ocr", config)
+    reader = registry.load_reader() # this needs to run only once to load the model into memory
+    registry.report()
 
-    darknet_width = darknet.network_width(network)
-    darknet_height = darknet.network_height(network)
     input_path = str2int(args.input)
     cap = cv2.VideoCapture(input_path)
-    video_width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-    video_height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-
-    reader = easyocr.Reader(['en']) # this needs to run only once to load the model into memory
-
-    # Initialize video writer if an output filename is specified
-    video = set_saved_video(cap, args.out_filename, (video_width, video_height))
+    viewer = DetectionViewer.from_config(config, handle.class_colors, cap)  # None when headless
+    change_detector = ChangeDetector() if args.skip_static else None
+    evidence = EvidenceWriter.from_config(config)  # None when evidence_dir is empty
 
-    # Run everything sequentially, release video writer when done saving
+    # Run everything sequentially
     confidence_threshold = 60.0
-    required_consecutive_detections = 20
-    result = video_capture_ocr(confidence_threshold, required_consecutive_detections)
-    video.release()
+    required_consecutive_detections = 3  # Minimum confident frames; the plate type vote decides when to stop
+    result = video_capture_ocr(
+        cap, confidence_threshold, required_consecutive_detections, handle.detector, handle.class_names,
+        handle.width, handle.height, handle.class_colors, config,
+        image_pool=handle.image_pool, pipelined=args.pipelined, viewer=viewer,
+        change_detector=change_detector, evidence=evidence,
+        detect_batch=handle.detect_batch if handle.batch_image is not None else None,
+        batch_size=handle.batch_size
+    )
+
+    if evidence is not None:
+        evidence.close()
 
     if result == None:
         print("No valid plate detected.")
     else:
-        plate_type, image_path = result
-        result = reader.readtext(image_path, allowlist='ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789')
-        plate, confidance = validate_plate_ocr(plate_type, result)
+        plate_type, image_path, crops = result
+        plate, confidance = fuse_plate_ocr(plate_type, read_crops(reader, crops))
 
         print("Final Plate: ", plate)
         print("Confidance: ", confidance)
@@ -0,0 +1,183 @@
+import queue
+import numpy as np
+import cv2
+import plate_model.darknet as darknet
+from plate_model.image_pool import ImagePool
+
+BACKENDS = ("darknet", "opencv")
+
+
+class DarknetBackend:
+    """
+    Detector backend running a network through libdarknet (GPU when darknet
+    was built with CUDA). Frames are uploaded into pooled darknet IMAGEs.
+
+    Every backend exposes the same interface to the detection loops:
+        detector.width, detector.height   network input size, the coordinate space of the boxes
+        pool = detector.make_pool(size)   ImagePool-like: acquire/upload/release/close, slot.image
+        detector.detect(slot.image, thresh) -> darknet.Detections
+    """
+
+    name = "darknet"
+
+    def __init__(self, network, num_classes):
+        self.network = network
+        self.num_classes = num_classes
+        self.width = darknet.network_width(network)
+        self.height = darknet.network_height(network)
+
+    @classmethod
+    def load(cls, config, num_classes, batch_size=1):
+        network = darknet.load_net_custom(
+            config["config_file"].encode("ascii"), config["weights"].encode("ascii"), 0, batch_size
+        )
+        return cls(network, num_classes)
+
+    def make_pool(self, size=1):
+        return ImagePool(self.width, self.height, size=size)
+
+    def detect(self, image, thresh=.5, nms=.45):
+        return darknet.detect_image_arrays(self.network, self.num_classes, image, thresh=thresh, nms=nms)
+
+
+class BlobSlot:
+    """
+    One reusable NCHW float blob plus the buffers the frame is resized and
+    colour-converted into, the OpenCV DNN counterpart of image_pool.ImageSlot.
+    """
+
+    def __init__(self, width, height):
+        self.resized = np.empty((height, width, 3), dtype=np.uint8)
+        self.rgb = np.empty((height, width, 3), dtype=np.uint8)
+        self.image = np.empty((1, 3, height, width), dtype=np.float32)
+
+
+class BlobPool:
+    """
+    Same interface as ImagePool, but the slots hold input blobs for OpenCV DNN.
+    """
+
+    def __init__(self, width, height, size=1):
+        self.width = width
+        self.height = height
+        self.slots = [BlobSlot(width, height) for _ in range(size)]
+        self._free = queue.Queue()
+        for slot in self.slots:
+            self._free.put(slot)
+
+    def acquire(self, timeout=None):
+        return self._free.get(timeout=timeout)
+
+    def release(self, slot):
+        self._free.put(slot)
+
+    def upload(self, slot, frame):
+        """
+        Resize, convert to RGB and scale to 0-1 into the slot's preallocated blob,
+        which is what darknet's own preprocessing does.
+        """
+        cv2.resize(frame, (self.width, self.height), dst=slot.resized, interpolation=cv2.INTER_LINEAR)
+        cv2.cvtColor(slot.resized, cv2.COLOR_BGR2RGB, dst=slot.rgb)
+        np.multiply(slot.rgb.transpose(2, 0, 1), 1 / 255.0, out=slot.image[0], casting="unsafe")
+        return slot.image
+
+    def close(self):
+        self.slots = []
+
+
+class OpenCVBackend:
+    """
+    Detector backend running the same darknet cfg/weights on the CPU through
+    OpenCV DNN, for machines without a CUDA build of libdarknet.
+
+    Boxes and confidences come back in the same format as the darknet backend:
+    (center x, center y, w, h) in network input pixels, confidences in percent,
+    per-class NMS and sorted by ascending confidence.
+    """
+
+    name = "opencv"
+
+    def __init__(self, config_file, weights, num_classes, threads=None):
+        self.network = cv2.dnn.readNetFromDarknet(config_file, weights)
+        self.network.setPreferableBackend(cv2.dnn.DNN_BACKEND_OPENCV)
+        self.network.setPreferableTarget(cv2.dnn.DNN_TARGET_CPU)
+        if threads:
+            # OpenCV's thread pool is process wide, the last loaded network decides
+            cv2.setNumThreads(threads)
+        self.output_names = self.network.getUnconnectedOutLayersNames()
+        self.num_classes = num_classes
+        self.width, self.height = read_network_size(config_file)
+
+    @classmethod
+    def load(cls, config, num_classes, batch_size=1):
+        return cls(config["config_file"], config["weights"], num_classes, threads=config.get("threads"))
+
+    def make_pool(self, size=1):
+        return BlobPool(self.width, self.height, size=size)
+
+    def detect(self, image, thresh=.5, nms=.45):
+        self.network.setInput(image)
+        outputs = self.network.forward(self.output_names)
+        # Each row of a YOLO output is (cx, cy, w, h, objectness, objectness * class probability...), all relative
+        rows = np.concatenate([output.reshape(-1, output.shape[-1]) for output in outputs])
+        scores = rows[:, 5:5 + self.num_classes]
+        class_ids = scores.argmax(axis=1)
+        confidences = scores[np.arange(len(rows)), class_ids]
+        keep = confidences > thresh
+        class_ids, confidences = class_ids[keep], confidences[keep]
+        boxes = rows[keep, :4] * np.array([self.width, self.height, self.width, self.height], dtype=np.float32)
+
+        if nms and len(boxes):
+            # Shift every class into its own region so one NMSBoxes call suppresses per class, like do_nms_sort
+            offset = (class_ids * 2 * max(self.width, self.height))[:, None]
+            corners = np.column_stack((boxes[:, 0] - boxes[:, 2] / 2, boxes[:, 1] - boxes[:, 3] / 2, boxes[:, 2:]))
+            corners[:, :2] += offset
+            kept = np.array(cv2.dnn.NMSBoxes(corners.tolist(), confidences.tolist(), thresh, nms), dtype=np.intp).reshape(-1)
+            class_ids, confidences, boxes = class_ids[kept], confidences[kept], boxes[kept]
+
+        order = np.argsort(confidences, kind="stable")
+        return darknet.Detections(
+            class_ids[order].astype(np.intp),
+            confidences[order] * 100,
+            boxes[order].astype(np.float32),
+        )
+
+
+def read_network_size(config_file):
+    """
+    Read the input width and height from the [net] section of a darknet cfg file.
+    """
+    width = height = None
+    section = None
+    with open(config_file) as cfg:
+        for line in cfg:
+            line = line.split("#", 1)[0].strip()
+            if line.startswith("["):
+                if section in ("[net]", "[network]"):
+                    break
+                section = line
+            elif section in ("[net]", "[network]") and "=" in line:
+                key, value = (part.strip() for part in line.split("=", 1))
+                if key == "width":
+                    width = int(value)
+                elif key == "height":
+                    height = int(value)
+    if width is None or height is None:
+        raise ValueError(f"No width/height in the [net] section of {config_file}")
+    return width, height
+
+
+def load_backend(config, num_classes, batch_size=1):
+    """
+    Load the detector backend named by config["backend"] ("darknet" by default).
+    Falls back to OpenCV DNN when libdarknet could not be loaded.
+    """
+    name = config.get("backend", "darknet")
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown detector backend '{name}', expected one of {BACKENDS}")
+    if name == "darknet" and not darknet.has_darknet:
+        print("libdarknet is not available, using the OpenCV DNN backend")
+        name = "opencv"
+    if name == "opencv":
+        return OpenCVBackend.load(config, num_classes, batch_size)
+    return DarknetBackend.load(config, num_classes, batch_size)
@@ -0,0 +1,167 @@
+import os
+import queue
+import threading
+import time
+from collections import deque
+from datetime import datetime
+import cv2
+from plate_model.metrics import registry
+
+EVIDENCE_WRITTEN = registry.counter("evidence_written_total", "Evidence images written to disk")
+EVIDENCE_DROPPED = registry.counter("evidence_dropped_total", "Evidence images dropped because the writer queue was full")
+EVIDENCE_WRITE_LATENCY = registry.histogram("evidence_write_seconds", "Encoding and writing one evidence image")
+
+FORMATS = {
+    "jpg": lambda quality: [cv2.IMWRITE_JPEG_QUALITY, quality],
+    "webp": lambda quality: [cv2.IMWRITE_WEBP_QUALITY, quality],
+    # PNG is lossless; a low compression level keeps encoding cheap on a Pi
+    "png": lambda quality: [cv2.IMWRITE_PNG_COMPRESSION, 1],
+}
+
+
+class EvidenceWriter:
+    """
+    Writes the images of accepted plates (annotated full frame, plate crop) from
+    a background thread, so the gate decision never waits on encoding or disk.
+
+    Files go to root/YYYY/MM/DD/<name>_<time>_<kind>.<format>. submit() returns
+    the paths the images will have, and never blocks: when the bounded queue is
+    full the evidence is dropped and counted instead. Files older than
+    retention_days, and the oldest files beyond max_bytes in total, are deleted.
+
+    Usage:
+        evidence = EvidenceWriter("./evidence", image_format="jpg", quality=90).start()
+        paths = evidence.submit("plate_mercosul", {"full": annotated, "crop": crop})
+        evidence.close()
+    """
+
+    def __init__(self, root="./evidence", image_format="jpg", quality=90, max_queue=8,
+                 retention_days=30, max_bytes=2 * 1024 ** 3):
+        if image_format not in FORMATS:
+            raise ValueError(f"Unsupported evidence format '{image_format}', expected one of {sorted(FORMATS)}")
+        self.root = os.path.abspath(root)
+        self.image_format = image_format
+        self.params = FORMATS[image_format](quality)
+        self.retention_days = retention_days
+        self.max_bytes = max_bytes
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._files = deque()  # (mtime, path, size), oldest first
+        self._total_bytes = 0
+        self._thread = None
+
+    @classmethod
+    def from_config(cls, config):
+        """
+        Build a writer from a task config, or return None when evidence is disabled.
+        """
+        if not config.get("evidence_dir"):
+            return None
+        return cls(
+            config["evidence_dir"],
+            image_format=config.get("evidence_format", "jpg"),
+            quality=config.get("evidence_quality", 90),
+            retention_days=config.get("evidence_retention_days", 30),
+            max_bytes=int(config.get("evidence_max_mb", 2048) * 1024 * 1024),
+        ).start()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="evidence-writer", daemon=True)
+        self._thread.start()
+        return self
+
+    def submit(self, name, images):
+        """
+        Queue images for writing.
+
+        Args:
+            name: File name prefix, e.g. the plate type.
+            images: {kind: image}, where an image is a BGR array or a callable returning one,
+                so costly preparation such as drawing boxes also happens off the gate's thread.
+
+        Returns:
+            {kind: path} the images will be written to, or None if the queue was full.
+        """
+        now = datetime.now()
+        directory = os.path.join(self.root, now.strftime("%Y"), now.strftime("%m"), now.strftime("%d"))
+        stamp = now.strftime("%H%M%S_%f")
+        paths = {kind: os.path.join(directory, f"{name}_{stamp}_{kind}.{self.image_format}") for kind in images}
+        try:
+            self._queue.put_nowait((directory, [(paths[kind], image) for kind, image in images.items()]))
+        except queue.Full:
+            EVIDENCE_DROPPED.inc(len(images))
+            return None
+        return paths
+
+    def close(self, timeout=5.0):
+        """
+        Write what is still queued (within the timeout) and stop the thread.
+        """
+        if self._thread is not None:
+            try:
+                self._queue.put(None, timeout=timeout)
+            except queue.Full:
+                pass
+            self._thread.join(timeout=timeout)
+            self._thread = None
+
+    def _run(self):
+        self._scan_existing()
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            directory, images = item
+            os.makedirs(directory, exist_ok=True)
+            for path, image in images:
+                start = time.perf_counter()
+                try:
+                    if callable(image):
+                        image = image()
+                    ok, encoded = cv2.imencode(f".{self.image_format}", image, self.params)
+                    if not ok:
+                        raise ValueError("encoding failed")
+                    with open(path, "wb") as output:
+                        output.write(encoded.tobytes())
+                except Exception as e:
+                    print(f"Error while writing evidence {path}:", e)
+                    continue
+                EVIDENCE_WRITE_LATENCY.observe(time.perf_counter() - start)
+                EVIDENCE_WRITTEN.inc()
+                self._files.append((time.time(), path, encoded.nbytes))
+                self._total_bytes += encoded.nbytes
+            self._enforce_limits()
+
+    def _scan_existing(self):
+        found = []
+        for directory, _, names in os.walk(self.root):
+            for name in names:
+                path = os.path.join(directory, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                found.append((stat.st_mtime, path, stat.st_size))
+        found.sort()
+        self._files = deque(found)
+        self._total_bytes = sum(size for _, _, size in found)
+        self._enforce_limits()
+
+    def _enforce_limits(self):
+        cutoff = time.time() - self.retention_days * 86400 if self.retention_days else None
+        while self._files and (
+            (cutoff is not None and self._files[0][0] < cutoff)
+            or (self.max_bytes and self._total_bytes > self.max_bytes)
+        ):
+            _, path, size = self._files.popleft()
+            self._total_bytes -= size
+            try:
+                os.remove(path)
+                self._remove_empty_parents(os.path.dirname(path))
+            except OSError:
+                pass
+
+    def _remove_empty_parents(self, directory):
+        # Day, month and year directories go once their last file is deleted, the root stays
+        while directory.startswith(self.root + os.sep) and not os.listdir(directory):
+            os.rmdir(directory)
+            directory = os.path.dirname(directory)
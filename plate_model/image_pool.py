@@ -0,0 +1,105 @@
+import queue
+from ctypes import c_char_p, c_float, POINTER, addressof, cast, sizeof
+import numpy as np
+import cv2
+import plate_model.darknet as darknet
+
+
+def prepare_frame(frame, image, resized, rgb):
+    """
+    Resize a BGR frame into `resized`, convert it into `rgb` and copy it into the
+    darknet IMAGE straight from the buffer's memory.
+    """
+    height, width = resized.shape[:2]
+    cv2.resize(frame, (width, height), dst=resized, interpolation=cv2.INTER_LINEAR)
+    cv2.cvtColor(resized, cv2.COLOR_BGR2RGB, dst=rgb)
+    darknet.copy_image_from_bytes(image, rgb.ctypes.data_as(c_char_p))
+    return image
+
+
+class ImageSlot:
+    """
+    One reusable darknet IMAGE plus the NumPy buffers the frame is resized and
+    colour-converted into before being handed to darknet.
+    """
+
+    def __init__(self, width, height):
+        self.image = darknet.make_image(width, height, 3)
+        self.resized = np.empty((height, width, 3), dtype=np.uint8)
+        self.rgb = np.empty((height, width, 3), dtype=np.uint8)
+
+
+class ImagePool:
+    """
+    A fixed set of darknet IMAGE buffers sized to the network input, allocated
+    once and reused for every frame instead of make_image/free_image per frame.
+
+    Usage:
+        pool = ImagePool(darknet_width, darknet_height)
+        slot = pool.acquire()
+        pool.upload(slot, frame)
+        detections = darknet.detect_image(network, class_names, slot.image)
+        pool.release(slot)
+    """
+
+    def __init__(self, width, height, size=1):
+        self.width = width
+        self.height = height
+        self.slots = [ImageSlot(width, height) for _ in range(size)]
+        self._free = queue.Queue()
+        for slot in self.slots:
+            self._free.put(slot)
+
+    def acquire(self, timeout=None):
+        return self._free.get(timeout=timeout)
+
+    def release(self, slot):
+        self._free.put(slot)
+
+    def upload(self, slot, frame):
+        """
+        Resize and convert a BGR frame straight into the slot's preallocated buffers
+        and copy it into the darknet IMAGE from the buffer's own memory.
+
+        Resizing first means the BGR->RGB conversion only touches network-sized pixels.
+        """
+        return prepare_frame(frame, slot.image, slot.resized, slot.rgb)
+
+    def close(self):
+        for slot in self.slots:
+            darknet.free_image(slot.image)
+        self.slots = []
+
+
+class BatchImage:
+    """
+    A single darknet IMAGE holding batch_size network-sized frames back to back,
+    as expected by darknet.detect_batch. Each frame is uploaded in place through
+    an IMAGE view pointing into its part of the buffer.
+    """
+
+    def __init__(self, width, height, batch_size):
+        self.width = width
+        self.height = height
+        self.batch_size = batch_size
+        self.image = darknet.make_image(width, height, 3 * batch_size)
+        plane_bytes = width * height * 3 * sizeof(c_float)
+        base = addressof(self.image.data.contents)
+        self.views = [
+            darknet.IMAGE(width, height, 3, cast(base + k * plane_bytes, POINTER(c_float)))
+            for k in range(batch_size)
+        ]
+        self.resized = np.empty((height, width, 3), dtype=np.uint8)
+        self.rgb = np.empty((height, width, 3), dtype=np.uint8)
+
+    def upload(self, frames):
+        """
+        Pack up to batch_size frames into the batch. Returns how many were packed.
+        """
+        frames = frames[:self.batch_size]
+        for view, frame in zip(self.views, frames):
+            prepare_frame(frame, view, self.resized, self.rgb)
+        return len(frames)
+
+    def close(self):
+        darknet.free_image(self.image)
@@ -0,0 +1,278 @@
+import json
+import threading
+import time
+from bisect import bisect_left
+from collections import namedtuple
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Upper bounds in seconds, from a single inference up to a whole detection task
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class Counter:
+    """
+    Monotonic count. inc() is a single attribute update and takes no lock, so
+    under heavy contention an increment can be lost; fine for telemetry.
+    """
+
+    kind = "counter"
+
+    def __init__(self, name, help_text, labels):
+        self.name = name
+        self.help = help_text
+        self.labels = labels
+        self.value = 0
+
+    def inc(self, amount=1):
+        self.value += amount
+
+    def snapshot(self):
+        return self.value
+
+
+class Histogram:
+    """
+    Fixed-bucket histogram: observe() is one bisect over the bucket bounds and
+    three additions, nothing is stored per sample.
+    """
+
+    kind = "histogram"
+
+    def __init__(self, name, help_text, labels, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labels = labels
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # The last one is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def time(self):
+        """
+        Context manager observing the duration of its block.
+        """
+        return _Timer(self)
+
+    def quantile(self, q):
+        """
+        Upper bound of the bucket holding the q-quantile; None without samples
+        or when it falls past the last bucket.
+        """
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return None
+
+    def snapshot(self):
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 6),
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+        }
+
+
+class _Timer:
+    def __init__(self, histogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start)
+        return False
+
+
+class MetricsRegistry:
+    """
+    Named counters and histograms shared by the whole gate process.
+
+    Metrics are created once (usually at import time) and then only updated,
+    so the hot path never touches the registry itself.
+
+    Usage:
+        frames = registry.counter("frames_processed_total", "Frames run through detection")
+        frames.inc()
+        registry.histogram("inference_seconds", "...", gate="garage").observe(0.031)
+        print(registry.render())
+    """
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def counter(self, name, help_text="", **labels):
+        return self._get(Counter, name, help_text, labels)
+
+    def histogram(self, name, help_text="", buckets=LATENCY_BUCKETS, **labels):
+        return self._get(Histogram, name, help_text, labels, buckets)
+
+    def render(self):
+        """
+        Prometheus text exposition of every metric.
+        """
+        lines = []
+        described = set()
+        for metric in self._sorted():
+            if metric.name not in described:
+                described.add(metric.name)
+                lines.append(f"# HELP {metric.name} {metric.help}")
+                lines.append(f"# TYPE {metric.name} {metric.kind}")
+            if metric.kind == "counter":
+                lines.append(f"{metric.name}{_format_labels(metric.labels)} {metric.value}")
+                continue
+            cumulative = 0
+            for bound, count in zip(metric.buckets + (float("inf"),), metric.counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f"{metric.name}_bucket{_format_labels(metric.labels, le=le)} {cumulative}")
+            lines.append(f"{metric.name}_sum{_format_labels(metric.labels)} {metric.sum}")
+            lines.append(f"{metric.name}_count{_format_labels(metric.labels)} {metric.count}")
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self):
+        """
+        Plain dict of every metric, keyed by name plus labels, for JSON publishing.
+        """
+        return {metric.name + _format_labels(metric.labels): metric.snapshot() for metric in self._sorted()}
+
+    def _get(self, cls, name, help_text, labels, *args):
+        key = (name, tuple(sorted(labels.items())))
+        metric = self._metrics.get(key)
+        if metric is None:
+            with self._lock:
+                metric = self._metrics.get(key)
+                if metric is None:
+                    metric = cls(name, help_text, dict(labels), *args)
+                    self._metrics[key] = metric
+        return metric
+
+    def _sorted(self):
+        with self._lock:
+            return [self._metrics[key] for key in sorted(self._metrics)]
+
+
+def _format_labels(labels, **extra):
+    items = list(labels.items()) + list(extra.items())
+    if not items:
+        return ""
+    return "{" + ",".join(f'{key}="{value}"' for key, value in items) + "}"
+
+
+class MetricsServer:
+    """
+    Serves registry.render() at http://host:port/metrics from a daemon thread.
+
+    Usage:
+        server = MetricsServer(registry, port=9108).start()
+        ...
+        server.stop()
+    """
+
+    def __init__(self, registry, host="127.0.0.1", port=9108):
+        self.registry = registry
+        self.host = host
+        self.port = port
+        self._server = None
+
+    def start(self):
+        registry = self.registry
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?", 1)[0] not in ("/", "/metrics"):
+                    self.send_error(404)
+                    return
+                body = registry.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass  # One line per scrape is just noise on the console
+
+        self._server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, name="metrics-http", daemon=True).start()
+        print(f"Metrics served on http://{self.host}:{self.port}/metrics")
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+
+
+class MetricsPublisher:
+    """
+    Publishes registry.snapshot() as JSON to an MQTT topic every `interval` seconds,
+    through the MqttPublisher queue (QoS 0). A snapshot that waits longer than one
+    interval for the broker is discarded: the next one supersedes it.
+    """
+
+    def __init__(self, registry, publisher, topic="garage/metrics", interval=30.0):
+        self.registry = registry
+        self.publisher = publisher
+        self.topic = topic
+        self.interval = interval
+        self._stop = threading.Event()
+
+    def start(self):
+        threading.Thread(target=self._run, name="metrics-mqtt", daemon=True).start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            payload = json.dumps({"timestamp": time.time(), "metrics": self.registry.snapshot()})
+            self.publisher.publish(self.topic, payload, qos=0, ttl=self.interval)
+
+
+# Process-wide registry and the gate's standard metrics
+registry = MetricsRegistry()
+
+TRIGGERS_RECEIVED = registry.counter("triggers_received_total", "Approach triggers received from the distance sensor")
+TRIGGERS_COALESCED = registry.counter("triggers_coalesced_total", "Triggers merged into a task already pending or running")
+TRIGGERS_CACHED = registry.counter("triggers_cached_total", "Triggers answered with the cached decision for a vehicle still present")
+TASKS_RUN = registry.counter("tasks_run_total", "Detection tasks run")
+FRAMES_PROCESSED = registry.counter("frames_processed_total", "Frames handed to the detection loops")
+INFERENCES_SKIPPED = registry.counter("inferences_skipped_total", "Frames that reused the previous detections")
+INFERENCE_LATENCY = registry.histogram("inference_seconds", "Detector forward pass per frame or batch")
+OCR_LATENCY = registry.histogram("ocr_seconds", "EasyOCR recognition per plate crop")
+TRIGGER_TO_OPEN = registry.histogram("trigger_to_open_seconds", "Time from trigger to the broker accepting the open command")
+PLATES_ACCEPTED = registry.counter("plates_accepted_total", "Detection tasks that produced a plate")
+PLATES_REJECTED = registry.counter("plates_rejected_total", "Detection tasks that ended without a valid plate")
+PLATES_UNAUTHORIZED = registry.counter("plates_unauthorized_total", "Plates read that are not in the authorized list")
+CAMERA_READ_FAILURES = registry.counter("camera_read_failures_total", "Failed camera reads")
+
+
+GateMetrics = namedtuple("GateMetrics", ["trigger_to_start", "detection", "trigger_to_open", "tasks", "preempted"])
+
+
+def gate_metrics(gate):
+    """
+    The per-gate series, labelled gate="<id>", next to the process-wide totals above.
+    """
+    return GateMetrics(
+        registry.histogram("gate_trigger_to_start_seconds", "Time from trigger to detection starting, per gate", gate=gate),
+        registry.histogram("gate_detection_seconds", "Detection run until a plate was decided, per gate", gate=gate),
+        registry.histogram("gate_trigger_to_open_seconds", "Time from trigger to the broker accepting the open command, per gate", gate=gate),
+        registry.counter("gate_tasks_total", "Detection tasks run, per gate", gate=gate),
+        registry.counter("gate_tasks_preempted_total", "Detection runs cut short to serve another gate, per gate", gate=gate),
+    )
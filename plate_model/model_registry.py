@@ -0,0 +1,155 @@
+import time
+import numpy as np
+import plate_model.darknet as darknet
+from plate_model.image_pool import BatchImage
+from plate_model.detector_backend import load_backend
+
+
+class LoadedNetwork:
+    """
+    A detection network kept in memory, behind its detector backend, together
+    with everything the detection loops need alongside it.
+    """
+
+    def __init__(self, name, detector, class_names, class_colors, batch_size=1):
+        self.name = name
+        self.detector = detector
+        self.network = detector.network
+        self.class_names = class_names
+        self.class_colors = class_colors
+        self.width = detector.width
+        self.height = detector.height
+        self.batch_size = batch_size
+        # A network loaded with batch_size > 1 expects a full batch on every forward pass,
+        # so it is only ever driven through detect_batch()
+        # Three slots let one frame be uploaded while another waits and a third is in the network
+        self.image_pool = detector.make_pool(size=3) if batch_size == 1 else None
+        self.batch_image = BatchImage(self.width, self.height, batch_size) if batch_size > 1 else None
+
+    def detect_batch(self, frames, thresh=.5):
+        """
+        Pack the frames into one batched forward pass and return one Detections per frame.
+        """
+        count = self.batch_image.upload(frames)
+        return darknet.detect_batch(
+            self.network, len(self.class_names), self.batch_image.image, count, self.width, self.height, thresh=thresh
+        )
+
+
+class ModelRegistry:
+    """
+    Loads the detection networks and the EasyOCR reader once at process start,
+    warms them up with a dummy inference and hands the resident handles to
+    every task.
+
+    Usage:
+        registry = ModelRegistry(gpu_index=0)
+        registry.load_network("fullplate", get_fullplate_config())
+        registry.load_reader()
+        registry.report()
+        handle = registry.network("fullplate")
+    """
+
+    def __init__(self, gpu_index=0):
+        self.gpu_index = gpu_index
+        self.networks = {}
+        self.reader = None
+        self.timings = {}
+        self._gpu_set = False
+
+    def load_network(self, name, config):
+        """
+        Load a network described by a task config and warm it up.
+
+        Args:
+            name: Key used to fetch the network later on (e.g. "fullplate").
+            config: Task config with "config_file", "weights" and "names_file", and optionally
+                "backend" ("darknet" or "opencv") and "threads" for the OpenCV DNN backend.
+
+        Returns:
+            The LoadedNetwork handle.
+        """
+        if name in self.networks:
+            return self.networks[name]
+
+        uses_darknet = config.get("backend", "darknet") == "darknet" and darknet.has_darknet
+        if uses_darknet and not self._gpu_set:
+            darknet.set_gpu(config.get("gpu_index", self.gpu_index))
+            self._gpu_set = True
+
+        batch_size = config.get("batch_size", 1)
+        if batch_size > 1 and not (uses_darknet and darknet.has_batch_support):
+            print(f"Backend has no batch API, loading '{name}' with batch size 1")
+            batch_size = 1
+
+        start = time.perf_counter()
+        with open(config["names_file"]) as names:
+            class_names = names.read().splitlines()
+        detector = load_backend(config, len(class_names), batch_size)
+        handle = LoadedNetwork(name, detector, class_names, darknet.class_colors(class_names), batch_size)
+        self._warm_network(handle)
+        cold_start = time.perf_counter() - start
+
+        # A second pass over the warm network is what every trigger pays from now on
+        start = time.perf_counter()
+        self._warm_network(handle)
+        warm_start = time.perf_counter() - start
+
+        self.timings[name] = {"cold_start": cold_start, "warm_start": warm_start, "backend": detector.name}
+        self.networks[name] = handle
+        return handle
+
+    def load_reader(self, languages=("en",)):
+        """
+        Create the EasyOCR reader once and run a dummy recognition through it.
+        """
+        if self.reader is not None:
+            return self.reader
+
+        import easyocr
+
+        start = time.perf_counter()
+        self.reader = easyocr.Reader(list(languages))
+        self._warm_reader()
+        cold_start = time.perf_counter() - start
+
+        start = time.perf_counter()
+        self._warm_reader()
+        warm_start = time.perf_counter() - start
+
+        self.timings["easyocr"] = {"cold_start": cold_start, "warm_start": warm_start}
+        return self.reader
+
+    def network(self, name):
+        if name not in self.networks:
+            raise KeyError(f"Network '{name}' was not loaded at startup")
+        return self.networks[name]
+
+    def report(self):
+        """
+        Print cold-start and warm-start latency for every resident model.
+        """
+        print("Model warm-up:")
+        for name, timing in self.timings.items():
+            cold_ms = timing["cold_start"] * 1000
+            warm_ms = timing["warm_start"] * 1000
+            backend = f" [{timing['backend']}]" if "backend" in timing else ""
+            print(f"  {name}{backend}: cold start {cold_ms:.1f} ms, warm start {warm_ms:.1f} ms")
+
+    def _warm_network(self, handle):
+        # A black frame is enough to exercise every layer and the pooled upload path
+        blank = np.zeros((handle.height, handle.width, 3), dtype=np.uint8)
+        if handle.batch_image is not None:
+            handle.detect_batch([blank] * handle.batch_size)
+            return
+        slot = handle.image_pool.acquire()
+        try:
+            image = handle.image_pool.upload(slot, blank)
+            handle.detector.detect(image)
+        finally:
+            handle.image_pool.release(slot)
+
+    def _warm_reader(self):
+        # Plates are read through the recognizer alone (see ocr_reader.read_crop), so warm that path
+        blank = np.zeros((64, 256), dtype=np.uint8)
+        self.reader.recognize(blank, horizontal_list=[[0, 256, 0, 64]], free_list=[])
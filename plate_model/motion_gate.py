@@ -0,0 +1,68 @@
+import cv2
+import numpy as np
+
+
+class ChangeDetector:
+    """
+    Cheap scene-change check run before inference.
+
+    Each frame is shrunk to a small grayscale thumbnail and compared with the
+    thumbnail of the last frame that went through the network. While the mean
+    absolute difference stays under `threshold` (in 0-255 gray levels) the
+    caller can reuse the previous detections. Every `max_skips` consecutive
+    skips one inference is forced anyway, so slow changes are never missed.
+
+    Reused detections are not voted on, so skipping while a plate is in view
+    would only delay its decision. The caller reports after every inference
+    whether it found anything (see hold()); until an inference comes back empty
+    every frame goes to the network. Only a scene with nothing in it, e.g. the
+    driveway before the car reaches the camera after a WARMUP, is skipped.
+
+    Usage:
+        gate = ChangeDetector()
+        if gate.changed(frame):
+            detections = detect(frame)
+            gate.hold(len(detections.class_ids) > 0)
+        gate.report()
+    """
+
+    def __init__(self, size=(64, 36), threshold=3.0, max_skips=5):
+        self.size = size
+        self.threshold = threshold
+        self.max_skips = max_skips
+        self.holding = False
+        self.reference = None
+        self.consecutive_skips = 0
+        self.checked = 0
+        self.skipped = 0
+        self._gray = np.empty((size[1], size[0]), dtype=np.uint8)
+
+    def changed(self, frame):
+        """
+        Return True if the frame needs inference; it then becomes the new reference.
+        """
+        self.checked += 1
+        # Downsample first so the colour conversion only touches a few thousand pixels
+        small = cv2.resize(frame, self.size, interpolation=cv2.INTER_AREA)
+        cv2.cvtColor(small, cv2.COLOR_BGR2GRAY, dst=self._gray)
+
+        if self.reference is not None and not self.holding and self.consecutive_skips < self.max_skips:
+            difference = cv2.absdiff(self._gray, self.reference).mean()
+            if difference < self.threshold:
+                self.consecutive_skips += 1
+                self.skipped += 1
+                return False
+
+        self.reference = self._gray.copy()
+        self.consecutive_skips = 0
+        return True
+
+    def hold(self, found):
+        """
+        Report whether the last inference found anything; while it did, changed() is always True.
+        """
+        self.holding = found
+
+    def report(self):
+        ran = self.checked - self.skipped
+        print(f"Change gate: {self.skipped} of {self.checked} inferences skipped ({ran} run)")
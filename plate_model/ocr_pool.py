@@ -0,0 +1,103 @@
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from plate_model.ocr_reader import PLATE_ALLOWLIST, RECOGNIZER_HEIGHT, read_crops
+
+_reader = None  # One EasyOCR reader per worker process
+
+
+def _init_worker(languages, threads):
+    global _reader
+    import torch
+    import easyocr
+
+    # Several workers share the cores; without this every one of them would start a thread per core
+    torch.set_num_threads(threads)
+    _reader = easyocr.Reader(list(languages), gpu=False)
+    # Pay PyTorch's first-inference cost here rather than on the first plate, through the batched path
+    read_crops(_reader, [np.zeros((RECOGNIZER_HEIGHT, 4 * RECOGNIZER_HEIGHT, 3), dtype=np.uint8)])
+
+
+def _ping(delay):
+    # Busy long enough that a worker which is already up cannot answer a whole round alone
+    time.sleep(delay)
+    return os.getpid()
+
+
+def _read_crops(crops, allowlist, height):
+    return read_crops(_reader, crops, allowlist=allowlist, height=height)
+
+
+class OCRWorkerPool:
+    """
+    EasyOCR readers in separate processes, so PyTorch's CPU work never holds the
+    gate process' GIL: the MQTT loop, the camera thread and detection of the
+    next vehicle keep running while a plate is being read.
+
+    Each worker loads its reader once and warms it with a blank crop. Crops are sent to the workers through the
+    executor's pipe (a few plate crops are tens of kilobytes), and every request
+    is a concurrent.futures.Future.
+
+    Usage:
+        pool = OCRWorkerPool(workers=2).start()
+        future = pool.submit(crops)
+        ocr_results = future.result(timeout=5.0)  # one readtext-style list per crop
+        pool.close()
+    """
+
+    def __init__(self, workers=2, languages=("en",), threads_per_worker=1):
+        self.workers = workers
+        self.languages = tuple(languages)
+        self.threads_per_worker = threads_per_worker
+        self.startup_time = None
+        self._executor = None
+
+    def start(self, timeout=300.0):
+        """
+        Start the workers and wait until every one of them has loaded and warmed
+        its reader, i.e. answered a ping from its own pid, for up to `timeout` seconds.
+        """
+        start = time.perf_counter()
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            # Forking a process that already runs threads (MQTT, camera) and CUDA is unsafe
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(self.languages, self.threads_per_worker),
+        )
+        pids = set()
+        while len(pids) < self.workers and time.perf_counter() - start < timeout:
+            # The first ready worker may answer a whole round; ping again until every pid answered
+            pids.update(future.result() for future in [self._executor.submit(_ping, 0.05) for _ in range(self.workers)])
+        self.startup_time = time.perf_counter() - start
+        if len(pids) < self.workers:
+            print(f"WARNING: only {len(pids)} of {self.workers} OCR worker(s) ready after {timeout:.0f} s")
+        print(f"OCR pool: {len(pids)} worker(s) ready in {self.startup_time:.1f} s")
+        return self
+
+    def submit(self, crops, allowlist=PLATE_ALLOWLIST, height=RECOGNIZER_HEIGHT):
+        """
+        Queue the crops of one plate for a batched read (see ocr_reader.read_crops).
+
+        Returns:
+            Future resolving to one [(box, text, confidence), ...] list per crop.
+        """
+        return self._executor.submit(_read_crops, list(crops), allowlist, height)
+
+    def read(self, crops, timeout=None, allowlist=PLATE_ALLOWLIST, height=RECOGNIZER_HEIGHT):
+        """
+        Blocking submit(); raises concurrent.futures.TimeoutError after `timeout` seconds.
+        """
+        future = self.submit(crops, allowlist, height)
+        try:
+            return future.result(timeout=timeout)
+        except Exception:
+            future.cancel()
+            raise
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
@@ -0,0 +1,68 @@
+import cv2
+import numpy as np
+
+PLATE_ALLOWLIST = 'ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789'
+RECOGNIZER_HEIGHT = 64  # Input height of EasyOCR's recognition network
+
+
+def prepare_crop(crop, grayscale=True, height=RECOGNIZER_HEIGHT):
+    """
+    Get a BGR plate crop ready for EasyOCR's recognizer: grayscale (what it
+    converts to anyway) and scaled to its input height, keeping the aspect ratio.
+    height=None keeps the crop's size.
+    """
+    image = cv2.cvtColor(crop, cv2.COLOR_BGR2GRAY) if grayscale and crop.ndim == 3 else crop
+    if height and image.shape[0] != height:
+        width = max(1, round(image.shape[1] * height / image.shape[0]))
+        interpolation = cv2.INTER_AREA if image.shape[0] > height else cv2.INTER_CUBIC
+        image = cv2.resize(image, (width, height), interpolation=interpolation)
+    return image
+
+
+def read_crop(reader, crop, allowlist=PLATE_ALLOWLIST, grayscale=True, height=RECOGNIZER_HEIGHT):
+    """
+    Read the text of a plate crop held in memory.
+
+    The crop already is the plate box, so EasyOCR's text detection stage is
+    skipped: a grayscale crop goes straight to the recognizer as one full-image
+    box. A colour crop with grayscale=False falls back to readtext (with detection).
+
+    Returns:
+        The same [(box, text, confidence), ...] list as reader.readtext.
+    """
+    image = prepare_crop(crop, grayscale, height)
+    if image.ndim == 2:
+        box_h, box_w = image.shape
+        return reader.recognize(image, horizontal_list=[[0, box_w, 0, box_h]], free_list=[], allowlist=allowlist)
+    return reader.readtext(image, allowlist=allowlist)
+
+
+def read_crops(reader, crops, allowlist=PLATE_ALLOWLIST, height=RECOGNIZER_HEIGHT):
+    """
+    Read several crops of the same plate in one recognizer call.
+
+    The grayscale crops, all scaled to `height`, are stacked into one canvas
+    with one text box each, so EasyOCR runs them through the recognizer as a
+    single batch instead of one call per crop.
+
+    Returns:
+        One [(box, text, confidence), ...] list per crop, in the order given.
+    """
+    if not crops:
+        return []
+    # Every row of the canvas needs the same height
+    images = [prepare_crop(crop, True, height or RECOGNIZER_HEIGHT) for crop in crops]
+    row_h = images[0].shape[0]
+    canvas = np.zeros((row_h * len(images), max(image.shape[1] for image in images)), dtype=np.uint8)
+    boxes = []
+    for k, image in enumerate(images):
+        canvas[k * row_h:(k + 1) * row_h, :image.shape[1]] = image
+        boxes.append([0, image.shape[1], k * row_h, (k + 1) * row_h])
+
+    results = [[] for _ in images]
+    for entry in reader.recognize(canvas, horizontal_list=boxes, free_list=[], allowlist=allowlist,
+                                  batch_size=len(images)):
+        # Boxes come back as corner points in canvas coordinates; the row tells which crop it was
+        top = min(point[1] for point in entry[0])
+        results[min(int(top) // row_h, len(images) - 1)].append(entry)
+    return results
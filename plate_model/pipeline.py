@@ -0,0 +1,260 @@
+import queue
+import threading
+import time
+from plate_model.metrics import FRAMES_PROCESSED, INFERENCES_SKIPPED, INFERENCE_LATENCY
+
+_DONE = object()  # End-of-stream marker passed down the stages
+
+
+def serial_detections(cap, detector, class_names, image_pool, thresh, detect_batch=None, batch_size=1, detect_frame=None,
+                      change_detector=None):
+    """
+    Read, preprocess and detect one frame (or one batch of frames) at a time.
+
+    Args:
+        cap: cv2.VideoCapture-like source.
+        detector: Detector backend (see detector_backend) running the network.
+        class_names: List of class names.
+        image_pool: The detector's pool (ImagePool or BlobPool) used for single-frame inference.
+        thresh: Detection confidence threshold.
+        detect_batch: Optional callable taking a list of frames and returning one Detections each.
+        batch_size: Number of frames handed to detect_batch at once.
+        detect_frame: Optional callable taking (frame, thresh) and returning Detections,
+            e.g. CascadeDetector.detect, used instead of the pooled full-frame path.
+        change_detector: Optional ChangeDetector; when the scene has not changed the previous
+            frame's detections are yielded again, marked reused=True, instead of running the
+            network (single-frame only). Callers should not count them as new evidence; the
+            gate is held open while the last inference found anything (see ChangeDetector.hold).
+
+    Yields:
+        (frame, Detections) for every frame read.
+    """
+    if detect_batch is not None:
+        change_detector = None
+    last_results = None
+    while cap.isOpened():
+        frames = []
+        while len(frames) < batch_size:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            frames.append(frame)
+        if not frames:
+            return
+
+        FRAMES_PROCESSED.inc(len(frames))
+        start = time.perf_counter()
+        if change_detector is not None and not change_detector.changed(frames[0]) and last_results is not None:
+            results = [detections._replace(reused=True) for detections in last_results]
+            INFERENCES_SKIPPED.inc()
+        else:
+            if detect_batch is not None:
+                results = detect_batch(frames, thresh=thresh)
+            elif detect_frame is not None:
+                results = [detect_frame(frames[0], thresh)]
+            else:
+                slot = image_pool.acquire()
+                try:
+                    image = image_pool.upload(slot, frames[0])
+                    results = [detector.detect(image, thresh=thresh)]
+                finally:
+                    image_pool.release(slot)
+            INFERENCE_LATENCY.observe(time.perf_counter() - start)
+            last_results = results
+            if change_detector is not None:
+                change_detector.hold(any(len(detections.class_ids) > 0 for detections in results))
+        yield from zip(frames, results)
+
+
+class StageStats:
+    """
+    Busy time and throughput of one pipeline stage.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.busy = 0.0
+        self.items = 0
+        self.max_queue = 0
+
+    def add(self, seconds):
+        self.busy += seconds
+        self.items += 1
+
+
+class DetectionPipeline:
+    """
+    Runs capture, preprocess and inference in their own threads with bounded
+    queues between them, so frame N+1 is read and uploaded while frame N is in
+    the network. darknet and OpenCV release the GIL, so the stages really overlap.
+    The caller's loop is the postprocess stage.
+
+    When inference falls behind, the capture stage drops frames according to
+    drop_policy: "oldest" discards the queued frame in favour of the new one
+    (always work on the freshest frame), "newest" discards the new frame.
+
+    With a change_detector, frames the preprocess stage finds unchanged skip
+    the network and reuse the previous detections, marked reused=True, unless
+    the last inference found something (the infer stage holds the gate open).
+
+    Usage:
+        pipeline = DetectionPipeline(cap, detector, class_names, image_pool, thresh)
+        try:
+            for frame, detections in pipeline:
+                ...
+        finally:
+            pipeline.close()
+            pipeline.report()
+    """
+
+    def __init__(self, cap, detector, class_names, image_pool, thresh, queue_size=2, drop_policy="oldest",
+                 change_detector=None):
+        self.cap = cap
+        self.detector = detector
+        self.class_names = class_names
+        self.image_pool = image_pool
+        self.thresh = thresh
+        self.drop_policy = drop_policy
+        self.change_detector = change_detector
+        self.frames = queue.Queue(maxsize=queue_size)    # capture -> preprocess
+        self.prepared = queue.Queue(maxsize=queue_size)  # preprocess -> infer
+        self.results = queue.Queue(maxsize=queue_size)   # infer -> postprocess
+        self.stats = {name: StageStats(name) for name in ("capture", "preprocess", "infer", "postprocess")}
+        self.dropped = 0
+        self.started_at = None
+        self._stop = threading.Event()
+        self._threads = []
+
+    def __iter__(self):
+        self.start()
+        while True:
+            item = self._get(self.results, self.stats["postprocess"])
+            if item is None or item is _DONE:
+                return
+            handed_out = time.perf_counter()
+            yield item
+            self.stats["postprocess"].add(time.perf_counter() - handed_out)
+
+    def start(self):
+        if self._threads:
+            return
+        self.started_at = time.perf_counter()
+        for name, target in (("capture", self._capture), ("preprocess", self._preprocess), ("infer", self._infer)):
+            thread = threading.Thread(target=target, name=f"pipeline-{name}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def close(self):
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout=2.0)
+        # Give back the pool slots still sitting in the queue
+        while not self.prepared.empty():
+            item = self.prepared.get_nowait()
+            if item is not _DONE and item[1] is not None:
+                self.image_pool.release(item[1])
+
+    def occupancy(self):
+        """
+        Fraction of wall time each stage spent working, plus drops and peak queue depths.
+        """
+        elapsed = max(time.perf_counter() - (self.started_at or time.perf_counter()), 1e-9)
+        report = {
+            name: {"occupancy": stats.busy / elapsed, "items": stats.items, "max_queue": stats.max_queue}
+            for name, stats in self.stats.items()
+        }
+        report["dropped"] = self.dropped
+        return report
+
+    def report(self):
+        occupancy = self.occupancy()
+        print(f"Pipeline: {occupancy.pop('dropped')} frames dropped")
+        for name, stage in occupancy.items():
+            print(f"  {name}: {stage['occupancy'] * 100:.0f}% busy, {stage['items']} frames, max queue {stage['max_queue']}")
+
+    def _capture(self):
+        stats = self.stats["capture"]
+        while not self._stop.is_set() and self.cap.isOpened():
+            start = time.perf_counter()
+            ret, frame = self.cap.read()
+            if not ret:
+                break
+            stats.add(time.perf_counter() - start)
+            try:
+                self.frames.put_nowait(frame)
+            except queue.Full:
+                self.dropped += 1
+                if self.drop_policy == "oldest":
+                    try:
+                        self.frames.get_nowait()
+                    except queue.Empty:
+                        pass
+                    self._put(self.frames, frame)
+        self._put(self.frames, _DONE)
+
+    def _preprocess(self):
+        stats = self.stats["preprocess"]
+        while True:
+            frame = self._get(self.frames, stats)
+            if frame is None or frame is _DONE:
+                break
+            # The first frame always counts as changed, so the infer stage has detections to reuse
+            if self.change_detector is not None and not self.change_detector.changed(frame):
+                # Unchanged scene: let the infer stage reuse its last detections
+                if not self._put(self.prepared, (frame, None)):
+                    return
+                continue
+            slot = self.image_pool.acquire()
+            start = time.perf_counter()
+            self.image_pool.upload(slot, frame)
+            stats.add(time.perf_counter() - start)
+            if not self._put(self.prepared, (frame, slot)):
+                self.image_pool.release(slot)
+                return
+        self._put(self.prepared, _DONE)
+
+    def _infer(self):
+        stats = self.stats["infer"]
+        detections = None
+        while True:
+            item = self._get(self.prepared, stats)
+            if item is None or item is _DONE:
+                break
+            frame, slot = item
+            FRAMES_PROCESSED.inc()
+            if slot is None:
+                INFERENCES_SKIPPED.inc()
+                self._put(self.results, (frame, detections._replace(reused=True)))
+                continue
+            start = time.perf_counter()
+            try:
+                detections = self.detector.detect(slot.image, thresh=self.thresh)
+            finally:
+                self.image_pool.release(slot)
+            elapsed = time.perf_counter() - start
+            stats.add(elapsed)
+            INFERENCE_LATENCY.observe(elapsed)
+            if self.change_detector is not None:
+                # Read by the preprocess stage from the next frame on
+                self.change_detector.hold(len(detections.class_ids) > 0)
+            if not self._put(self.results, (frame, detections)):
+                return
+        self._put(self.results, _DONE)
+
+    def _put(self, q, item):
+        while not self._stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _get(self, q, stats):
+        stats.max_queue = max(stats.max_queue, q.qsize())
+        while not self._stop.is_set():
+            try:
+                return q.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        return None
@@ -0,0 +1,149 @@
+from collections import defaultdict, namedtuple
+
+LETTER = "L"
+DIGIT = "N"
+
+# Brazilian plate grammars: Mercosul ABC1D23 and the old ABC1234
+GRAMMARS = {
+    "mercosul": "LLLNLNN",
+    "antiga": "LLLNNNN",
+}
+
+# Class names of both detection models mapped to their grammar
+PLATE_TYPES = {
+    "mercosul": "mercosul",
+    "plate_mercosul": "mercosul",
+    "antiga": "antiga",
+    "plate_antigo": "antiga",
+}
+
+# Digit/letter pairs OCR and the character detector mix up, both ways
+CONFUSIONS = (("0", "O"), ("1", "I"), ("2", "Z"), ("5", "S"), ("6", "G"), ("8", "B"))
+
+# How a slot's score is normalised (see PlateDecoder)
+READINGS = "readings"
+SHARE = "share"
+
+# Lowest SHARE plate score a temporal consensus accepts without the per-slot margin
+MIN_PLATE_SCORE = 0.85
+
+# text: decoded plate, grammar: its GRAMMARS key, score: geometric mean of the slot
+# scores (0-1), probability: their product, slot_scores: per-character scores (0-1)
+PlateReading = namedtuple("PlateReading", ["text", "grammar", "score", "probability", "slot_scores"])
+
+
+def fits(char, kind):
+    return char.isalpha() if kind == LETTER else char.isdigit()
+
+
+class PlateDecoder:
+    """
+    Finds the most likely valid plate from per-character candidates.
+
+    Every slot holds (character, confidence) candidates, from the character
+    detector or from OCR readings. A candidate that does not fit the slot's
+    letter/digit position can still vote for its confusable counterpart (8->B,
+    5->S, ...), but only at confusion_weight of its confidence: a slot filled by
+    substitution never scores as high as one read right.
+
+    A slot's score is the winning character's votes normalised one of two ways:
+
+    - READINGS: divided by the number of candidates, i.e. the winner's mean
+      confidence with disagreeing candidates counting as 0. One reading at 0.9
+      per character scores 0.9; use it for independent readings (OCR crops).
+    - SHARE: divided by the slot's summed confidence, i.e. the winner's share
+      of the vote, which says how much the frames agree but not how confident
+      each was. Use it only for a temporal consensus over several frames.
+
+    The plate score is the geometric mean of its slot scores.
+
+    Usage:
+        decoder = PlateDecoder()
+        reading = decoder.decode([[("A", 0.9)], [("8", 0.8)], ...], "mercosul")
+        if reading is not None and reading.score >= MIN_PLATE_SCORE: ...
+    """
+
+    def __init__(self, confusion_weight=0.7, confusions=CONFUSIONS):
+        self.confusion_weight = confusion_weight
+        self.confusions = {}
+        for a, b in confusions:
+            self.confusions[a] = b
+            self.confusions[b] = a
+
+    def decode(self, slots, plate_type=None, normalize=READINGS):
+        """
+        Args:
+            slots: One list of (character, confidence 0-1) candidates per plate position.
+            plate_type: Plate class name from either model, or None to try every grammar.
+            normalize: READINGS or SHARE, see the class docstring.
+
+        Returns:
+            The best PlateReading, or None if no grammar can be satisfied.
+        """
+        if plate_type in PLATE_TYPES:
+            grammars = [PLATE_TYPES[plate_type]]
+        else:
+            grammars = list(GRAMMARS)
+
+        best = None
+        for grammar in grammars:
+            reading = self._decode_grammar(slots, grammar, normalize)
+            if reading is not None and (best is None or reading.score > best.score):
+                best = reading
+        return best
+
+    def _decode_grammar(self, slots, grammar, normalize):
+        pattern = GRAMMARS[grammar]
+        if slots is None or len(slots) != len(pattern):
+            return None
+
+        text = ""
+        slot_scores = []
+        for candidates, kind in zip(slots, pattern):
+            # The slots are independent given the grammar, so the best plate is the best character per slot
+            scores = defaultdict(float)
+            total = 0.0
+            for char, confidence in candidates:
+                char = char.upper()
+                total += confidence
+                if fits(char, kind):
+                    scores[char] += confidence
+                elif char in self.confusions and fits(self.confusions[char], kind):
+                    scores[self.confusions[char]] += confidence * self.confusion_weight
+            if not scores:
+                return None
+            char, score = max(scores.items(), key=lambda item: item[1])
+            text += char
+            slot_scores.append(score / total if normalize == SHARE else score / len(candidates))
+
+        probability = 1.0
+        for score in slot_scores:
+            probability *= score
+        return PlateReading(text, grammar, probability ** (1 / len(slot_scores)), probability, slot_scores)
+
+
+def candidates_from_text(text, confidence):
+    """
+    Turn one OCR reading into per-slot candidates, every character at the reading's confidence.
+    """
+    return [[(char, confidence)] for char in text]
+
+
+def merge_candidates(readings):
+    """
+    Pool the per-slot candidates of several readings of the same plate.
+    """
+    merged = []
+    for slots in readings:
+        for position, candidates in enumerate(slots):
+            if position == len(merged):
+                merged.append([])
+            merged[position].extend(candidates)
+    return merged
+
+
+default_decoder = PlateDecoder()
+
+
+def decode_plate(slots, plate_type=None, normalize=READINGS):
+    return default_decoder.decode(slots, plate_type, normalize)
@@ -0,0 +1,113 @@
+import numpy as np
+import plate_model.darknet as darknet
+
+
+def box_iou(a, b):
+    """
+    Intersection over union of two (center x, center y, w, h) boxes.
+    """
+    ax1, ay1, ax2, ay2 = a[0] - a[2] / 2, a[1] - a[3] / 2, a[0] + a[2] / 2, a[1] + a[3] / 2
+    bx1, by1, bx2, by2 = b[0] - b[2] / 2, b[1] - b[3] / 2, b[0] + b[2] / 2, b[1] + b[3] / 2
+    inter_w = max(0.0, min(ax2, bx2) - max(ax1, bx1))
+    inter_h = max(0.0, min(ay2, by2) - max(ay1, by1))
+    inter = inter_w * inter_h
+    union = a[2] * a[3] + b[2] * b[3] - inter
+    return inter / union if union > 0 else 0.0
+
+
+class CascadeDetector:
+    """
+    Two-stage detection for the FullPlates model.
+
+    Full frames are scanned until the plate box is stable (IoU >= min_iou over
+    `stable_frames` scans). From then on only a region around the tracked plate
+    is cropped, with the network's aspect ratio, and resized up to the network
+    input, so small characters keep their pixels. The full frame is re-scanned
+    every `rescan_interval` frames, or as soon as the plate is lost in the crop.
+
+    detect() returns Detections in the same coordinates as a full-frame
+    detector.detect call, so the caller does not need to know which stage ran.
+    """
+
+    def __init__(self, detector, class_names, image_pool, width, height, plate_classes,
+                 stable_frames=2, rescan_interval=10, padding=0.3, min_iou=0.5, max_zoom=4.0):
+        self.detector = detector
+        self.class_names = class_names
+        self.image_pool = image_pool
+        self.width = width
+        self.height = height
+        self.plate_ids = [class_names.index(name) for name in plate_classes if name in class_names]
+        self.stable_frames = stable_frames
+        self.rescan_interval = rescan_interval
+        self.padding = padding
+        self.min_iou = min_iou
+        self.max_zoom = max_zoom
+        self.track = None  # Plate box in frame pixels
+        self.stable_count = 0
+        self.frames_since_scan = 0
+        self.full_scans = 0
+        self.roi_scans = 0
+
+    def detect(self, frame, thresh=.5):
+        frame_h, frame_w = frame.shape[:2]
+        to_frame = np.array([frame_w / self.width, frame_h / self.height] * 2, dtype=np.float32)
+        roi = None
+        if self.stable_count >= self.stable_frames and self.frames_since_scan < self.rescan_interval:
+            roi = self._roi(frame_w, frame_h)
+
+        if roi is None:
+            detections = self._run(frame, thresh)
+            self.full_scans += 1
+            self.frames_since_scan = 0
+        else:
+            x1, y1, x2, y2 = roi
+            crop_detections = self._run(frame[y1:y2, x1:x2], thresh)
+            # Crop network coordinates -> frame pixels -> full-frame network coordinates
+            crop_scale = np.array([(x2 - x1) / self.width, (y2 - y1) / self.height] * 2, dtype=np.float32)
+            offset = np.array([x1, y1, 0, 0], dtype=np.float32)
+            frame_boxes = crop_detections.boxes * crop_scale + offset
+            detections = darknet.Detections(crop_detections.class_ids, crop_detections.confidences, frame_boxes / to_frame)
+            self.roi_scans += 1
+            self.frames_since_scan += 1
+
+        self._update_track(detections, to_frame, from_roi=roi is not None)
+        return detections
+
+    def report(self):
+        total = self.full_scans + self.roi_scans
+        print(f"Cascade: {self.full_scans} full-frame scans, {self.roi_scans} plate crops out of {total} frames")
+
+    def _run(self, image, thresh):
+        slot = self.image_pool.acquire()
+        try:
+            darknet_image = self.image_pool.upload(slot, image)
+            return self.detector.detect(darknet_image, thresh=thresh)
+        finally:
+            self.image_pool.release(slot)
+
+    def _update_track(self, detections, to_frame, from_roi):
+        is_plate = np.isin(detections.class_ids, self.plate_ids)
+        if not is_plate.any():
+            # Lost the plate: fall back to full-frame scans until it is stable again
+            self.track = None
+            self.stable_count = 0
+            self.frames_since_scan = self.rescan_interval
+            return
+        best = np.flatnonzero(is_plate)[np.argmax(detections.confidences[is_plate])]
+        plate_box = tuple((detections.boxes[best] * to_frame).tolist())
+        if from_roi or (self.track is not None and box_iou(plate_box, self.track) >= self.min_iou):
+            self.stable_count += 1
+        else:
+            self.stable_count = 1
+        self.track = plate_box
+
+    def _roi(self, frame_w, frame_h):
+        px, py, pw, ph = self.track
+        aspect = self.width / self.height
+        roi_w = max(pw * (1 + 2 * self.padding), ph * (1 + 2 * self.padding) * aspect, frame_w / self.max_zoom)
+        roi_w = min(roi_w, frame_w, frame_h * aspect)
+        roi_h = roi_w / aspect
+        # Shift the region back inside the frame instead of shrinking it
+        x1 = int(min(max(px - roi_w / 2, 0), frame_w - roi_w))
+        y1 = int(min(max(py - roi_h / 2, 0), frame_h - roi_h))
+        return x1, y1, x1 + int(roi_w), y1 + int(roi_h)
@@ -3,12 +3,12 @@ import random
 import os
 import cv2
 import time
+import numpy as np
 import plate_model.darknet as darknet
 import argparse
 import sys
 from datetime import datetime
 import re
-import easyocr
 
 def str2int(video_path):
     try:
@@ -36,3 +36,11 @@ def convert2original(image, bbox, darknet_height, darknet_width):
     orig_width = int(w * image_w)
     orig_height = int(h * image_h)
     return (orig_x, orig_y, orig_width, orig_height)
+
+def convert2original_boxes(image, boxes, darknet_height, darknet_width):
+    """
+    Vectorized convert2original for an Nx4 (x, y, w, h) box array in network coordinates.
+    """
+    image_h, image_w = image.shape[:2]
+    scale = np.array([image_w / darknet_width, image_h / darknet_height] * 2, dtype=np.float32)
+    return (boxes * scale).astype(np.int32)
@@ -0,0 +1,103 @@
+import queue
+import threading
+import cv2
+import plate_model.darknet as darknet
+
+
+class DetectionViewer:
+    """
+    Optional consumer of detection results that does everything the headless
+    gate does not need: drawing boxes and the FPS label, the preview window,
+    keyboard handling and writing the output video.
+
+    The detection loops only hand it (frame, detections, fps_label) through a
+    bounded queue and never wait on it; when it falls behind, frames are
+    dropped from the preview instead of slowing down inference.
+
+    Usage:
+        viewer = DetectionViewer(class_colors, show=True, out_filename="out.avi", fps=30)
+        viewer.start()
+        viewer.submit(frame, detections, fps_label)  # from the detection loop
+        if viewer.quit_requested: ...
+        viewer.close()
+    """
+
+    def __init__(self, class_colors, show=True, out_filename=None, fps=30, print_detections=False,
+                 frame_delay=30, max_queue=2):
+        self.class_colors = class_colors
+        self.show = show
+        self.out_filename = out_filename or None
+        self.fps = fps or 30
+        self.print_detections = print_detections
+        self.frame_delay = frame_delay  # Delay in milliseconds for the preview window
+        self.quit_requested = False
+        self.dropped = 0
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._writer = None
+        self._thread = None
+
+    @classmethod
+    def from_config(cls, config, class_colors, cap):
+        """
+        Build a viewer from a task config, or return None for a headless run.
+        """
+        if config.get("dont_show", True) and not config.get("out_filename"):
+            return None
+        return cls(
+            class_colors,
+            show=not config.get("dont_show", True),
+            out_filename=config.get("out_filename"),
+            fps=int(cap.get(cv2.CAP_PROP_FPS)),
+            print_detections=config.get("ext_output", False),
+        ).start()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="detection-viewer", daemon=True)
+        self._thread.start()
+        return self
+
+    def submit(self, frame, detections, fps_label=""):
+        # The loop may keep using the frame (e.g. to crop the plate), so draw on a copy
+        try:
+            self._queue.put_nowait((frame.copy(), detections, fps_label))
+        except queue.Full:
+            self.dropped += 1
+
+    def close(self):
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join(timeout=5.0)
+        if self._writer is not None:
+            self._writer.release()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            frame, detections, fps_label = item
+            image = darknet.draw_boxes(detections, frame, self.class_colors)
+            cv2.putText(image, fps_label, (0, 25), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 0), 5)
+            cv2.putText(image, fps_label, (0, 25), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 3)
+            if self.print_detections:
+                print(fps_label)
+                print("Detections: ", detections)
+
+            if self.out_filename is not None:
+                if self._writer is None:
+                    height, width = image.shape[:2]
+                    fourcc = cv2.VideoWriter_fourcc(*"MJPG")  # Use MJPG codec for video saving
+                    self._writer = cv2.VideoWriter(self.out_filename, fourcc, self.fps, (width, height))
+                self._writer.write(image)
+
+            if self.show:
+                cv2.imshow('Inference', image)
+                key = cv2.waitKey(self.frame_delay) & 0xFF
+                if key == ord('q'):
+                    self.quit_requested = True
+                elif key == 82:
+                    self.frame_delay = max(1, self.frame_delay - 5)
+                elif key == 84:
+                    self.frame_delay += 5
+        if self.show:
+            cv2.destroyAllWindows()
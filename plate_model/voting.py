@@ -0,0 +1,170 @@
+from collections import defaultdict
+
+
+class TemporalVote:
+    """
+    Confidence-weighted vote for one label across frames.
+
+    Every observation adds its confidence (0-1) to its label's score; the
+    leader is trusted once its score beats the runner-up by a margin.
+    """
+
+    def __init__(self):
+        self.scores = defaultdict(float)
+        self.counts = defaultdict(int)
+        self.observations = 0
+
+    def add(self, label, confidence):
+        self.scores[label] += confidence
+        self.counts[label] += 1
+        self.observations += 1
+
+    def leader(self):
+        """
+        Return (label, margin over the runner-up), or (None, 0.0) without observations.
+        """
+        if not self.scores:
+            return None, 0.0
+        ranked = sorted(self.scores.items(), key=lambda item: item[1], reverse=True)
+        runner_up = ranked[1][1] if len(ranked) > 1 else 0.0
+        return ranked[0][0], ranked[0][1] - runner_up
+
+    def mean_confidence(self, label):
+        return self.scores[label] / self.counts[label] if self.counts[label] else 0.0
+
+
+class CharacterSlot:
+    """
+    One character position on the plate, tracked by its plate-relative x.
+    """
+
+    def __init__(self, x):
+        self.x = x
+        self.hits = 0
+        self.vote = TemporalVote()
+
+    def observe(self, x, label, confidence):
+        # Follow slow drift of the position (perspective changes as the car moves)
+        self.x += (x - self.x) * 0.3
+        self.hits += 1
+        self.vote.add(label, confidence)
+
+
+class PlateConsensus:
+    """
+    Temporal consensus over the characters read on a plate.
+
+    Each frame's characters are matched to slots by their x position relative
+    to the plate box, and each slot accumulates confidence-weighted votes. A
+    plate is declared as soon as the `expected_slots` most seen slots each have
+    a leader that beats its runner-up by `margin`, so one flickering character
+    only delays its own slot instead of restarting the count.
+
+    A decision always needs at least two frames (min_frames is raised to 2), so
+    a single confident frame is never a consensus.
+
+    Usage:
+        consensus = PlateConsensus(expected_slots=7, margin=1.5)
+        consensus.update([("A", 0.91, 0.08), ("B", 0.88, 0.21), ...])
+        decision = consensus.decision()  # None or (text, confidences)
+    """
+
+    def __init__(self, expected_slots=7, margin=1.5, min_frames=2, slot_tolerance=None):
+        self.expected_slots = expected_slots
+        self.margin = margin
+        self.min_frames = max(2, min_frames)
+        # Half a character pitch, in plate-relative coordinates
+        self.slot_tolerance = slot_tolerance or 0.5 / expected_slots
+        self.slots = []
+        self.frames = 0
+
+    def update(self, characters):
+        """
+        Add one frame of characters, each as (label, confidence 0-1, plate-relative x).
+        """
+        self.frames += 1
+        used = set()
+        for label, confidence, x in sorted(characters, key=lambda c: c[2]):
+            slot = self._nearest_slot(x, used)
+            if slot is None:
+                slot = CharacterSlot(x)
+                self.slots.append(slot)
+            used.add(id(slot))
+            slot.observe(x, label, confidence)
+
+    def decision(self):
+        """
+        Return (text, confidences in percent) once every slot passed the margin, else None.
+        """
+        slots = self._steady_slots()
+        if self.frames < self.min_frames or slots is None:
+            return None
+
+        text = ""
+        confidences = []
+        for slot in slots:
+            label, margin = slot.vote.leader()
+            if margin < self.margin:
+                return None
+            text += label
+            confidences.append(round(slot.vote.mean_confidence(label) * 100, 2))
+        return text, confidences
+
+    def confidences(self, text, counterparts=None):
+        """
+        Return the mean confidence in percent of each slot's votes for the character
+        `text` (e.g. a decoded plate) has at its position, or None until the slots
+        are known. counterparts maps a character to one that may have been read in
+        its place and counts for it (plate_decoder's letter/digit confusions).
+        """
+        slots = self._steady_slots()
+        if slots is None or len(slots) != len(text):
+            return None
+        counterparts = counterparts or {}
+        confidences = []
+        for slot, char in zip(slots, text.upper()):
+            chars = {char, counterparts.get(char, char)}
+            votes = [(score, slot.vote.counts[label]) for label, score in slot.vote.scores.items() if label.upper() in chars]
+            count = sum(n for _, n in votes)
+            confidences.append(round(sum(score for score, _ in votes) / count * 100, 2) if count else 0.0)
+        return confidences
+
+    def candidates(self):
+        """
+        Return the (label, summed confidence) votes of every slot, left to right,
+        for plate_decoder, or None until expected_slots slots were seen.
+        """
+        slots = self._steady_slots()
+        if slots is None:
+            return None
+        return [list(slot.vote.scores.items()) for slot in slots]
+
+    def reset(self):
+        self.slots = []
+        self.frames = 0
+
+    def _steady_slots(self):
+        if len(self.slots) < self.expected_slots:
+            return None
+        # Spurious detections create slots that are rarely seen; keep the steady ones
+        slots = sorted(self.slots, key=lambda slot: slot.hits, reverse=True)[:self.expected_slots]
+        slots.sort(key=lambda slot: slot.x)
+        return slots
+
+    def _nearest_slot(self, x, used):
+        best = None
+        best_distance = self.slot_tolerance
+        for slot in self.slots:
+            distance = abs(slot.x - x)
+            if id(slot) not in used and distance <= best_distance:
+                best = slot
+                best_distance = distance
+        return best
+
+
+def plate_relative_x(bbox, plate_bbox):
+    """
+    Horizontal position of a (center x, center y, w, h) box inside a plate box, 0 at the left edge and 1 at the right.
+    """
+    px, _, pw, _ = plate_bbox
+    return (bbox[0] - (px - pw / 2)) / pw if pw else 0.0
@@ -0,0 +1,215 @@
+import os
+import re
+import sqlite3
+import threading
+from collections import namedtuple
+
+# plate: registered plate that matched (None if none), distance: edit distance to the
+# plate read, label: owner/description, ambiguous: several plates were one edit away
+Authorization = namedtuple("Authorization", ["authorized", "plate", "distance", "label", "ambiguous"])
+
+DENIED = Authorization(False, None, None, None, False)
+
+NON_ALNUM = re.compile(r"[^A-Z0-9]")
+
+
+def normalize_plate(text):
+    return NON_ALNUM.sub("", str(text).upper())
+
+
+def within_one_edit(a, b):
+    """
+    True if a and b differ by at most one substitution, insertion or deletion.
+    """
+    if abs(len(a) - len(b)) > 1:
+        return False
+    if len(a) > len(b):
+        a, b = b, a
+    i = 0
+    while i < len(a) and a[i] == b[i]:
+        i += 1
+    if len(a) == len(b):
+        return a[i + 1:] == b[i + 1:]
+    return a[i:] == b[i + 1:]
+
+
+def deletions(plate):
+    return {plate[:i] + plate[i + 1:] for i in range(len(plate))}
+
+
+class PlateIndex:
+    """
+    Immutable in-memory index of authorized plates.
+
+    Exact lookups are one dict access. For edit distance 1 every plate is also
+    filed under each of its one-character deletions, so a near-miss is found by
+    probing the query and its own deletions (8 probes for a 7-character plate),
+    whatever the size of the registry.
+    """
+
+    def __init__(self, entries):
+        """
+        Args:
+            entries: Iterable of (plate, label, gates), gates being a set of gate ids or None for every gate.
+        """
+        self.plates = {}
+        self.neighbours = {}
+        for plate, label, gates in entries:
+            plate = normalize_plate(plate)
+            if not plate:
+                continue
+            self.plates[plate] = (label, gates)
+            for key in deletions(plate) | {plate}:
+                self.neighbours.setdefault(key, set()).add(plate)
+
+    def __len__(self):
+        return len(self.plates)
+
+    def lookup(self, text, gate=None, fuzzy=True):
+        """
+        Return the Authorization for a plate read at a gate.
+        """
+        plate = normalize_plate(text)
+        entry = self.plates.get(plate)
+        if entry is not None and self._allowed(entry, gate):
+            return Authorization(True, plate, 0, entry[0], False)
+        if not fuzzy or not plate:
+            return DENIED
+
+        candidates = set()
+        for key in deletions(plate) | {plate}:
+            candidates |= self.neighbours.get(key, set())
+        matches = [
+            candidate for candidate in candidates
+            if candidate != plate and within_one_edit(plate, candidate) and self._allowed(self.plates[candidate], gate)
+        ]
+        if len(matches) == 1:
+            return Authorization(True, matches[0], 1, self.plates[matches[0]][0], False)
+        if len(matches) > 1:
+            # One misread character could belong to more than one registered car: do not guess
+            return Authorization(False, None, 1, None, True)
+        return DENIED
+
+    @staticmethod
+    def _allowed(entry, gate):
+        gates = entry[1]
+        return gates is None or gate is None or gate in gates
+
+
+def read_plate_file(path):
+    """
+    Read a plate list: one plate per line, optionally followed by a label and
+    the gates it may use, comma separated ("ABC1D23,John,garage;side"). Blank
+    lines and lines starting with # are skipped; no gates means every gate.
+    """
+    entries = []
+    with open(path) as plates:
+        for line in plates:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            fields = [field.strip() for field in line.split(",")]
+            label = fields[1] if len(fields) > 1 and fields[1] else None
+            gates = {gate for gate in fields[2].split(";") if gate} if len(fields) > 2 and fields[2] else None
+            entries.append((fields[0], label, gates or None))
+    return entries
+
+
+def read_plate_database(path, table="authorized_plates"):
+    """
+    Read (plate, label, gates) rows from a SQLite table, gates as a ';'-separated string or NULL.
+    """
+    connection = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        rows = connection.execute(f"SELECT plate, label, gates FROM {table}").fetchall()
+    finally:
+        connection.close()
+    return [
+        (plate, label, {gate for gate in gates.split(";") if gate} or None if gates else None)
+        for plate, label, gates in rows
+    ]
+
+
+class AuthorizedPlates:
+    """
+    Authorized-plate registry backed by a text file or a SQLite database
+    (.db/.sqlite/.sqlite3), reloaded in the background when it changes on disk.
+
+    A reload builds a new PlateIndex and swaps it in with one assignment, so
+    lookups never wait for it and always see a complete index. If the source
+    is missing or broken the last good index is kept (an empty one at start,
+    which denies every plate).
+
+    Usage:
+        authorized = AuthorizedPlates("./authorized_plates.txt").start()
+        result = authorized.lookup("ABC1D23", gate="garage")
+        if result.authorized: ...
+    """
+
+    def __init__(self, path, reload_interval=5.0, fuzzy=True):
+        self.path = path
+        self.reload_interval = reload_interval
+        self.fuzzy = fuzzy
+        self.index = PlateIndex([])
+        self._signature = None
+        self._stop = threading.Event()
+
+    def start(self):
+        self.reload(force=True)
+        if self._signature is None:
+            print(f"WARNING: authorized plate list {self.path} is missing or unreadable. "
+                  f"Every plate will be DENIED until it is created.")
+        threading.Thread(target=self._watch, name="authorized-plates", daemon=True).start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def lookup(self, plate, gate=None):
+        return self.index.lookup(plate, gate, fuzzy=self.fuzzy)
+
+    def reload(self, force=False):
+        """
+        Rebuild the index if the source changed since the last load. Returns True if it was reloaded.
+        """
+        signature = self._source_signature()
+        if signature is None:
+            if self._signature is not None or force:
+                print(f"Authorized plates: {self.path} not found, keeping {len(self.index)} plates")
+            self._signature = None
+            return False
+        if signature == self._signature and not force:
+            return False
+        try:
+            if self._is_database():
+                entries = read_plate_database(self.path)
+            else:
+                entries = read_plate_file(self.path)
+        except (OSError, sqlite3.Error, ValueError) as e:
+            print(f"Authorized plates: could not load {self.path}, keeping {len(self.index)} plates:", e)
+            return False
+        self.index = PlateIndex(entries)
+        self._signature = signature
+        print(f"Authorized plates: loaded {len(self.index)} plates from {self.path}")
+        return True
+
+    def _watch(self):
+        while not self._stop.wait(self.reload_interval):
+            self.reload()
+
+    def _is_database(self):
+        return self.path.endswith((".db", ".sqlite", ".sqlite3"))
+
+    def _source_signature(self):
+        # A SQLite database in WAL mode changes its -wal file before the main one
+        paths = [self.path, self.path + "-wal"] if self._is_database() else [self.path]
+        signature = []
+        for path in paths:
+            try:
+                stat = os.stat(path)
+            except OSError:
+                if path == self.path:
+                    return None
+                continue
+            signature.append((stat.st_mtime_ns, stat.st_size))
+        return tuple(signature)
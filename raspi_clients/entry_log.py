@@ -0,0 +1,184 @@
+import queue
+import sqlite3
+import threading
+import time
+from plate_model.metrics import registry
+
+ENTRIES_WRITTEN = registry.counter("entries_written_total", "Gate decisions written to the entry log")
+ENTRIES_DROPPED = registry.counter("entries_dropped_total", "Gate decisions dropped because the entry log queue was full")
+ENTRY_FLUSH_LATENCY = registry.histogram("entry_flush_seconds", "Writing one batch of decisions to the entry log")
+
+# timestamp: Unix time of the decision, decision: opened / open_expired / unauthorized / ambiguous / no_plate,
+# matched_plate: registered plate it was authorized as, latencies in seconds (NULL if not measured)
+COLUMNS = (
+    "timestamp", "gate", "plate", "plate_type", "confidence", "decision", "matched_plate",
+    "trigger_to_start", "detection_seconds", "ocr_seconds", "trigger_to_open", "evidence_path",
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    id INTEGER PRIMARY KEY,
+    timestamp REAL NOT NULL,
+    gate TEXT NOT NULL,
+    plate TEXT,
+    plate_type TEXT,
+    confidence REAL,
+    decision TEXT NOT NULL,
+    matched_plate TEXT,
+    trigger_to_start REAL,
+    detection_seconds REAL,
+    ocr_seconds REAL,
+    trigger_to_open REAL,
+    evidence_path TEXT
+);
+CREATE INDEX IF NOT EXISTS entries_timestamp ON entries (timestamp);
+CREATE INDEX IF NOT EXISTS entries_plate_timestamp ON entries (plate, timestamp);
+CREATE INDEX IF NOT EXISTS entries_gate_timestamp ON entries (gate, timestamp);
+"""
+
+
+class EntryLog:
+    """
+    Append-only log of gate decisions in a SQLite database, written from a
+    background thread so the gate never waits on disk.
+
+    record() only queues the row, and never blocks: when the bounded queue is
+    full the row is dropped and counted instead. The writer commits rows in
+    batches (batch_size rows, or whatever arrived within flush_interval), one
+    transaction each. The database runs in WAL mode, so the dashboard can read
+    it while the writer appends; the indexes on time, plate and gate keep its
+    queries (see read_entries) fast as the table grows.
+
+    Usage:
+        entry_log = EntryLog("./entries.db").start()
+        entry_log.record(gate="garage", plate="ABC1D23", decision="opened", confidence=0.93)
+        entry_log.close()
+    """
+
+    def __init__(self, path="./entries.db", batch_size=64, flush_interval=1.0, max_queue=4096):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._thread = None
+
+    @classmethod
+    def from_config(cls, config):
+        """
+        Build a log from a task config, or return None when logging is disabled.
+        """
+        if not config.get("entry_log"):
+            return None
+        return cls(config["entry_log"], flush_interval=config.get("entry_log_flush_interval", 1.0)).start()
+
+    def start(self):
+        # Create the schema up front, so a broken path fails at startup instead of in the thread
+        connection = self._connect()
+        connection.close()
+        self._thread = threading.Thread(target=self._run, name="entry-log", daemon=True)
+        self._thread.start()
+        return self
+
+    def record(self, **fields):
+        """
+        Queue one decision; fields are COLUMNS, timestamp defaults to now.
+
+        Returns:
+            False if the queue was full and the row was dropped.
+        """
+        fields.setdefault("timestamp", time.time())
+        unknown = set(fields) - set(COLUMNS)
+        if unknown:
+            raise ValueError(f"Unknown entry log fields {sorted(unknown)}")
+        try:
+            self._queue.put_nowait(tuple(fields.get(column) for column in COLUMNS))
+        except queue.Full:
+            ENTRIES_DROPPED.inc()
+            return False
+        return True
+
+    def close(self, timeout=5.0):
+        """
+        Write what is still queued (within the timeout) and stop the thread.
+        """
+        if self._thread is not None:
+            try:
+                self._queue.put(None, timeout=timeout)
+            except queue.Full:
+                pass
+            self._thread.join(timeout=timeout)
+            self._thread = None
+
+    def _connect(self):
+        connection = sqlite3.connect(self.path)
+        connection.execute("PRAGMA journal_mode=WAL")
+        # With WAL, NORMAL only syncs at checkpoints: a power cut can lose the last batch, never corrupt the file
+        connection.execute("PRAGMA synchronous=NORMAL")
+        connection.executescript(SCHEMA)
+        return connection
+
+    def _run(self):
+        connection = self._connect()
+        insert = f"INSERT INTO entries ({', '.join(COLUMNS)}) VALUES ({', '.join('?' for _ in COLUMNS)})"
+        running = True
+        while running:
+            item = self._queue.get()
+            if item is None:
+                break
+            rows = [item]
+            deadline = time.monotonic() + self.flush_interval
+            # Gather what else arrives shortly after, so a burst is one transaction
+            while running and len(rows) < self.batch_size:
+                try:
+                    item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if item is None:
+                    running = False
+                else:
+                    rows.append(item)
+            start = time.perf_counter()
+            try:
+                with connection:
+                    connection.executemany(insert, rows)
+            except sqlite3.Error as e:
+                print(f"Error while writing {len(rows)} entries to {self.path}:", e)
+                continue
+            ENTRY_FLUSH_LATENCY.observe(time.perf_counter() - start)
+            ENTRIES_WRITTEN.inc(len(rows))
+        connection.close()
+
+
+def read_entries(path, since=None, until=None, gate=None, plate=None, limit=1000):
+    """
+    Query the entry log for the dashboard, newest first, without blocking the writer.
+
+    Args:
+        since, until: Unix time bounds of the decisions (inclusive, exclusive).
+        gate, plate: Only this gate / plate.
+        limit: Maximum number of rows, None for all.
+
+    Returns:
+        A pandas DataFrame with the COLUMNS.
+    """
+    import pandas as pd
+
+    conditions = []
+    params = []
+    for condition, value in (("timestamp >= ?", since), ("timestamp < ?", until), ("gate = ?", gate), ("plate = ?", plate)):
+        if value is not None:
+            conditions.append(condition)
+            params.append(value)
+    query = f"SELECT {', '.join(COLUMNS)} FROM entries"
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+    query += " ORDER BY timestamp DESC"
+    if limit is not None:
+        query += " LIMIT ?"
+        params.append(limit)
+
+    connection = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        return pd.read_sql_query(query, connection, params=params)
+    finally:
+        connection.close()
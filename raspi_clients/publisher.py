@@ -0,0 +1,220 @@
+import threading
+import time
+from collections import deque
+from plate_model.metrics import registry
+
+MQTT_DELIVERED = registry.counter("mqtt_delivered_total", "Messages the broker acknowledged (QoS 1+) or accepted (QoS 0)")
+MQTT_DROPPED = registry.counter("mqtt_dropped_total", "Messages dropped because the publish buffer was full")
+MQTT_EXPIRED = registry.counter("mqtt_expired_total", "Messages discarded because they were not sent before their ttl")
+MQTT_DELIVERY_LATENCY = registry.histogram("mqtt_delivery_seconds", "Time from queueing a message to its delivery")
+
+# States of a PendingMessage
+QUEUED = "queued"
+SENT = "sent"
+DELIVERED = "delivered"
+DROPPED = "dropped"
+EXPIRED = "expired"
+
+
+class PendingMessage:
+    """
+    One message handed to MqttPublisher, with its delivery state.
+    """
+
+    def __init__(self, topic, payload, qos, retain, ttl):
+        self.topic = topic
+        self.payload = payload
+        self.qos = qos
+        self.retain = retain
+        self.queued_at = time.monotonic()
+        self.expires_at = self.queued_at + ttl if ttl is not None else None
+        self.state = QUEUED
+        self.delivered_at = None
+        self.info = None  # paho MQTTMessageInfo once sent
+        self._done = threading.Event()
+        self._lock = threading.Lock()
+        self._callbacks = []
+
+    def wait(self, timeout=None):
+        """
+        Block until the message is delivered, dropped or expired. Returns True if delivered.
+        """
+        self._done.wait(timeout)
+        return self.state == DELIVERED
+
+    def add_done_callback(self, callback):
+        """
+        Call callback(message) once the message is delivered, dropped or expired.
+        It runs on the publisher thread (or the publishing one for a drop), right
+        away if the message is already done, so it must not block.
+        """
+        with self._lock:
+            if not self._done.is_set():
+                self._callbacks.append(callback)
+                return
+        callback(self)
+
+    def _finish(self, state):
+        with self._lock:
+            self.state = state
+            if state == DELIVERED:
+                self.delivered_at = time.monotonic()
+            self._done.set()
+
+    def _run_callbacks(self):
+        # Outside the publisher's lock: a callback may well publish again
+        with self._lock:
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            try:
+                callback(self)
+            except Exception as e:
+                print(f"Error in the delivery callback for '{self.topic}':", e)
+
+
+class MqttPublisher:
+    """
+    Publishes from a background thread, so the detection worker, the scheduler
+    and the MQTT callbacks never wait on a broker round trip.
+
+    publish() only queues the message and returns a PendingMessage tracking its
+    delivery (for QoS 1 and 2 once the broker acknowledged it); callers that act
+    on the outcome register a callback with add_done_callback(). While the broker
+    is unreachable messages wait in a buffer of max_queue messages; when it is
+    full the oldest one is dropped. A message with a ttl is discarded if it could
+    not be sent in time, so an open command never reaches a gate long after the
+    car has gone. Reconnecting is left to paho's network loop (see connect()),
+    which backs off between attempts.
+
+    Usage:
+        publisher = MqttPublisher(client).start()
+        message = publisher.publish("garage/open_garage", "True", qos=1, ttl=10.0)
+        message.add_done_callback(lambda m: print(m.state))  # delivered, dropped or expired
+    """
+
+    def __init__(self, client, max_queue=256, max_inflight=20, poll_interval=0.05):
+        self.client = client
+        self.max_queue = max_queue
+        self.max_inflight = max_inflight
+        self.poll_interval = poll_interval
+        self._cond = threading.Condition()
+        self._queue = deque()
+        self._inflight = deque()
+        self._running = False
+        self._thread = None
+
+    def connect(self, host, port=1883, keepalive=60, min_delay=1, max_delay=30):
+        """
+        Start the client's network loop and connect in the background; paho keeps
+        reconnecting with a delay doubling from min_delay up to max_delay seconds.
+        """
+        self.client.reconnect_delay_set(min_delay=min_delay, max_delay=max_delay)
+        self.client.connect_async(host, port, keepalive)
+        self.client.loop_start()
+        return self
+
+    def start(self):
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="mqtt-publisher", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=2.0):
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+            self._thread = None
+
+    def publish(self, topic, payload, qos=1, retain=False, ttl=None):
+        """
+        Queue a message; never blocks.
+
+        Args:
+            payload: str or bytes.
+            ttl: Seconds the message may wait for the broker before it is discarded, None to wait forever.
+
+        Returns:
+            The PendingMessage.
+        """
+        if isinstance(payload, str):
+            payload = payload.encode("utf-8")
+        message = PendingMessage(topic, payload, qos, retain, ttl)
+        dropped = None
+        with self._cond:
+            if len(self._queue) >= self.max_queue:
+                MQTT_DROPPED.inc()
+                dropped = self._queue.popleft()
+                dropped._finish(DROPPED)
+            self._queue.append(message)
+            self._cond.notify()
+        if dropped is not None:
+            dropped._run_callbacks()
+        return message
+
+    def queue_depth(self):
+        with self._cond:
+            return len(self._queue)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                # Wake up for new messages, and regularly while waiting for acks or the broker
+                idle = not self._queue and not self._inflight
+                self._cond.wait(timeout=None if idle else self.poll_interval)
+                if not self._running:
+                    return
+                expired = self._expire(time.monotonic())
+                to_send = []
+                if self.client.is_connected():
+                    while self._queue and len(self._inflight) + len(to_send) < self.max_inflight:
+                        to_send.append(self._queue.popleft())
+            for message in expired:
+                message._run_callbacks()
+            for k, message in enumerate(to_send):
+                if not self._send(message):
+                    # Lost the connection in between: back to the front of the queue, in order
+                    with self._cond:
+                        self._queue.extendleft(reversed(to_send[k:]))
+                    break
+            self._check_inflight()
+
+    def _expire(self, now):
+        kept = deque()
+        expired = []
+        for message in self._queue:
+            if message.expires_at is not None and now > message.expires_at:
+                MQTT_EXPIRED.inc()
+                message._finish(EXPIRED)
+                expired.append(message)
+            else:
+                kept.append(message)
+        self._queue = kept
+        return expired
+
+    def _send(self, message):
+        try:
+            message.info = self.client.publish(message.topic, message.payload, qos=message.qos, retain=message.retain)
+        except Exception as e:
+            print(f"Error while publishing to '{message.topic}', will retry:", e)
+            message.info = None
+        if message.info is None or message.info.rc != 0:
+            # A QoS 1+ message paho already kept may then go out twice: at-least-once, as QoS 1 promises anyway
+            return False
+        message.state = SENT
+        self._inflight.append(message)
+        return True
+
+    def _check_inflight(self):
+        still_waiting = deque()
+        for message in self._inflight:
+            if message.info.is_published():
+                message._finish(DELIVERED)
+                MQTT_DELIVERED.inc()
+                MQTT_DELIVERY_LATENCY.observe(message.delivered_at - message.queued_at)
+                message._run_callbacks()
+            else:
+                # paho retransmits unacknowledged QoS 1/2 messages after a reconnect
+                still_waiting.append(message)
+        self._inflight = still_waiting
@@ -0,0 +1,88 @@
+import threading
+import time
+from collections import namedtuple
+
+# decided_at / left_at: time.monotonic() of the decision and of the vehicle leaving (None while present)
+CachedDecision = namedtuple("CachedDecision", ["plate", "decision", "decided_at", "left_at"])
+
+
+class RecentPlateCache:
+    """
+    Last plate decision per gate, tied to the presence of the vehicle it was made for.
+
+    Presence comes from the distance stream: arrived() on the approach/trigger
+    events and left() on CLEAR. While the vehicle is present, lookup() returns
+    the cached decision, so a re-trigger reuses it instead of running detection
+    again. Once the bay clears the entry only survives clear_grace seconds (a
+    car rocking at the edge of the trigger range, a short sensor dropout) and
+    the next arrival runs the pipeline again. No entry outlives ttl seconds.
+
+    Usage:
+        recent = RecentPlateCache(ttl=60.0)
+        recent.arrived("garage")                      # WARMUP / TRIGGER
+        cached = recent.lookup("garage")
+        if cached is None: ...                        # run detection, then
+        recent.remember("garage", "ABC1D23", "opened")
+        recent.left("garage")                         # CLEAR
+    """
+
+    def __init__(self, ttl=60.0, clear_grace=3.0):
+        self.ttl = ttl
+        self.clear_grace = clear_grace
+        self._lock = threading.Lock()
+        self._entries = {}  # gate -> CachedDecision
+        self._present = set()
+
+    def arrived(self, gate, now=None):
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            self._present.add(gate)
+            entry = self._entries.get(gate)
+            if entry is not None and entry.left_at is not None:
+                if now - entry.left_at <= self.clear_grace:
+                    # Back within the grace period: the same vehicle, present again
+                    self._entries[gate] = entry._replace(left_at=None)
+                else:
+                    del self._entries[gate]
+
+    def left(self, gate, now=None):
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            self._present.discard(gate)
+            entry = self._entries.get(gate)
+            if entry is not None and entry.left_at is None:
+                self._entries[gate] = entry._replace(left_at=now)
+
+    def is_present(self, gate):
+        with self._lock:
+            return gate in self._present
+
+    def remember(self, gate, plate, decision, now=None):
+        """
+        Cache the decision for the vehicle at the gate. If it already left while
+        the plate was being read, the entry starts its grace period right away.
+        """
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            left_at = None if gate in self._present else now
+            self._entries[gate] = CachedDecision(plate, decision, now, left_at)
+
+    def lookup(self, gate, now=None):
+        """
+        Return the CachedDecision still valid for the gate, or None if detection should run.
+        """
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            entry = self._entries.get(gate)
+            if entry is None:
+                return None
+            expired = now - entry.decided_at > self.ttl
+            cleared = entry.left_at is not None and now - entry.left_at > self.clear_grace
+            if expired or cleared:
+                del self._entries[gate]
+                return None
+            return entry
+
+    def forget(self, gate):
+        with self._lock:
+            self._entries.pop(gate, None)
@@ -0,0 +1,142 @@
+import threading
+import time
+from collections import deque
+
+
+class ScheduledTask:
+    """
+    One detection run requested by a trigger on a gate. A run that was cut short
+    to let another gate go first is requeued as a new task with the same
+    triggered_at and attempt + 1.
+    """
+
+    def __init__(self, gate, kind, triggered_at, attempt=1):
+        self.gate = gate
+        self.kind = kind
+        self.triggered_at = triggered_at
+        self.attempt = attempt
+        self.started_at = None
+        self.finished_at = None
+
+    def trigger_to_start(self):
+        if self.started_at is None:
+            return None
+        return self.started_at - self.triggered_at
+
+
+class TaskScheduler:
+    """
+    Blocking task queue between the MQTT callbacks and the detection worker,
+    fair across gates.
+
+    submit() is called from the MQTT thread and wakes the worker immediately.
+    Triggers for a gate that already has a task pending or running are coalesced
+    instead of queued again, so a car sitting in front of the sensor only causes
+    one detection run. A task counts as running until finish(), which the caller
+    may defer past next_task()'s worker, e.g. until an OCR worker read the plate. Every gate therefore holds at most one slot in the ready
+    queue and next_task() serves the gates round-robin: with N gates a trigger
+    waits for at most N - 1 other runs. A long run can also give way while
+    others wait (see waiting() and requeue()).
+
+    Usage:
+        scheduler = TaskScheduler()
+        scheduler.submit("garage", "fullplate")        # MQTT thread
+        task = scheduler.next_task(timeout=1.0)        # worker thread
+        ...
+        scheduler.finish(task)
+    """
+
+    def __init__(self, latency_window=100, max_attempts=5):
+        self.max_attempts = max_attempts
+        self._cond = threading.Condition()
+        self._ready = deque()  # Gates with a pending task, in the order they are served
+        self._active = {}  # gate -> ScheduledTask, pending or running
+        self.triggers_received = 0
+        self.triggers_coalesced = 0
+        self.tasks_run = 0
+        self.tasks_requeued = 0
+        self.trigger_to_start = deque(maxlen=latency_window)
+
+    def submit(self, gate, kind):
+        """
+        Queue a task for the gate unless one is already pending or running.
+
+        Returns:
+            True if a new task was queued, False if the trigger was coalesced.
+        """
+        with self._cond:
+            self.triggers_received += 1
+            if gate in self._active:
+                self.triggers_coalesced += 1
+                return False
+            self._queue_task(ScheduledTask(gate, kind, time.monotonic()))
+        return True
+
+    def requeue(self, task):
+        """
+        Put a task that gave way to another gate at the back of the queue, keeping
+        its trigger time. Returns False once it has used up max_attempts.
+        """
+        with self._cond:
+            if task.attempt >= self.max_attempts or self._active.get(task.gate) is not task:
+                return False
+            self.tasks_requeued += 1
+            self._queue_task(ScheduledTask(task.gate, task.kind, task.triggered_at, task.attempt + 1))
+        return True
+
+    def next_task(self, timeout=None):
+        """
+        Block until a task is available (or the timeout expires) and mark it as started.
+        """
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._ready, timeout=timeout):
+                return None
+            task = self._active[self._ready.popleft()]
+            task.started_at = time.monotonic()
+            self.trigger_to_start.append(task.trigger_to_start())
+        return task
+
+    def finish(self, task):
+        """
+        Mark the task as done so new triggers for its gate are accepted again.
+        """
+        task.finished_at = time.monotonic()
+        with self._cond:
+            if self._active.get(task.gate) is task:
+                del self._active[task.gate]
+            self.tasks_run += 1
+
+    def waiting(self, exclude=None):
+        """
+        True if a gate other than `exclude` has a task waiting to start.
+        """
+        with self._cond:
+            return any(gate != exclude for gate in self._ready)
+
+    def is_busy(self, gate):
+        with self._cond:
+            return gate in self._active
+
+    def queue_depth(self):
+        with self._cond:
+            return len(self._ready)
+
+    def _queue_task(self, task):
+        self._active[task.gate] = task
+        self._ready.append(task.gate)
+        self._cond.notify()
+
+    def stats(self):
+        with self._cond:
+            latencies = sorted(self.trigger_to_start)
+            return {
+                "queue_depth": len(self._ready),
+                "active_gates": len(self._active),
+                "triggers_received": self.triggers_received,
+                "triggers_coalesced": self.triggers_coalesced,
+                "tasks_run": self.tasks_run,
+                "tasks_requeued": self.tasks_requeued,
+                "trigger_to_start_last": self.trigger_to_start[-1] if latencies else None,
+                "trigger_to_start_max": latencies[-1] if latencies else None,
+                "trigger_to_start_p50": latencies[len(latencies) // 2] if latencies else None,
+            }
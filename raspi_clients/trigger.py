@@ -0,0 +1,126 @@
+import re
+import time
+from collections import deque
+from statistics import median
+
+# Events returned by ApproachTracker.update()
+WARMUP = "warmup"
+TRIGGER = "trigger"
+CLEAR = "clear"
+
+# States of the tracker
+IDLE = "idle"
+APPROACHING = "approaching"
+PRESENT = "present"
+
+DISTANCE_PATTERN = re.compile(r"Object detected at (\d+) cm")
+
+
+def parse_distance(message):
+    """
+    Extract the distance in cm from an ESP32 "Object detected at N cm" message, or None.
+    """
+    match = DISTANCE_PATTERN.search(message)
+    return int(match.group(1)) if match else None
+
+
+class ApproachTracker:
+    """
+    State machine over the distance stream of one ultrasonic sensor.
+
+    Readings are smoothed with a median filter, and the approach speed is the
+    least-squares slope of the smoothed distance over time. The tracker fires:
+
+    - WARMUP when a car is closing in and is expected to reach the trigger
+      distance within `lookahead` seconds, so detection can start during the approach;
+    - TRIGGER once the smoothed distance is within `trigger_distance`;
+    - CLEAR once the car has moved back beyond `trigger_distance + hysteresis`
+      or the sensor has been silent for `stale_after` seconds.
+
+    Usage:
+        tracker = ApproachTracker()
+        event = tracker.update(distance)
+        if event == TRIGGER: ...
+    """
+
+    def __init__(self, trigger_distance=200, warmup_distance=400, hysteresis=30,
+                 window=5, min_approach_speed=15.0, lookahead=2.0, stale_after=1.5):
+        self.trigger_distance = trigger_distance
+        self.warmup_distance = warmup_distance
+        self.hysteresis = hysteresis
+        self.min_approach_speed = min_approach_speed
+        self.lookahead = lookahead
+        self.stale_after = stale_after
+        self.state = IDLE
+        self.raw = deque(maxlen=window)
+        self.history = deque(maxlen=window)  # (timestamp, filtered distance)
+        self.last_reading_at = None
+
+    def update(self, distance, timestamp=None):
+        """
+        Feed one distance reading (cm). Returns WARMUP, TRIGGER, CLEAR or None.
+        """
+        now = time.monotonic() if timestamp is None else timestamp
+        self.last_reading_at = now
+        self.raw.append(distance)
+        filtered = median(self.raw)
+        self.history.append((now, filtered))
+
+        if self.state == PRESENT:
+            if filtered > self.trigger_distance + self.hysteresis:
+                return self._reset(CLEAR)
+            return None
+
+        if filtered <= self.trigger_distance:
+            self.state = PRESENT
+            return TRIGGER
+
+        if self.state == IDLE and filtered <= self.warmup_distance and self._arriving_soon(filtered):
+            self.state = APPROACHING
+            return WARMUP
+
+        if self.state == APPROACHING and filtered > self.warmup_distance + self.hysteresis:
+            # The car turned away before reaching the gate
+            return self._reset(CLEAR)
+        return None
+
+    def expire(self, timestamp=None):
+        """
+        The ESP32 only publishes while something is in range, so silence means the bay is clear.
+        Returns CLEAR when the tracker leaves the APPROACHING/PRESENT state because of it.
+        """
+        now = time.monotonic() if timestamp is None else timestamp
+        if self.state != IDLE and self.last_reading_at is not None and now - self.last_reading_at > self.stale_after:
+            return self._reset(CLEAR)
+        return None
+
+    def is_present(self):
+        return self.state == PRESENT
+
+    def speed(self):
+        """
+        Approach speed in cm/s (positive while the car is closing in), or 0.0 with too few readings.
+        """
+        if len(self.history) < 3:
+            return 0.0
+        times = [t for t, _ in self.history]
+        distances = [d for _, d in self.history]
+        mean_t = sum(times) / len(times)
+        mean_d = sum(distances) / len(distances)
+        var_t = sum((t - mean_t) ** 2 for t in times)
+        if var_t == 0:
+            return 0.0
+        slope = sum((t - mean_t) * (d - mean_d) for t, d in zip(times, distances)) / var_t
+        return -slope
+
+    def _arriving_soon(self, filtered):
+        speed = self.speed()
+        if speed < self.min_approach_speed:
+            return False
+        return (filtered - self.trigger_distance) / speed <= self.lookahead
+
+    def _reset(self, event):
+        self.state = IDLE
+        self.raw.clear()
+        self.history.clear()
+        return event
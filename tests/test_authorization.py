@@ -0,0 +1,70 @@
+import sqlite3
+
+from raspi_clients.authorization import AuthorizedPlates, PlateIndex, within_one_edit
+
+
+def test_within_one_edit():
+    assert within_one_edit("ABC1D23", "ABC1D23")
+    assert within_one_edit("ABC1D23", "A8C1D23")
+    assert within_one_edit("ABC1D23", "ABC1D2")
+    assert within_one_edit("ABC1D23", "ABC1D234")
+    assert not within_one_edit("ABC1D23", "A8C1D28")
+
+
+def test_exact_and_near_matches():
+    index = PlateIndex([("ABC-1D23", "John", None), ("XYZ9876", None, {"side"})])
+    exact = index.lookup("abc1d23")
+    assert exact.authorized and exact.distance == 0 and exact.label == "John"
+    near = index.lookup("A8C1D23")
+    assert near.authorized and near.plate == "ABC1D23" and near.distance == 1
+    assert not index.lookup("A8C1D23", fuzzy=False).authorized
+    assert not index.lookup("QQQ1111").authorized
+
+
+def test_gates_restrict_plates():
+    index = PlateIndex([("XYZ9876", None, {"side"})])
+    assert index.lookup("XYZ9876", gate="side").authorized
+    assert not index.lookup("XYZ9876", gate="garage").authorized
+
+
+def test_ambiguous_near_match_is_denied():
+    index = PlateIndex([("ABC1D23", None, None), ("ABC1D28", None, None)])
+    result = index.lookup("ABC1D20")
+    assert not result.authorized
+    assert result.ambiguous
+    # An exact match is never ambiguous
+    assert index.lookup("ABC1D28").authorized
+
+
+def test_file_is_reloaded_when_it_changes(tmp_path):
+    path = tmp_path / "plates.txt"
+    path.write_text("# plate,label,gates\nABC1D23,John\n")
+    plates = AuthorizedPlates(str(path))
+    assert plates.reload()
+    assert not plates.reload()
+    assert not plates.lookup("QQQ1111").authorized
+    path.write_text("ABC1D23,John\nQQQ1111,Ana,garage;side\n")
+    assert plates.reload(force=True)
+    assert plates.lookup("QQQ1111", gate="side").authorized
+    assert not plates.lookup("QQQ1111", gate="back").authorized
+
+
+def test_missing_file_denies_everything(tmp_path, capsys):
+    plates = AuthorizedPlates(str(tmp_path / "missing.txt"), reload_interval=60).start()
+    plates.stop()
+    assert "WARNING" in capsys.readouterr().out
+    assert not plates.lookup("ABC1D23").authorized
+
+
+def test_sqlite_source(tmp_path):
+    path = tmp_path / "plates.db"
+    connection = sqlite3.connect(path)
+    connection.execute("CREATE TABLE authorized_plates (plate TEXT, label TEXT, gates TEXT)")
+    connection.execute("INSERT INTO authorized_plates VALUES ('DEF2G34', 'x', 'garage;side'), ('GHI5J67', NULL, NULL)")
+    connection.commit()
+    connection.close()
+    plates = AuthorizedPlates(str(path))
+    plates.reload()
+    assert plates.lookup("DEF2G34", gate="garage").authorized
+    assert not plates.lookup("DEF2G34", gate="back").authorized
+    assert plates.lookup("GHI5J67", gate="back").authorized
@@ -0,0 +1,36 @@
+import argparse
+import json
+
+import pytest
+
+np = pytest.importorskip("numpy")
+cv2 = pytest.importorskip("cv2")
+
+from plate_model.benchmark import run_benchmark  # noqa: E402
+
+
+def make_args(input_dir, recording, repeat):
+    return argparse.Namespace(
+        pipeline="ocr", input=str(input_dir), detector="replay", recording=str(recording), record=None,
+        thresh=0.25, cascade=False, read_text=False, repeat=repeat, fps=30.0,
+    )
+
+
+def test_replay_repeats_reach_the_same_decision(tmp_path):
+    frames_dir = tmp_path / "frames"
+    frames_dir.mkdir()
+    for k in range(8):
+        frame = np.full((416, 416, 3), 40 + k, dtype=np.uint8)
+        cv2.imwrite(str(frames_dir / f"{k:03d}.png"), frame)
+
+    # One confident, plate-shaped box per frame: [class id, confidence %, x, y, w, h]
+    recording = tmp_path / "recording.json"
+    recording.write_text(json.dumps({
+        "width": 416, "height": 416, "class_names": ["plate_mercosul"],
+        "frames": [[[0, 95.0, 208.0, 208.0, 200.0, 60.0]] for _ in range(8)],
+    }))
+
+    report = run_benchmark(make_args(frames_dir, recording, repeat=3))
+    assert report["decisions"] == 3
+    assert report["results"] == [["plate_mercosul", None]] * 3
+    assert len(set(report["frames_to_decision"])) == 1
@@ -0,0 +1,71 @@
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("cv2")
+
+from plate_model.camera import FrameGrabber, CaptureSession
+
+
+def running_grabber():
+    """
+    A grabber with no capture thread: the test appends the frames itself.
+    """
+    grabber = FrameGrabber(0)
+    grabber._running = True
+    return grabber
+
+
+def push_frame(grabber, frame, delay=0.0):
+    def run():
+        time.sleep(delay)
+        with grabber._cond:
+            grabber.frames.append((grabber._next_id, time.monotonic(), frame))
+            grabber._next_id += 1
+            grabber._cond.notify_all()
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    return thread
+
+
+def test_read_waits_through_a_camera_reopen():
+    grabber = running_grabber()
+    cap = CaptureSession(grabber, time.monotonic(), read_timeout=0.05, max_duration=2.0)
+    # Longer than read_timeout, as reopening the camera is
+    push_frame(grabber, "frame", delay=0.3)
+    ret, frame = cap.read()
+    assert ret and frame == "frame"
+
+
+def test_read_gives_up_at_the_session_deadline():
+    grabber = running_grabber()
+    cap = CaptureSession(grabber, time.monotonic(), read_timeout=0.05, max_duration=0.2)
+    start = time.monotonic()
+    assert cap.read() == (False, None)
+    assert 0.15 < time.monotonic() - start < 1.0
+
+
+def test_read_gives_up_after_the_stall_timeout_without_deadline():
+    grabber = running_grabber()
+    cap = CaptureSession(grabber, time.monotonic(), read_timeout=0.05, stall_timeout=0.2)
+    assert cap.read() == (False, None)
+
+
+def test_read_stops_waiting_to_give_way():
+    grabber = running_grabber()
+    cap = CaptureSession(grabber, time.monotonic(), read_timeout=0.05, max_duration=5.0,
+                         yield_after=0.0, should_yield=lambda: True)
+    start = time.monotonic()
+    assert cap.read() == (False, None)
+    assert time.monotonic() - start < 1.0
+    assert cap.preempted
+
+
+def test_read_ends_when_the_video_file_ends():
+    grabber = running_grabber()
+    grabber._finished = True
+    cap = CaptureSession(grabber, time.monotonic(), read_timeout=0.05, max_duration=5.0)
+    start = time.monotonic()
+    assert cap.read() == (False, None)
+    assert time.monotonic() - start < 0.5
@@ -0,0 +1,59 @@
+from ctypes import POINTER, c_float, cast
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from plate_model.darknet import DETECTION, decode_detections_numpy, remove_negatives_faster
+
+CLASS_NAMES = ["plate", "plate_mercosul", "car"]
+
+
+def detection_array(rows):
+    """
+    Build a DETECTION array the way get_network_boxes returns it, from (box, probs) rows.
+    The prob buffers are returned too, so they outlive the test.
+    """
+    detections = (DETECTION * len(rows))()
+    buffers = []
+    for detection, (box, probs) in zip(detections, rows):
+        prob = (c_float * len(probs))(*probs)
+        buffers.append(prob)
+        detection.bbox.x, detection.bbox.y, detection.bbox.w, detection.bbox.h = box
+        detection.classes = len(probs)
+        detection.best_class_idx = max(range(len(probs)), key=probs.__getitem__)
+        detection.prob = cast(prob, POINTER(c_float))
+    return cast(detections, POINTER(DETECTION)), buffers
+
+
+ROWS = [
+    ((10.0, 20.0, 30.0, 40.0), [0.1, 0.7, 0.0]),
+    ((50.0, 60.0, 70.0, 80.0), [0.9, 0.05, 0.0]),
+    ((1.0, 2.0, 3.0, 4.0), [0.0, 0.0, 0.25]),
+    ((5.5, 6.5, 7.5, 8.5), [0.2, 0.3, 0.6]),
+]
+
+
+def test_matches_the_per_box_decoder():
+    detections, buffers = detection_array(ROWS)
+    result = decode_detections_numpy(detections, len(ROWS), len(CLASS_NAMES))
+    expected = sorted(remove_negatives_faster(detections, CLASS_NAMES, len(ROWS)), key=lambda p: p[1])
+
+    assert [CLASS_NAMES[k] for k in result.class_ids.tolist()] == [name for name, _, _ in expected]
+    np.testing.assert_allclose(result.confidences, [prob * 100 for _, prob, _ in expected], rtol=1e-6)
+    np.testing.assert_allclose(result.boxes, [box for _, _, box in expected])
+    assert result.reused is False
+
+
+def test_threshold_and_ascending_order():
+    detections, buffers = detection_array(ROWS)
+    result = decode_detections_numpy(detections, len(ROWS), len(CLASS_NAMES), thresh=0.5)
+    assert result.class_ids.tolist() == [2, 1, 0]
+    np.testing.assert_allclose(result.confidences, [60.0, 70.0, 90.0], rtol=1e-6)
+    np.testing.assert_allclose(result.boxes[-1], [50.0, 60.0, 70.0, 80.0])
+
+
+def test_no_detections():
+    result = decode_detections_numpy(None, 0, len(CLASS_NAMES))
+    assert result.boxes.shape == (0, 4)
+    assert len(result.class_ids) == 0
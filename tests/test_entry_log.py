@@ -0,0 +1,58 @@
+import sqlite3
+
+import pytest
+
+from raspi_clients.entry_log import EntryLog
+
+
+def rows(path):
+    connection = sqlite3.connect(path)
+    try:
+        return connection.execute("SELECT gate, plate, decision, confidence FROM entries ORDER BY id").fetchall()
+    finally:
+        connection.close()
+
+
+def test_rows_are_written_in_batches(tmp_path):
+    path = str(tmp_path / "entries.db")
+    log = EntryLog(path, batch_size=10, flush_interval=0.05).start()
+    for k in range(25):
+        assert log.record(gate="garage", plate=f"ABC{k:04d}", decision="opened", confidence=0.9)
+    log.close()
+    written = rows(path)
+    assert len(written) == 25
+    assert written[0] == ("garage", "ABC0000", "opened", 0.9)
+
+    connection = sqlite3.connect(path)
+    assert connection.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    plan = connection.execute("EXPLAIN QUERY PLAN SELECT * FROM entries WHERE plate = 'ABC0001'").fetchall()
+    connection.close()
+    assert "entries_plate_timestamp" in str(plan)
+
+
+def test_full_queue_drops_instead_of_blocking(tmp_path):
+    log = EntryLog(str(tmp_path / "entries.db"), max_queue=2)  # Not started: nothing drains the queue
+    assert log.record(gate="garage", decision="no_plate")
+    assert log.record(gate="garage", decision="no_plate")
+    assert not log.record(gate="garage", decision="no_plate")
+
+
+def test_unknown_fields_are_rejected(tmp_path):
+    log = EntryLog(str(tmp_path / "entries.db"))
+    with pytest.raises(ValueError):
+        log.record(gate="garage", decision="opened", colour="red")
+
+
+def test_read_entries_filters(tmp_path):
+    pytest.importorskip("pandas")
+    from raspi_clients.entry_log import read_entries
+
+    path = str(tmp_path / "entries.db")
+    log = EntryLog(path, flush_interval=0.05).start()
+    log.record(timestamp=100.0, gate="garage", plate="ABC1D23", decision="opened")
+    log.record(timestamp=200.0, gate="side", plate="ABC1D23", decision="unauthorized")
+    log.record(timestamp=300.0, gate="garage", plate="XYZ9876", decision="opened")
+    log.close()
+    entries = read_entries(path, plate="ABC1D23")
+    assert list(entries["timestamp"]) == [200.0, 100.0]
+    assert list(read_entries(path, since=150.0, gate="garage")["plate"]) == ["XYZ9876"]
@@ -0,0 +1,74 @@
+import os
+import re
+import time
+
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("cv2")
+
+from plate_model.evidence import EvidenceWriter
+
+DAY = 86400
+
+
+def old_file(path, size, age):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as output:
+        output.write(b"\0" * size)
+    mtime = time.time() - age
+    os.utime(path, (mtime, mtime))
+    return path
+
+
+def test_images_go_to_dated_directories(tmp_path):
+    writer = EvidenceWriter(str(tmp_path / "evidence")).start()
+    image = np.zeros((20, 40, 3), dtype=np.uint8)
+    paths = writer.submit("plate_mercosul", {"full": image, "crop": lambda: image[:10, :20]})
+    writer.close()
+    for kind, path in paths.items():
+        relative = os.path.relpath(path, tmp_path / "evidence")
+        assert re.fullmatch(rf"\d{{4}}/\d{{2}}/\d{{2}}/plate_mercosul_\d{{6}}_\d{{6}}_{kind}\.jpg", relative)
+        assert os.path.getsize(path) > 0
+
+
+def test_files_past_retention_are_deleted_with_their_directories(tmp_path):
+    root = tmp_path / "evidence"
+    expired = old_file(str(root / "2024" / "01" / "02" / "a_full.jpg"), 10, 40 * DAY)
+    recent = old_file(str(root / "2024" / "02" / "01" / "b_full.jpg"), 10, 2 * DAY)
+    writer = EvidenceWriter(str(root), retention_days=30).start()
+    writer.close()
+    assert not os.path.exists(expired)
+    assert not os.path.exists(root / "2024" / "01")
+    assert os.path.exists(recent)
+
+
+def test_oldest_files_go_beyond_the_size_cap(tmp_path):
+    root = tmp_path / "evidence"
+    paths = [old_file(str(root / "2024" / "03" / "01" / f"{k}_full.jpg"), 100, (10 - k) * 60) for k in range(5)]
+    writer = EvidenceWriter(str(root), max_bytes=250, retention_days=None).start()
+    writer.close()
+    assert [os.path.exists(path) for path in paths] == [False, False, False, True, True]
+
+
+def test_deletion_stays_inside_the_root(tmp_path):
+    root = tmp_path / "evidence"
+    # Same prefix as the root, and the target of a link inside it
+    sibling = old_file(str(tmp_path / "evidence_old" / "x_full.jpg"), 10, 90 * DAY)
+    outside = old_file(str(tmp_path / "outside.jpg"), 10, 90 * DAY)
+    old_file(str(root / "2024" / "01" / "02" / "a_full.jpg"), 10, 90 * DAY)
+    link = root / "2024" / "01" / "02" / "link.jpg"
+    os.symlink(outside, link)
+    os.utime(link, (time.time() - 90 * DAY,) * 2, follow_symlinks=False)
+    writer = EvidenceWriter(str(root), retention_days=30).start()
+    writer.close()
+    assert os.path.exists(sibling)
+    assert os.path.exists(outside)
+    assert os.path.isdir(root)
+
+
+def test_full_queue_drops_the_evidence(tmp_path):
+    writer = EvidenceWriter(str(tmp_path / "evidence"), max_queue=1)  # Not started: nothing drains the queue
+    image = np.zeros((4, 4, 3), dtype=np.uint8)
+    assert writer.submit("plate", {"full": image}) is not None
+    assert writer.submit("plate", {"full": image}) is None
@@ -0,0 +1,101 @@
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("paho")
+pytest.importorskip("cv2")
+pytest.importorskip("pandas")
+
+import main
+from plate_model import metrics
+from raspi_clients.publisher import PendingMessage
+from raspi_clients.recent_plates import RecentPlateCache
+from raspi_clients.scheduler import TaskScheduler
+from raspi_clients.trigger import WARMUP, TRIGGER
+
+GATE = {
+    "id": "garage", "input": 0, "sensor_topic": "garage/ultrasonic", "actuator_topic": "garage/open_garage",
+    "results_topic": "garage/results", "trigger_distance": 200, "pipeline": "ocr",
+}
+
+
+class ScriptedTracker:
+    """ApproachTracker stand-in returning the next scripted event for every reading."""
+
+    def __init__(self, events):
+        self.events = list(events)
+
+    def update(self, distance):
+        return self.events.pop(0)
+
+    def speed(self):
+        return 100.0
+
+
+class RecordingPublisher:
+    def __init__(self):
+        self.messages = []
+
+    def publish(self, topic, payload, qos=1, retain=False, ttl=None):
+        self.messages.append((topic, payload))
+        return PendingMessage(topic, payload, qos, retain, ttl)
+
+
+def opens(publisher):
+    return [payload for topic, payload in publisher.messages if topic == GATE["actuator_topic"]]
+
+
+def reading(distance):
+    return SimpleNamespace(topic=GATE["sensor_topic"], payload=f"Object detected at {distance} cm".encode())
+
+
+@pytest.fixture
+def gate_process(monkeypatch):
+    publisher = RecordingPublisher()
+    monkeypatch.setattr(main, "gates", {"garage": GATE})
+    monkeypatch.setattr(main, "sensor_gates", {GATE["sensor_topic"]: "garage"})
+    monkeypatch.setattr(main, "scheduler", TaskScheduler())
+    monkeypatch.setattr(main, "recent_plates", RecentPlateCache())
+    monkeypatch.setattr(main, "trackers", {"garage": ScriptedTracker([WARMUP, TRIGGER, TRIGGER])})
+    monkeypatch.setattr(main, "gate_stats", {"garage": metrics.gate_metrics("garage")})
+    monkeypatch.setattr(main, "publisher", publisher)
+    monkeypatch.setattr(main, "authorized", None)
+    monkeypatch.setattr(main, "entry_log", None)
+    monkeypatch.setattr(main, "open_session", lambda task: SimpleNamespace(preempted=False))
+    pending = []
+    # The OCR pool reads the plate later, on its own thread: keep the callback for the test to call
+    monkeypatch.setattr(main, "run_ocr", lambda cap, on_result: pending.append(on_result))
+    return publisher, pending
+
+
+def test_trigger_while_the_plate_is_read_does_not_start_another_run(gate_process):
+    publisher, pending = gate_process
+    main.callback_ultrasonic_detection(None, None, reading(390))  # WARMUP
+    task = main.scheduler.next_task(timeout=0)
+    main.run_task(task)
+    assert len(pending) == 1
+
+    # The car reaches the trigger distance while the OCR is still running
+    main.callback_ultrasonic_detection(None, None, reading(180))
+    assert main.scheduler.is_busy("garage")
+    assert main.scheduler.next_task(timeout=0) is None
+
+    pending[0]({"plate": "ABC1D23", "plate_type": "plate_mercosul", "confidence": 0.9})
+    assert not main.scheduler.is_busy("garage")
+    assert opens(publisher) == ["True"]
+
+    # Still in front of the gate: the decision is reused, no second open command
+    main.callback_ultrasonic_detection(None, None, reading(150))
+    assert main.scheduler.next_task(timeout=0) is None
+    assert opens(publisher) == ["True"]
+
+
+def test_failed_run_frees_the_gate(gate_process, monkeypatch):
+    def broken(cap, on_result):
+        raise RuntimeError("camera gone")
+
+    monkeypatch.setattr(main, "run_ocr", broken)
+    main.callback_ultrasonic_detection(None, None, reading(390))
+    with pytest.raises(RuntimeError):
+        main.run_task(main.scheduler.next_task(timeout=0))
+    assert not main.scheduler.is_busy("garage")
@@ -0,0 +1,38 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("cv2")
+
+from plate_model.motion_gate import ChangeDetector
+
+
+def still_frame():
+    return np.full((360, 640, 3), 80, dtype=np.uint8)
+
+
+def test_static_empty_scene_is_skipped_up_to_max_skips():
+    gate = ChangeDetector(max_skips=3)
+    frame = still_frame()
+    assert gate.changed(frame)
+    gate.hold(False)
+    assert [gate.changed(frame) for _ in range(4)] == [False, False, False, True]
+
+
+def test_gate_stays_open_while_something_was_found():
+    gate = ChangeDetector(max_skips=3)
+    frame = still_frame()
+    assert gate.changed(frame)
+    gate.hold(True)
+    assert all(gate.changed(frame) for _ in range(5))
+    gate.hold(False)
+    assert not gate.changed(frame)
+
+
+def test_scene_change_runs_the_network():
+    gate = ChangeDetector()
+    frame = still_frame()
+    gate.changed(frame)
+    gate.hold(False)
+    moved = frame.copy()
+    moved[:, :320] = 200
+    assert gate.changed(moved)
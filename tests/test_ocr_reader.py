@@ -0,0 +1,55 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("cv2")
+
+from plate_model.ocr_reader import read_crops, RECOGNIZER_HEIGHT
+
+
+class ShuffledReader:
+    """
+    EasyOCR stand-in: reads each box as the gray level of its row, and returns
+    the results in reverse order, as corner points like the real recognizer.
+    """
+
+    def __init__(self):
+        self.calls = []
+
+    def recognize(self, image, horizontal_list, free_list, allowlist=None, batch_size=1):
+        self.calls.append((image.shape, len(horizontal_list), batch_size))
+        results = []
+        for x1, x2, y1, y2 in horizontal_list:
+            text = str(int(image[y1 + 1, x1 + 1]))
+            results.append(([[x1, y1], [x2, y1], [x2, y2], [x1, y2]], text, 0.9))
+        return list(reversed(results))
+
+
+def crop(level, width, height=40):
+    return np.full((height, width, 3), level, dtype=np.uint8)
+
+
+def test_results_map_back_to_their_crops():
+    reader = ShuffledReader()
+    crops = [crop(10, 120), crop(20, 90, height=30), crop(30, 200, height=80)]
+    results = read_crops(reader, crops)
+    assert [[text for _, text, _ in entries] for entries in results] == [["10"], ["20"], ["30"]]
+    # One recognizer call for every crop, on a canvas of rows of the recognizer height
+    assert len(reader.calls) == 1
+    shape, boxes, batch_size = reader.calls[0]
+    assert shape[0] == 3 * RECOGNIZER_HEIGHT
+    assert boxes == batch_size == 3
+
+
+def test_crop_without_text_gets_an_empty_list():
+    class SkippingReader(ShuffledReader):
+        def recognize(self, image, horizontal_list, free_list, allowlist=None, batch_size=1):
+            return [entry for entry in super().recognize(image, horizontal_list, free_list, allowlist, batch_size)
+                    if entry[1] != "20"]
+
+    results = read_crops(SkippingReader(), [crop(10, 100), crop(20, 100), crop(30, 100)])
+    assert [len(entries) for entries in results] == [1, 0, 1]
+    assert results[2][0][1] == "30"
+
+
+def test_no_crops():
+    assert read_crops(ShuffledReader(), []) == []
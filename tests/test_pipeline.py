@@ -0,0 +1,52 @@
+from collections import namedtuple
+
+from plate_model.pipeline import serial_detections
+
+# Same fields as darknet.Detections, without needing NumPy and libdarknet
+Detections = namedtuple("Detections", ["class_ids", "confidences", "boxes", "reused"], defaults=(False,))
+
+
+class FakeCapture:
+    def __init__(self, frames):
+        self.frames = list(frames)
+
+    def isOpened(self):
+        return bool(self.frames)
+
+    def read(self):
+        return True, self.frames.pop(0)
+
+
+class FrameChanges:
+    """ChangeDetector stand-in: a frame counts as changed when it differs from the previous one."""
+
+    def __init__(self):
+        self.last = None
+        self.holds = []
+
+    def changed(self, frame):
+        changed = frame != self.last
+        self.last = frame
+        return changed
+
+    def hold(self, found):
+        self.holds.append(found)
+
+
+def test_skipped_frames_are_marked_reused():
+    calls = []
+
+    def detect_frame(frame, thresh):
+        calls.append(frame)
+        return Detections([0], [90.0], [frame])
+
+    changes = FrameChanges()
+    stream = serial_detections(
+        FakeCapture(["a", "a", "a", "b"]), None, ["plate"], None, 0.25,
+        detect_frame=detect_frame, change_detector=changes,
+    )
+    results = [(frame, detections.reused, detections.boxes) for frame, detections in stream]
+    assert calls == ["a", "b"]
+    assert results == [("a", False, ["a"]), ("a", True, ["a"]), ("a", True, ["a"]), ("b", False, ["b"])]
+    # Every inference reports whether it found anything, so the gate can stay open
+    assert changes.holds == [True, True]
@@ -0,0 +1,84 @@
+import pytest
+
+from plate_model.plate_decoder import (
+    PlateDecoder, READINGS, SHARE, candidates_from_text, merge_candidates, decode_plate,
+)
+
+
+def test_grammar_corrects_confusions():
+    reading = decode_plate(candidates_from_text("A8C1D23", 0.9), "plate_mercosul")
+    assert reading.text == "ABC1D23"
+    assert reading.grammar == "mercosul"
+    reading = decode_plate(candidates_from_text("ABCI234", 0.9), "antiga")
+    assert reading.text == "ABC1234"
+
+
+def test_unknown_type_tries_every_grammar():
+    assert decode_plate(candidates_from_text("ABC1234", 0.9)).grammar == "antiga"
+    assert decode_plate(candidates_from_text("ABC1D23", 0.9)).grammar == "mercosul"
+
+
+def test_impossible_or_short_readings():
+    assert decode_plate(candidates_from_text("ABC12", 0.9), "mercosul") is None
+    # No letter or confusable digit for the first slot
+    assert decode_plate(candidates_from_text("4BC1D23", 0.9), "mercosul") is None
+
+
+def test_readings_score_is_absolute_confidence():
+    reading = decode_plate(candidates_from_text("ABC1D23", 0.9), "mercosul", normalize=READINGS)
+    assert reading.score == pytest.approx(0.9)
+    # Three agreeing low-confidence reads stay low
+    slots = merge_candidates([candidates_from_text("ABC1D23", 0.4)] * 3)
+    assert decode_plate(slots, "mercosul", normalize=READINGS).score == pytest.approx(0.4)
+
+
+def test_share_score_measures_agreement():
+    agreeing = merge_candidates([candidates_from_text("ABC1D23", 0.6)] * 2)
+    assert decode_plate(agreeing, "mercosul", normalize=SHARE).score == pytest.approx(1.0)
+    split = merge_candidates([candidates_from_text("ABC1D23", 0.6), candidates_from_text("ABC1D28", 0.6)])
+    reading = decode_plate(split, "mercosul", normalize=SHARE)
+    assert reading.slot_scores[-1] == pytest.approx(0.5)
+
+
+def test_substituted_slot_is_penalised():
+    decoder = PlateDecoder(confusion_weight=0.7)
+    for normalize in (READINGS, SHARE):
+        read_right = decoder.decode(candidates_from_text("ABC1D23", 0.9), "mercosul", normalize)
+        substituted = decoder.decode(candidates_from_text("A8C1D23", 0.9), "mercosul", normalize)
+        assert substituted.text == read_right.text
+        assert substituted.slot_scores[1] == pytest.approx(read_right.slot_scores[1] * 0.7)
+        assert substituted.score < read_right.score
+
+
+def test_majority_outvotes_a_misread():
+    slots = merge_candidates([
+        candidates_from_text("ABC1D23", 0.9),
+        candidates_from_text("ABC1D23", 0.8),
+        candidates_from_text("ABC1D28", 0.9),
+    ])
+    reading = decode_plate(slots, "mercosul")
+    assert reading.text == "ABC1D23"
+    assert reading.slot_scores[-1] == pytest.approx(1.7 / 3)
+
+
+def ocr_result(text, confidence):
+    return [([[0, 0], [1, 0], [1, 1], [0, 1]], text, confidence)]
+
+
+def test_ocr_fusion_accepts_consistent_reads_at_typical_confidence():
+    pytest.importorskip("cv2")
+    from plate_model.darknet_video_ocr import fuse_plate_ocr
+
+    plate, score = fuse_plate_ocr("plate_mercosul", [ocr_result("ABC1D23", 0.8)] * 3)
+    assert plate == "ABC1D23"
+    assert score == pytest.approx(0.8)
+
+
+def test_ocr_fusion_outvotes_a_misread_and_honours_a_set_threshold():
+    pytest.importorskip("cv2")
+    from plate_model.darknet_video_ocr import fuse_plate_ocr
+
+    results = [ocr_result("ABC1D23", 0.8), ocr_result("ABC1D23", 0.8), ocr_result("ABC1023", 0.8)]
+    plate, score = fuse_plate_ocr("plate_mercosul", results)
+    assert plate == "ABC1D23"
+    assert fuse_plate_ocr("plate_mercosul", results, min_score=score + 0.01) == ("None", "None")
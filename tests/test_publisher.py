@@ -0,0 +1,124 @@
+import threading
+import time
+
+from raspi_clients.publisher import MqttPublisher, DELIVERED, DROPPED, EXPIRED
+from plate_model.metrics import MetricsRegistry, MetricsPublisher
+
+
+class FakeInfo:
+    def __init__(self, published=True):
+        self.rc = 0
+        self.published = published
+
+    def is_published(self):
+        return self.published
+
+
+class FakeClient:
+    """
+    Stands in for paho's client: connected or not, acknowledging at once or on demand.
+    """
+
+    def __init__(self, connected=True, ack=True):
+        self.connected = connected
+        self.ack = ack
+        self.sent = []
+
+    def is_connected(self):
+        return self.connected
+
+    def publish(self, topic, payload, qos=0, retain=False):
+        info = FakeInfo(self.ack)
+        self.sent.append((topic, payload, qos, info))
+        return info
+
+
+def outcome(message, timeout=2.0):
+    """
+    Wait for the message's done callback and return the state it reported.
+    """
+    done = threading.Event()
+    states = []
+    message.add_done_callback(lambda m: (states.append(m.state), done.set()))
+    assert done.wait(timeout)
+    return states[0]
+
+
+def test_delivery_is_reported_to_the_callback():
+    client = FakeClient()
+    publisher = MqttPublisher(client, poll_interval=0.01).start()
+    try:
+        message = publisher.publish("garage/open_garage", "True", qos=0, ttl=10.0)
+        assert outcome(message) == DELIVERED
+        assert message.delivered_at >= message.queued_at
+        assert client.sent[0][:3] == ("garage/open_garage", b"True", 0)
+        # Registered after the fact: called right away
+        assert outcome(message, timeout=0) == DELIVERED
+    finally:
+        publisher.stop()
+
+
+def test_message_waits_for_the_acknowledgement():
+    client = FakeClient(ack=False)
+    publisher = MqttPublisher(client, poll_interval=0.01).start()
+    try:
+        message = publisher.publish("garage/results", "{}", qos=1)
+        assert not message.wait(timeout=0.1)
+        client.sent[0][3].published = True
+        assert message.wait(timeout=2.0)
+    finally:
+        publisher.stop()
+
+
+def test_message_expires_while_the_broker_is_unreachable():
+    client = FakeClient(connected=False)
+    publisher = MqttPublisher(client, poll_interval=0.01).start()
+    try:
+        message = publisher.publish("garage/open_garage", "True", qos=0, ttl=0.05)
+        assert outcome(message) == EXPIRED
+        assert client.sent == []
+    finally:
+        publisher.stop()
+
+
+def test_queued_messages_are_sent_once_connected():
+    client = FakeClient(connected=False)
+    publisher = MqttPublisher(client, poll_interval=0.01).start()
+    try:
+        messages = [publisher.publish("garage/results", str(k)) for k in range(3)]
+        time.sleep(0.05)
+        assert publisher.queue_depth() == 3
+        client.connected = True
+        assert all(message.wait(timeout=2.0) for message in messages)
+        assert [payload for _, payload, _, _ in client.sent] == [b"0", b"1", b"2"]
+    finally:
+        publisher.stop()
+
+
+def test_oldest_message_is_dropped_when_the_buffer_is_full():
+    publisher = MqttPublisher(FakeClient(connected=False), max_queue=2)  # Not started
+    first = publisher.publish("garage/results", "1")
+    dropped = []
+    first.add_done_callback(lambda m: dropped.append(m.state))
+    publisher.publish("garage/results", "2")
+    publisher.publish("garage/results", "3")
+    assert dropped == [DROPPED]
+    assert publisher.queue_depth() == 2
+
+
+def test_metrics_go_through_the_publisher():
+    registry = MetricsRegistry()
+    registry.counter("things_total", "Things").inc()
+    client = FakeClient()
+    publisher = MqttPublisher(client, poll_interval=0.01).start()
+    metrics_publisher = MetricsPublisher(registry, publisher, topic="garage/metrics", interval=0.02).start()
+    try:
+        deadline = time.monotonic() + 2.0
+        while not client.sent and time.monotonic() < deadline:
+            time.sleep(0.01)
+        topic, payload, qos, _ = client.sent[0]
+        assert (topic, qos) == ("garage/metrics", 0)
+        assert b"things_total" in payload
+    finally:
+        metrics_publisher.stop()
+        publisher.stop()
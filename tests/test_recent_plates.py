@@ -0,0 +1,64 @@
+from raspi_clients.recent_plates import RecentPlateCache
+
+
+def test_decision_is_reused_while_the_vehicle_is_present():
+    recent = RecentPlateCache(ttl=60.0, clear_grace=3.0)
+    recent.arrived("garage", now=0.0)
+    assert recent.lookup("garage", now=0.0) is None
+    recent.remember("garage", "ABC1D23", "opened", now=1.0)
+    assert recent.lookup("garage", now=30.0).plate == "ABC1D23"
+    assert recent.lookup("side", now=30.0) is None
+
+
+def test_entry_survives_the_grace_period_only():
+    recent = RecentPlateCache(ttl=60.0, clear_grace=3.0)
+    recent.arrived("garage", now=0.0)
+    recent.remember("garage", "ABC1D23", "opened", now=1.0)
+    recent.left("garage", now=10.0)
+    assert not recent.is_present("garage")
+    assert recent.lookup("garage", now=12.0).decision == "opened"
+    assert recent.lookup("garage", now=13.5) is None
+
+
+def test_return_within_the_grace_period_is_the_same_vehicle():
+    recent = RecentPlateCache(ttl=60.0, clear_grace=3.0)
+    recent.arrived("garage", now=0.0)
+    recent.remember("garage", "ABC1D23", "opened", now=1.0)
+    recent.left("garage", now=10.0)
+    recent.arrived("garage", now=12.0)
+    # Present again, so the grace period no longer applies
+    assert recent.lookup("garage", now=20.0).plate == "ABC1D23"
+
+
+def test_arrival_after_the_grace_period_runs_detection_again():
+    recent = RecentPlateCache(ttl=60.0, clear_grace=3.0)
+    recent.arrived("garage", now=0.0)
+    recent.remember("garage", "ABC1D23", "opened", now=1.0)
+    recent.left("garage", now=10.0)
+    recent.arrived("garage", now=14.0)
+    assert recent.lookup("garage", now=14.0) is None
+
+
+def test_no_entry_outlives_the_ttl():
+    recent = RecentPlateCache(ttl=60.0, clear_grace=3.0)
+    recent.arrived("garage", now=0.0)
+    recent.remember("garage", "ABC1D23", "opened", now=1.0)
+    assert recent.lookup("garage", now=61.0) is not None
+    assert recent.lookup("garage", now=61.5) is None
+
+
+def test_decision_for_a_vehicle_that_already_left_starts_its_grace():
+    recent = RecentPlateCache(ttl=60.0, clear_grace=3.0)
+    recent.arrived("garage", now=0.0)
+    recent.left("garage", now=2.0)
+    recent.remember("garage", "ABC1D23", "opened", now=5.0)
+    assert recent.lookup("garage", now=7.0) is not None
+    assert recent.lookup("garage", now=8.5) is None
+
+
+def test_forget_drops_the_entry():
+    recent = RecentPlateCache()
+    recent.arrived("garage", now=0.0)
+    recent.remember("garage", "ABC1D23", "opened", now=1.0)
+    recent.forget("garage")
+    assert recent.lookup("garage", now=2.0) is None
@@ -0,0 +1,87 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+import plate_model.darknet as darknet
+from plate_model.roi_cascade import CascadeDetector
+
+WIDTH, HEIGHT = 416, 416
+CLASS_NAMES = ["plate", "plate_mercosul"]
+
+
+class PassThroughPool:
+    def acquire(self):
+        return 0
+
+    def upload(self, slot, image):
+        return image
+
+    def release(self, slot):
+        pass
+
+
+class MarkerDetector:
+    """
+    Finds the bright rectangle painted in the frame and reports it as a plate, in
+    network coordinates of whatever image (frame or crop) it was given.
+    """
+
+    def __init__(self):
+        self.shapes = []
+
+    def detect(self, image, thresh=.5):
+        self.shapes.append(image.shape[:2])
+        ys, xs = np.nonzero(image)
+        if len(xs) == 0:
+            return darknet.Detections(np.empty(0, dtype=np.intp), np.empty(0, dtype=np.float32),
+                                      np.empty((0, 4), dtype=np.float32))
+        h, w = image.shape[:2]
+        x1, x2, y1, y2 = xs.min(), xs.max() + 1, ys.min(), ys.max() + 1
+        box = [(x1 + x2) / 2 * WIDTH / w, (y1 + y2) / 2 * HEIGHT / h, (x2 - x1) * WIDTH / w, (y2 - y1) * HEIGHT / h]
+        return darknet.Detections(np.array([1]), np.array([90.0], dtype=np.float32), np.array([box], dtype=np.float32))
+
+
+def frame_with_plate(cx, cy, w, h, frame_w=1280, frame_h=720):
+    frame = np.zeros((frame_h, frame_w), dtype=np.uint8)
+    frame[cy - h // 2:cy + h // 2, cx - w // 2:cx + w // 2] = 255
+    return frame
+
+
+def cascade(detector, **kwargs):
+    return CascadeDetector(detector, CLASS_NAMES, PassThroughPool(), WIDTH, HEIGHT, ["plate_mercosul"], **kwargs)
+
+
+def test_crop_detections_come_back_in_full_frame_coordinates():
+    detector = MarkerDetector()
+    cascade_detector = cascade(detector, stable_frames=2)
+    frame = frame_with_plate(900, 500, 120, 40)
+    full = [cascade_detector.detect(frame) for _ in range(2)]
+    cropped = cascade_detector.detect(frame)
+
+    assert cascade_detector.full_scans == 2 and cascade_detector.roi_scans == 1
+    assert detector.shapes[2] != (720, 1280)  # The third run only saw the crop
+    np.testing.assert_allclose(cropped.boxes[0], full[0].boxes[0], atol=1.0)
+    to_frame = np.array([1280 / WIDTH, 720 / HEIGHT] * 2)
+    np.testing.assert_allclose(cropped.boxes[0] * to_frame, [900, 500, 120, 40], atol=3.0)
+
+
+def test_lost_plate_falls_back_to_full_frames():
+    detector = MarkerDetector()
+    cascade_detector = cascade(detector, stable_frames=2)
+    for _ in range(3):
+        cascade_detector.detect(frame_with_plate(900, 500, 120, 40))
+    cascade_detector.detect(np.zeros((720, 1280), dtype=np.uint8))
+    assert cascade_detector.track is None
+    cascade_detector.detect(frame_with_plate(900, 500, 120, 40))
+    assert detector.shapes[-1] == (720, 1280)
+
+
+@pytest.mark.parametrize("track", [(1270, 710, 60, 20), (5, 5, 60, 20), (640, 360, 2000, 800)])
+def test_roi_stays_inside_the_frame_with_the_network_aspect(track):
+    cascade_detector = cascade(MarkerDetector(), max_zoom=4.0)
+    cascade_detector.track = track
+    x1, y1, x2, y2 = cascade_detector._roi(1280, 720)
+    assert 0 <= x1 < x2 <= 1280
+    assert 0 <= y1 < y2 <= 720
+    assert abs((x2 - x1) - (y2 - y1)) <= 1  # Square network, square crop
+    assert x2 - x1 >= 1280 / 4.0 - 1  # Never zooms in more than max_zoom
@@ -0,0 +1,68 @@
+from raspi_clients.scheduler import TaskScheduler
+
+
+def test_triggers_for_a_busy_gate_are_coalesced():
+    scheduler = TaskScheduler()
+    assert scheduler.submit("garage", "fullplate")
+    assert not scheduler.submit("garage", "fullplate")
+    task = scheduler.next_task(timeout=0)
+    # Still running: coalesced as well
+    assert not scheduler.submit("garage", "fullplate")
+    scheduler.finish(task)
+    assert scheduler.submit("garage", "fullplate")
+    stats = scheduler.stats()
+    assert stats["triggers_received"] == 4
+    assert stats["triggers_coalesced"] == 2
+    assert stats["tasks_run"] == 1
+
+
+def test_gates_are_served_in_turn():
+    scheduler = TaskScheduler()
+    for gate in ("garage", "side", "back"):
+        scheduler.submit(gate, "fullplate")
+    served = []
+    for _ in range(3):
+        task = scheduler.next_task(timeout=0)
+        served.append(task.gate)
+        scheduler.finish(task)
+    assert served == ["garage", "side", "back"]
+    assert scheduler.next_task(timeout=0) is None
+
+
+def test_waiting_ignores_the_excluded_gate():
+    scheduler = TaskScheduler()
+    scheduler.submit("garage", "fullplate")
+    task = scheduler.next_task(timeout=0)
+    assert not scheduler.waiting(exclude="garage")
+    scheduler.submit("side", "fullplate")
+    assert scheduler.waiting(exclude="garage")
+    assert not scheduler.waiting(exclude="side")
+    assert scheduler.is_busy(task.gate)
+
+
+def test_requeued_task_goes_behind_the_others_and_keeps_its_trigger_time():
+    scheduler = TaskScheduler()
+    scheduler.submit("garage", "fullplate")
+    task = scheduler.next_task(timeout=0)
+    scheduler.submit("side", "ocr")
+    assert scheduler.requeue(task)
+    nxt = scheduler.next_task(timeout=0)
+    assert nxt.gate == "side"
+    scheduler.finish(nxt)
+    again = scheduler.next_task(timeout=0)
+    assert again.gate == "garage"
+    assert again.attempt == 2
+    assert again.triggered_at == task.triggered_at
+    assert scheduler.stats()["tasks_requeued"] == 1
+
+
+def test_requeue_stops_after_max_attempts():
+    scheduler = TaskScheduler(max_attempts=2)
+    scheduler.submit("garage", "fullplate")
+    task = scheduler.next_task(timeout=0)
+    assert scheduler.requeue(task)
+    task = scheduler.next_task(timeout=0)
+    assert not scheduler.requeue(task)
+    scheduler.finish(task)
+    assert not scheduler.is_busy("garage")
+    assert scheduler.queue_depth() == 0
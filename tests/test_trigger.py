@@ -0,0 +1,49 @@
+from raspi_clients.trigger import ApproachTracker, parse_distance, WARMUP, TRIGGER, CLEAR
+
+
+def feed(tracker, readings, start=0.0, step=0.1):
+    events = []
+    for k, distance in enumerate(readings):
+        event = tracker.update(distance, timestamp=start + k * step)
+        if event is not None:
+            events.append(event)
+    return events
+
+
+def test_parse_distance():
+    assert parse_distance("Object detected at 123 cm") == 123
+    assert parse_distance("hello") is None
+
+
+def test_approach_warms_up_then_triggers_once():
+    tracker = ApproachTracker(trigger_distance=200, warmup_distance=400)
+    # Closing in at 100 cm/s
+    events = feed(tracker, [390 - 10 * k for k in range(25)])
+    assert events == [WARMUP, TRIGGER]
+    assert tracker.is_present()
+    # Waiting in front of the gate does not trigger again
+    assert feed(tracker, [150] * 20, start=3.0) == []
+
+
+def test_slow_car_far_away_does_not_warm_up():
+    tracker = ApproachTracker(trigger_distance=200, warmup_distance=400)
+    assert feed(tracker, [390] * 10) == []
+
+
+def test_leaving_clears_with_hysteresis():
+    tracker = ApproachTracker(trigger_distance=200, hysteresis=30)
+    assert feed(tracker, [150] * 5) == [TRIGGER]
+    # Inside the hysteresis band the car is still present
+    assert feed(tracker, [220] * 5, start=1.0) == []
+    assert feed(tracker, [300] * 5, start=2.0) == [CLEAR]
+    assert not tracker.is_present()
+
+
+def test_silence_clears():
+    tracker = ApproachTracker(trigger_distance=200, stale_after=1.5)
+    feed(tracker, [150] * 3)
+    assert tracker.expire(timestamp=1.0) is None
+    assert tracker.expire(timestamp=2.0) == CLEAR
+    assert tracker.expire(timestamp=3.0) is None
+    # A new arrival triggers again
+    assert feed(tracker, [150] * 3, start=4.0) == [TRIGGER]
@@ -0,0 +1,67 @@
+import pytest
+
+from plate_model.voting import TemporalVote, PlateConsensus
+
+
+def frame(text, confidence=0.9):
+    # Evenly spaced characters across the plate
+    return [(char, confidence, (k + 0.5) / len(text)) for k, char in enumerate(text)]
+
+
+def test_temporal_vote_margin():
+    vote = TemporalVote()
+    assert vote.leader() == (None, 0.0)
+    vote.add("plate_mercosul", 0.9)
+    vote.add("plate_antigo", 0.6)
+    vote.add("plate_mercosul", 0.8)
+    label, margin = vote.leader()
+    assert label == "plate_mercosul"
+    assert margin == pytest.approx(1.1)
+    assert vote.mean_confidence("plate_mercosul") == pytest.approx(0.85)
+
+
+def test_single_frame_is_never_a_consensus():
+    consensus = PlateConsensus(expected_slots=7, margin=0.5, min_frames=1)
+    assert consensus.min_frames == 2
+    consensus.update(frame("ABC1D23", 0.99))
+    assert consensus.decision() is None
+    consensus.update(frame("ABC1D23", 0.99))
+    text, confidences = consensus.decision()
+    assert text == "ABC1D23"
+    assert confidences == [99.0] * 7
+
+
+def test_flickering_character_needs_its_margin():
+    consensus = PlateConsensus(expected_slots=7, margin=1.5)
+    consensus.update(frame("ABC1D23"))
+    consensus.update(frame("ABC1D28"))
+    # Last slot: 3 vs 8 tied, the other slots are at 1.8
+    assert consensus.decision() is None
+    for _ in range(2):
+        consensus.update(frame("ABC1D23"))
+    # Last slot: 2.7 vs 0.9
+    assert consensus.decision()[0] == "ABC1D23"
+
+
+def test_candidates_need_every_slot():
+    consensus = PlateConsensus(expected_slots=7)
+    consensus.update(frame("ABC"))
+    assert consensus.candidates() is None
+    consensus.reset()
+    consensus.update(frame("ABC1D23"))
+    candidates = consensus.candidates()
+    assert [slot[0][0] for slot in candidates] == list("ABC1D23")
+
+
+def test_confidences_of_a_decoded_plate_are_detector_confidences():
+    consensus = PlateConsensus(expected_slots=7, margin=1.5)
+    assert consensus.confidences("ABC1D23") is None
+    consensus.update(frame("A8C1D23", 0.7))
+    consensus.update(frame("A8C1D23", 0.9))
+    # The decoder read the 8 as B; it still reports what the detector saw for that slot
+    confidences = consensus.confidences("ABC1D23", {"B": "8", "8": "B"})
+    assert confidences == [80.0] * 7
+    # Unknown counterparts leave a substituted slot without votes
+    assert consensus.confidences("ABC1D23")[1] == 0.0
+    # Asking does not add empty votes to the slots
+    assert all(len(slot.vote.scores) == 1 for slot in consensus.slots)